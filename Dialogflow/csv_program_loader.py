@@ -6,16 +6,91 @@ This module reads program information from a CSV file and converts it
 into the structured format needed by the screening agent.
 
 Usage:
-    python csv_program_loader.py path/to/programs.csv
+    python csv_program_loader.py path/to/programs.csv [-o programs_catalog.json]
+
+The default mode compiles the CSV into a catalog artifact
+(programs_catalog.json): compact JSON with a version header that the
+server loads directly (CATALOG_PATH), so no Python module needs to be
+generated or imported. Each row is fingerprinted by content; when the
+artifact already exists, only rows whose hash changed are re-parsed.
 
 Author: AbilityPath Hackathon Team
 Created: 2025-01-08
 """
 
 import csv
+import hashlib
 import json
+import os
 import re
-from typing import Dict, List, Any
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Iterator, Optional
+
+
+# Catalog artifact header. Bump ARTIFACT_VERSION whenever the parsing
+# rules change so existing artifacts are fully re-parsed.
+ARTIFACT_FORMAT = "abilitypath-program-catalog"
+ARTIFACT_VERSION = 1
+
+# Columns the parser reads; a row's fingerprint covers exactly these
+PARSED_COLUMNS = (
+    "Program",
+    "Description",
+    "Population",
+    "Other Entrance Criteria",
+    "What County/City does this program serve? ",
+    "What is the location of this program/service?",
+    "When?",
+    "How to get started?",
+)
+
+AGE_RANGE_PATTERN = re.compile(r'(\d+)\s*-\s*(\d+)')
+
+
+def row_fingerprint(row: Dict[str, str]) -> str:
+    """
+    Content hash of the parsed columns of a CSV row.
+
+    Args:
+        row: Dictionary from CSV DictReader
+
+    Returns:
+        Hex digest; equal digests parse to equal programs
+    """
+    payload = "\x1f".join(row.get(column) or "" for column in PARSED_COLUMNS)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def catalog_version(programs: List[Dict[str, Any]]) -> str:
+    """
+    Content hash of a program list (same as prompt_cache.catalog_fingerprint,
+    so it equals the server's ProgramCatalog.version).
+    """
+    payload = json.dumps(programs, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def load_catalog_artifact(path: str) -> Dict[str, Any]:
+    """
+    Read a compiled catalog artifact and check its header.
+
+    Args:
+        path: Path to the artifact written by ProgramCSVLoader.compile()
+
+    Returns:
+        The artifact dictionary ("version", "programs", "row_hashes", ...)
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        artifact = json.load(f)
+
+    if not isinstance(artifact, dict) or artifact.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"{path}: not a program catalog artifact")
+    if artifact.get("format_version") != ARTIFACT_VERSION:
+        raise ValueError(
+            f"{path}: artifact format version {artifact.get('format_version')}, "
+            f"expected {ARTIFACT_VERSION}; recompile it from the CSV"
+        )
+    return artifact
 
 
 class ProgramCSVLoader:
@@ -31,21 +106,94 @@ class ProgramCSVLoader:
         self.csv_path = csv_path
         self.programs = []
         
+    def iter_rows(self) -> Iterator[Dict[str, str]]:
+        """
+        Stream the CSV rows one at a time.
+        
+        Yields:
+            Dictionaries from CSV DictReader
+        """
+        with open(self.csv_path, 'r', encoding='utf-8', newline='') as file:
+            yield from csv.DictReader(file)
+    
     def load_programs(self) -> List[Dict[str, Any]]:
         """
         Read the CSV file and parse program information.
         
+        Calling this again re-reads the file and replaces self.programs.
+        
         Returns:
             List of program dictionaries ready for the screening agent
         """
-        with open(self.csv_path, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
+        self.programs = [self._parse_program_row(row) for row in self.iter_rows()]
+        return self.programs
+    
+    def compile(self, output_path: str = "programs_catalog.json",
+                previous_path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Compile the CSV into a catalog artifact the server can load.
+        
+        Rows are streamed and fingerprinted; a row whose hash appears in
+        the previous artifact reuses its parsed program instead of being
+        parsed again. The artifact is written atomically, so a server
+        watching it never reads a partial file.
+        
+        Args:
+            output_path: Path to write the artifact
+            previous_path: Earlier artifact to reuse rows from (defaults
+                to output_path if it exists)
             
-            for row in reader:
+        Returns:
+            Dictionary with the catalog version and parsed/reused row counts
+        """
+        previous = {}
+        previous_path = previous_path or output_path
+        if os.path.exists(previous_path):
+            try:
+                artifact = load_catalog_artifact(previous_path)
+                previous = dict(zip(artifact["row_hashes"], artifact["programs"]))
+            except (ValueError, KeyError) as e:
+                print(f"⚠️  Ignoring previous artifact: {e}")
+        
+        programs = []
+        row_hashes = []
+        parsed = 0
+        for row in self.iter_rows():
+            row_hash = row_fingerprint(row)
+            program = previous.get(row_hash)
+            if program is None:
                 program = self._parse_program_row(row)
-                self.programs.append(program)
+                parsed += 1
+            programs.append(program)
+            row_hashes.append(row_hash)
+        
+        self.programs = programs
+        version = catalog_version(programs)
+        artifact = {
+            "format": ARTIFACT_FORMAT,
+            "format_version": ARTIFACT_VERSION,
+            "version": version,
+            "source": os.path.basename(self.csv_path),
+            "compiled_at": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            "count": len(programs),
+            "row_hashes": row_hashes,
+            "programs": programs,
+        }
         
-        return self.programs
+        temp_path = f"{output_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(artifact, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temp_path, output_path)
+        
+        result = {
+            "version": version,
+            "programs": len(programs),
+            "parsed": parsed,
+            "reused": len(programs) - parsed,
+        }
+        print(f"✅ Compiled {len(programs)} programs to {output_path} "
+              f"(version {version[:12]}, {parsed} parsed, {result['reused']} unchanged)")
+        return result
     
     def _parse_program_row(self, row: Dict[str, str]) -> Dict[str, Any]:
         """
@@ -94,7 +242,7 @@ class ProgramCSVLoader:
             age_range["max_age"] = 17
         
         # Check for other age patterns
-        age_match = re.search(r'(\d+)\s*-\s*(\d+)', population_text)
+        age_match = AGE_RANGE_PATTERN.search(population_text)
         if age_match:
             age_range["min_age"] = int(age_match.group(1))
             age_range["max_age"] = int(age_match.group(2))
@@ -218,7 +366,9 @@ class ProgramCSVLoader:
             if "San Mateo County" not in counties:
                 counties.append("San Mateo County")
         
-        return list(set(counties))  # Remove duplicates
+        # Remove duplicates, keeping first-seen order so the same CSV always
+        # compiles to the same catalog version
+        return list(dict.fromkeys(counties))
     
     def _parse_location(self, row: Dict[str, str]) -> str:
         """
@@ -290,6 +440,9 @@ class ProgramCSVLoader:
         """
         Save loaded programs as a Python module that can replace programs_database.py
         
+        Legacy: the server loads the compile() artifact directly via
+        CATALOG_PATH, so this is only needed for older deployments.
+        
         Args:
             output_path: Path to save the Python module
         """
@@ -300,6 +453,10 @@ class ProgramCSVLoader:
             f.write('Auto-generated from CSV file\n')
             f.write('Created: 2025-01-08\n')
             f.write('"""\n\n')
+            f.write('try:\n')
+            f.write('    from program_catalog import ProgramCatalog\n')
+            f.write('except ImportError:  # outside LangChain/: plain scans over PROGRAMS\n')
+            f.write('    ProgramCatalog = None\n\n')
             
             f.write('PROGRAMS = [\n')
             
@@ -316,12 +473,18 @@ class ProgramCSVLoader:
             
             # Add helper functions
             f.write('''
+# Indexed lookups, built once from PROGRAMS (when program_catalog is available)
+CATALOG = ProgramCatalog(PROGRAMS) if ProgramCatalog is not None else None
+
+
 def get_all_programs():
     """Return all available programs."""
     return PROGRAMS
 
 def get_program_by_name(name: str):
     """Get a specific program by name."""
+    if CATALOG is not None:
+        return CATALOG.get_by_name(name)
     for program in PROGRAMS:
         if program["name"].lower() == name.lower():
             return program
@@ -329,10 +492,14 @@ def get_program_by_name(name: str):
 
 def get_programs_by_county(county: str):
     """Get programs serving a specific county."""
+    if CATALOG is not None:
+        return CATALOG.programs_for_county(county)
     return [p for p in PROGRAMS if county in p.get("counties_served", [])]
 
 def get_programs_by_type(program_type: str):
     """Get programs of a specific type."""
+    if CATALOG is not None:
+        return CATALOG.programs_for_type(program_type)
     return [p for p in PROGRAMS if program_type in p.get("program_type", [])]
 ''')
         
@@ -366,38 +533,41 @@ def get_programs_by_type(program_type: str):
 
 
 def main():
-    """Main function to load and convert CSV program data."""
-    import sys
-    
-    # Check if CSV path is provided
-    if len(sys.argv) < 2:
-        print("Usage: python csv_program_loader.py path/to/programs.csv")
-        print("\nExample:")
-        print("  python csv_program_loader.py 'WIP_Nov 7_ Tech For Good AbilityPath Info. - Program Info.csv'")
-        sys.exit(1)
+    """Main function to compile CSV program data into a catalog artifact."""
+    import argparse
     
-    csv_path = sys.argv[1]
+    parser = argparse.ArgumentParser(
+        description="Compile an AbilityPath program CSV into a catalog artifact",
+        epilog="Example: python csv_program_loader.py "
+               "'WIP_Nov 7_ Tech For Good AbilityPath Info. - Program Info.csv'",
+    )
+    parser.add_argument("csv_path", help="program info CSV")
+    parser.add_argument("-o", "--output", default="programs_catalog.json",
+                        help="catalog artifact to write (default: programs_catalog.json)")
+    parser.add_argument("--python-module", action="store_true",
+                        help="also write the legacy programs_database_real.py")
+    args = parser.parse_args()
     
-    print(f"📂 Loading programs from: {csv_path}\n")
+    print(f"📂 Loading programs from: {args.csv_path}\n")
     
-    # Load programs
-    loader = ProgramCSVLoader(csv_path)
-    programs = loader.load_programs()
+    loader = ProgramCSVLoader(args.csv_path)
+    loader.compile(args.output)
     
     # Print summary
     loader.print_summary()
     
     # Save outputs
-    loader.save_as_python_module("programs_database_real.py")
     loader.save_as_json("programs_data.json")
+    if args.python_module:
+        loader.save_as_python_module("programs_database_real.py")
     
     print(f"\n{'='*70}")
     print("✅ CONVERSION COMPLETE!")
     print(f"{'='*70}\n")
     print("Next steps:")
     print("1. Review programs_data.json to verify data accuracy")
-    print("2. Replace programs_database.py with programs_database_real.py")
-    print("3. Restart your screening agent")
+    print(f"2. Point the agent at the catalog: CATALOG_PATH={os.path.abspath(args.output)}")
+    print("   (a running agent picks up a recompiled catalog by itself)")
     print()
 
 
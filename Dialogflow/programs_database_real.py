@@ -5,6 +5,11 @@ Auto-generated from CSV file
 Created: 2025-01-08
 """
 
+try:
+    from program_catalog import ProgramCatalog
+except ImportError:  # outside LangChain/: plain scans over PROGRAMS
+    ProgramCatalog = None
+
 PROGRAMS = [
     {
         "name": 'Adult Day Program, Burlingame',
@@ -204,12 +209,18 @@ PROGRAMS = [
 ]
 
 
+# Indexed lookups, built once from PROGRAMS (when program_catalog is available)
+CATALOG = ProgramCatalog(PROGRAMS) if ProgramCatalog is not None else None
+
+
 def get_all_programs():
     """Return all available programs."""
     return PROGRAMS
 
 def get_program_by_name(name: str):
     """Get a specific program by name."""
+    if CATALOG is not None:
+        return CATALOG.get_by_name(name)
     for program in PROGRAMS:
         if program["name"].lower() == name.lower():
             return program
@@ -217,8 +228,12 @@ def get_program_by_name(name: str):
 
 def get_programs_by_county(county: str):
     """Get programs serving a specific county."""
+    if CATALOG is not None:
+        return CATALOG.programs_for_county(county)
     return [p for p in PROGRAMS if county in p.get("counties_served", [])]
 
 def get_programs_by_type(program_type: str):
     """Get programs of a specific type."""
+    if CATALOG is not None:
+        return CATALOG.programs_for_type(program_type)
     return [p for p in PROGRAMS if program_type in p.get("program_type", [])]
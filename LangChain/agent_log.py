@@ -0,0 +1,186 @@
+"""
+Leveled, structured logging for the agent and the web apps.
+
+ScreeningAgent used to print() f-strings on every turn, including the
+whole collected_info dict, and web_app_with_logging printed a dozen
+banner lines per message on top. All of it was formatted, and written
+to stdout under its lock, whether anyone was reading or not.
+
+StructuredLogger replaces those prints:
+- log.debug("extracted", age=25) checks the level first; while DEBUG is
+  off the call returns before anything is formatted or a record built
+- fields are stored as passed and only rendered (repr, JSON) when a
+  record is actually written, so passing collected_info costs nothing
+- DEBUG and INFO records can be sampled (keep a fraction of them);
+  warnings and errors are always written
+- set_level() / set_sample_rate() take effect immediately, so DEBUG can
+  be switched on in a running process (see /api/log-level in the web
+  apps, enabled only when LOG_ADMIN_TOKEN is set and requests send it in
+  the X-Admin-Token header)
+
+Records go through the standard logging module under the 'abilitypath'
+logger, one line each: "time LEVEL name: event key=value ..." or, with
+AGENT_LOG_FORMAT=json, one JSON object.
+
+Configure with AGENT_LOG_LEVEL (default INFO), AGENT_LOG_SAMPLE_RATE
+(0-1, default 1) and AGENT_LOG_FORMAT (text or json).
+"""
+
+import hmac
+import json
+import logging
+import os
+import random
+import sys
+import threading
+from datetime import datetime
+
+
+ROOT = 'abilitypath'
+LEVELS = {'debug': logging.DEBUG, 'info': logging.INFO, 'warning': logging.WARNING, 'error': logging.ERROR}
+# Header carrying LOG_ADMIN_TOKEN for /api/log-level
+ADMIN_TOKEN_HEADER = 'X-Admin-Token'
+
+_root = logging.getLogger(ROOT)
+_configure_lock = threading.Lock()
+_handler = None
+# Fraction of DEBUG/INFO records written
+_sample_rate = 1.0
+
+
+def _render(value):
+    return value if isinstance(value, str) and value and ' ' not in value else repr(value)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        line = (f"{datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds')} "
+                f"{record.levelname} {record.name[len(ROOT) + 1:] or ROOT}: {record.getMessage()}")
+        fields = getattr(record, 'fields', None)
+        if fields:
+            line += ' ' + ' '.join(f"{key}={_render(value)}" for key, value in fields.items())
+        if record.exc_info:
+            line += '\n' + self.formatException(record.exc_info)
+        return line
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'event': record.getMessage(),
+            **getattr(record, 'fields', {}),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=repr)
+
+
+class StructuredLogger:
+    """Level check, then sampling, then a record with `fields` attached"""
+
+    __slots__ = ('_logger',)
+
+    def __init__(self, name):
+        self._logger = logging.getLogger(f"{ROOT}.{name}")
+
+    def enabled(self, level=logging.DEBUG):
+        """Whether records at `level` are written (for guarding costly fields)"""
+        return self._logger.isEnabledFor(level)
+
+    def _log(self, level, event, fields, exc_info=None):
+        self._logger.log(level, event, exc_info=exc_info, extra={'fields': fields})
+
+    def debug(self, event, **fields):
+        if self._logger.isEnabledFor(logging.DEBUG) and (_sample_rate >= 1.0 or random.random() < _sample_rate):
+            self._log(logging.DEBUG, event, fields)
+
+    def info(self, event, **fields):
+        if self._logger.isEnabledFor(logging.INFO) and (_sample_rate >= 1.0 or random.random() < _sample_rate):
+            self._log(logging.INFO, event, fields)
+
+    def warning(self, event, **fields):
+        if self._logger.isEnabledFor(logging.WARNING):
+            self._log(logging.WARNING, event, fields)
+
+    def error(self, event, exc_info=None, **fields):
+        if self._logger.isEnabledFor(logging.ERROR):
+            self._log(logging.ERROR, event, fields, exc_info)
+
+
+def get_logger(name):
+    """Logger for one component ('agent', 'web', ...); configures logging on first use"""
+    if _handler is None:
+        configure_from_env()
+    return StructuredLogger(name)
+
+
+def configure(level='info', sample_rate=1.0, fmt='text', stream=None):
+    """(Re)configure the 'abilitypath' loggers: level, sampling and output format"""
+    global _handler
+    with _configure_lock:
+        handler = logging.StreamHandler(stream or sys.stdout)
+        handler.setFormatter(JSONFormatter() if fmt == 'json' else TextFormatter())
+        if _handler is not None:
+            _root.removeHandler(_handler)
+        _root.addHandler(handler)
+        # Records stop here instead of also reaching the root logger
+        _root.propagate = False
+        _handler = handler
+    set_level(level)
+    set_sample_rate(sample_rate)
+
+
+def configure_from_env():
+    configure(
+        level=os.getenv('AGENT_LOG_LEVEL', 'info'),
+        sample_rate=float(os.getenv('AGENT_LOG_SAMPLE_RATE', '1')),
+        fmt=os.getenv('AGENT_LOG_FORMAT', 'text'),
+    )
+
+
+def set_level(level):
+    """Set the level of every 'abilitypath' logger ('debug', 'info', ... or a number)"""
+    if isinstance(level, str):
+        if level.lower() not in LEVELS:
+            raise ValueError(f"Unknown log level: {level!r} (expected one of {', '.join(LEVELS)})")
+        level = LEVELS[level.lower()]
+    _root.setLevel(level)
+
+
+def set_sample_rate(rate):
+    """Keep this fraction (0-1) of DEBUG and INFO records"""
+    global _sample_rate
+    rate = float(rate)
+    if not 0.0 <= rate <= 1.0:
+        raise ValueError(f"Sample rate must be between 0 and 1, got {rate}")
+    _sample_rate = rate
+
+
+def get_log_settings():
+    """Current level and sample rate, for /api/status"""
+    return {'level': logging.getLevelName(_root.getEffectiveLevel()).lower(), 'sample_rate': _sample_rate}
+
+
+def update_log_settings(settings):
+    """Apply {"level": ..., "sample_rate": ...} (both optional); returns the new settings"""
+    if 'level' in settings:
+        set_level(settings['level'])
+    if 'sample_rate' in settings:
+        set_sample_rate(settings['sample_rate'])
+    return get_log_settings()
+
+
+def log_admin_enabled():
+    """Whether /api/log-level is served (LOG_ADMIN_TOKEN is set)"""
+    return bool(os.getenv('LOG_ADMIN_TOKEN'))
+
+
+def log_admin_authorized(token):
+    """Whether `token` matches LOG_ADMIN_TOKEN (never while it is unset)"""
+    expected = os.getenv('LOG_ADMIN_TOKEN')
+    if not expected or not token:
+        return False
+    return hmac.compare_digest(token.encode(), expected.encode())
@@ -0,0 +1,253 @@
+"""
+ASGI Web Application for the AI Screening Agent
+Same API as web_app.py, but /api/chat is async: the OpenAI call is
+awaited on the event loop instead of blocking a worker thread, so one
+process can keep hundreds of conversations in flight.
+
+Run with:
+uvicorn asgi_app:app --port 5003
+
+For an offline load test, set USE_FAKE_LLM=1 (see fake_llm.py).
+"""
+
+import asyncio
+import os
+import secrets
+
+from dotenv import load_dotenv
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.sessions import SessionMiddleware
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.templating import Jinja2Templates
+
+from fake_llm import use_fake_llm
+from screening_agent import (ScreeningAgent, get_catalog_cache_stats, get_recommendation_cache_stats,
+                             get_stage_timings, get_turn_stats)
+from session_store import SessionStore
+from session_state import session_secret_key, state_store_from_env
+from llm_client import get_llm_factory
+from catalog_store import get_catalog_store
+from sse import format_sse, SSE_HEADERS
+from turn_metrics import get_stage_metrics
+from agent_log import (ADMIN_TOKEN_HEADER, get_logger, get_log_settings, log_admin_authorized,
+                       log_admin_enabled, update_log_settings)
+
+# Load environment variables
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+templates = Jinja2Templates(directory=os.path.join(BASE_DIR, 'templates'))
+
+def create_session(session_id):
+    """A new session: its agent plus a lock so its turns run in order"""
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key and not use_fake_llm():
+        raise ValueError("OPENAI_API_KEY not found in environment variables")
+    return ScreeningAgent(api_key), asyncio.Lock()
+
+
+# Bounded per-session state (LRU + idle TTL; see session_store.py)
+sessions = SessionStore.from_env(create_session)
+
+
+def get_session(session_id):
+    """Get or create (agent, lock) for this session"""
+    return sessions.get_or_create(session_id)
+
+
+# Optional shared session state, so any worker process can serve any session
+state_store = state_store_from_env()
+
+
+# Program catalog; reloads itself when CATALOG_PATH changes (see catalog_store.py)
+catalog_store = get_catalog_store()
+
+
+# The state stores do blocking file/SQLite I/O, so they run in the
+# thread pool instead of on the event loop
+
+async def load_agent(session_id, agent):
+    """Refresh the agent from the state store (call while holding the session lock)"""
+    if state_store is not None:
+        state = await run_in_threadpool(state_store.load, session_id)
+        if state is not None:
+            agent.load_state(state)
+
+
+async def save_agent(session_id, agent):
+    """Persist the session's state after a turn (if a state store is configured)"""
+    if state_store is not None:
+        await run_in_threadpool(state_store.save, session_id, agent.get_state())
+
+
+async def home(request):
+    """Serve the main chat interface"""
+    return templates.TemplateResponse(request, 'index.html')
+
+
+async def chat(request):
+    """Handle chat messages from the frontend"""
+
+    try:
+        # Get or create session ID
+        if 'session_id' not in request.session:
+            request.session['session_id'] = secrets.token_hex(16)
+
+        session_id = request.session['session_id']
+
+        # Get user message
+        data = await request.json()
+        user_message = data.get('message', '')
+
+        if not user_message:
+            return JSONResponse({'error': 'No message provided'}, status_code=400)
+
+        # Get agent and process message
+        agent, lock = get_session(session_id)
+        async with lock:
+            await load_agent(session_id, agent)
+            result = await agent.achat(user_message)
+            await save_agent(session_id, agent)
+
+        return JSONResponse({
+            'response': result['response'],
+            'recommendations_provided': result.get('recommendations_provided', False),
+            'collected_info': result.get('collected_info', {})
+        })
+
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+
+async def chat_stream(request):
+    """Handle a chat message, streaming the reply as Server-Sent Events"""
+
+    try:
+        # Get or create session ID
+        if 'session_id' not in request.session:
+            request.session['session_id'] = secrets.token_hex(16)
+
+        session_id = request.session['session_id']
+
+        # Get user message
+        data = await request.json()
+        user_message = data.get('message', '')
+
+        if not user_message:
+            return JSONResponse({'error': 'No message provided'}, status_code=400)
+
+        agent, lock = get_session(session_id)
+
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+    async def generate():
+        async with lock:
+            await load_agent(session_id, agent)
+            async for event, payload in agent.achat_stream(user_message):
+                if event == 'done':
+                    await save_agent(session_id, agent)
+                yield format_sse(event, payload)
+
+    return StreamingResponse(generate(), media_type='text/event-stream', headers=SSE_HEADERS)
+
+
+async def reset(request):
+    """Reset the conversation"""
+
+    try:
+        session_id = request.session.get('session_id')
+        if session_id:
+            # Drop the session; the next message starts a fresh agent
+            sessions.remove(session_id)
+            if state_store is not None:
+                await run_in_threadpool(state_store.delete, session_id)
+
+        return JSONResponse({'success': True})
+
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+
+async def status(request):
+    """Check if the API is working and OpenAI key is configured"""
+
+    api_key = os.getenv("OPENAI_API_KEY")
+
+    return JSONResponse({
+        'status': 'ok',
+        'openai_configured': bool(api_key and api_key != 'your_openai_api_key_here'),
+        'fake_llm': use_fake_llm(),
+        'sessions': sessions.metrics(),
+        'llm_pool': get_llm_factory().stats(),
+        'turns': get_turn_stats(),
+        'recommendation_cache': get_recommendation_cache_stats(),
+        'catalog_caches': get_catalog_cache_stats(),
+        'stage_timings': get_stage_timings(),
+        'catalog': catalog_store.stats(),
+        'logging': get_log_settings()
+    })
+
+
+async def log_level(request):
+    """
+    Show or change terminal logging at runtime, e.g.
+    POST {"level": "debug", "sample_rate": 0.1}
+    Served only when LOG_ADMIN_TOKEN is set; send it in X-Admin-Token.
+    """
+
+    if not log_admin_enabled():
+        return JSONResponse({'error': 'Not found'}, status_code=404)
+    if not log_admin_authorized(request.headers.get(ADMIN_TOKEN_HEADER)):
+        return JSONResponse({'error': 'Forbidden'}, status_code=403)
+
+    if request.method == 'POST':
+        try:
+            data = await request.json()
+        except ValueError:
+            data = {}
+        try:
+            settings = update_log_settings(data or {})
+        except (TypeError, ValueError) as e:
+            return JSONResponse({'error': str(e)}, status_code=400)
+        get_logger('web').info("log settings changed", **settings)
+
+    return JSONResponse(get_log_settings())
+
+
+async def metrics(request):
+    """Per-stage latency histograms and LLM token counts (Prometheus text format)"""
+    return PlainTextResponse(get_stage_metrics().prometheus(), media_type='text/plain; version=0.0.4')
+
+
+app = Starlette(
+    routes=[
+        Route('/', home),
+        Route('/api/chat', chat, methods=['POST']),
+        Route('/api/chat/stream', chat_stream, methods=['POST']),
+        Route('/api/reset', reset, methods=['POST']),
+        Route('/api/status', status, methods=['GET']),
+        Route('/api/log-level', log_level, methods=['GET', 'POST']),
+        Route('/api/metrics', metrics, methods=['GET']),
+    ],
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*']),
+        Middleware(SessionMiddleware, secret_key=session_secret_key()),
+    ],
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    print("\n" + "="*60)
+    print("🚀 Starting AbilityPath Screening Agent (ASGI)")
+    print("="*60)
+    print("\nAccess the web interface at: http://localhost:5003")
+    print("Press Ctrl+C to stop the server\n")
+
+    uvicorn.run(app, host='0.0.0.0', port=5003)
@@ -0,0 +1,201 @@
+"""
+Vectorized matching of many profiles against the catalog at once.
+
+filter_programs_by_criteria scores one profile at a time with nested
+Python loops. Nightly waitlist re-matching and the evaluation suite
+score tens of thousands of profiles, so match_batch encodes both sides
+as NumPy arrays instead:
+- programs: age bounds, "has criterion" flags and support-requirement
+  bitmasks, built once per catalog
+- profiles: ages, plus indexes into the distinct diagnosis, location and
+  interest-set values seen in the batch
+
+The substring rules of the per-profile matcher (ProgramRecord's
+accepts_diagnosis, serves_location and matches_interests) are evaluated
+once per distinct value against every program record, giving boolean
+(value x program) tables. Fancy indexing expands them to (profile x program), and scores,
+percentages and the 60% threshold are array operations. Results are
+identical to calling filter_programs_by_criteria on each profile.
+"""
+
+import numpy as np
+
+from program_catalog import (
+    DIAGNOSIS_MATCHED,
+    DIAGNOSIS_SCORED,
+    INTEREST_MATCHED,
+    INTEREST_SCORED,
+    LOCATION_MATCHED,
+    LOCATION_SCORED,
+    SUPPORT_MATCHED,
+    SUPPORT_SCORED,
+    ProgramRecord,
+    Recommendation,
+    support_needs_mask,
+)
+from programs_database import get_catalog
+
+
+THRESHOLD = 60
+# Profiles scored per chunk, bounding (profile x program) array memory
+CHUNK_SIZE = 20000
+
+
+class _Vocabulary:
+    """Distinct values in a batch and their (value x program) match table"""
+
+    def __init__(self, records, matches):
+        self.records = records
+        self.matches = matches
+        self.index = {}
+        self.rows = []
+
+    def encode(self, value):
+        i = self.index.get(value)
+        if i is None:
+            i = self.index[value] = len(self.rows)
+            self.rows.append([self.matches(record, value) for record in self.records])
+        return i
+
+    def table(self):
+        return np.array(self.rows, dtype=bool).reshape(len(self.rows), len(self.records))
+
+
+class BatchMatcher:
+    """Program-side arrays for one catalog (a ProgramCatalog); reuse across batches"""
+
+    def __init__(self, catalog):
+        self.programs = list(catalog.programs)
+        self.records = catalog.records
+        n = len(self.programs)
+
+        self.min_age = np.full(n, -np.inf)
+        self.max_age = np.full(n, np.inf)
+        self.has_diagnosis = np.zeros(n, dtype=bool)
+        self.has_location = np.zeros(n, dtype=bool)
+        self.has_types = np.zeros(n, dtype=bool)
+        self.has_support = np.zeros(n, dtype=bool)
+        self.support_mask = np.zeros(n, dtype=np.int64)
+
+        for i, record in enumerate(self.records):
+            age_range = record.program.get('age_range', {})
+            if age_range.get('min_age') is not None:
+                self.min_age[i] = age_range['min_age']
+            if age_range.get('max_age') is not None:
+                self.max_age[i] = age_range['max_age']
+            self.has_diagnosis[i] = bool(record.diagnoses)
+            self.has_location[i] = bool(record.counties or record.location)
+            self.has_types[i] = bool(record.program_types)
+            self.has_support[i] = record.has_support_requirements
+            self.support_mask[i] = record.support_mask
+
+    def match(self, profiles):
+        """Recommendations for each profile, as filter_programs_by_criteria returns them"""
+        results = []
+        for start in range(0, len(profiles), CHUNK_SIZE):
+            results.extend(self._match_chunk(profiles[start:start + CHUNK_SIZE]))
+        return results
+
+    def _match_chunk(self, profiles):
+        keep, percentage, score, total, detail_code = self.score(profiles)
+
+        # Stable descending sort per row, like list.sort(reverse=True);
+        # rejected programs sort last and are cut off by the row count
+        order = np.argsort(np.where(keep, -percentage, np.inf), axis=1, kind='stable').tolist()
+        counts = keep.sum(axis=1).tolist()
+        percentage = percentage.tolist()
+        score = score.tolist()
+        total = total.tolist()
+        detail_code = detail_code.tolist()
+
+        results = []
+        for i in range(len(profiles)):
+            results.append([
+                Recommendation(self.programs[p], percentage[i][p], score[i][p], total[i][p], detail_code[i][p])
+                for p in order[i][:counts[i]]
+            ])
+        return results
+
+    def score(self, profiles):
+        """
+        (keep, percentage, score, total, detail_code) arrays, each
+        (profile x program); keep marks the recommended pairs
+        """
+        m = len(profiles)
+        diagnoses = _Vocabulary(self.records, ProgramRecord.accepts_diagnosis)
+        locations = _Vocabulary(self.records, ProgramRecord.serves_location)
+        interest_sets = _Vocabulary(self.records, ProgramRecord.matches_interests)
+
+        ages = []
+        diagnosis_ids = []
+        location_ids = []
+        interest_ids = []
+        has_interests = []
+        has_needs = []
+        needs_masks = []
+        for profile in profiles:
+            age = profile.get('age')
+            ages.append(np.nan if age is None else age)
+            diagnosis_ids.append(diagnoses.encode(profile.get('diagnosis', '').lower()))
+            location_ids.append(locations.encode(profile.get('location', '').lower()))
+            interests = tuple(interest.lower() for interest in profile.get('interests', []))
+            interest_ids.append(interest_sets.encode(interests))
+            has_interests.append(bool(interests))
+            support_needs = profile.get('support_needs', {})
+            has_needs.append(bool(support_needs))
+            needs_masks.append(support_needs_mask(support_needs))
+
+        ages = np.array(ages, dtype=float)
+        has_interests = np.array(has_interests, dtype=bool)
+        has_needs = np.array(has_needs, dtype=bool)
+        needs_masks = np.array(needs_masks, dtype=np.int64)
+
+        # (profile x program) boolean arrays
+        no_age = np.isnan(ages)[:, None]
+        age_ok = no_age | ((ages[:, None] >= self.min_age) & (ages[:, None] <= self.max_age))
+        diagnosis_ok = diagnoses.table()[diagnosis_ids]
+        location_ok = locations.table()[location_ids]
+        interest_ok = interest_sets.table()[interest_ids]
+        counts_interest = has_interests[:, None] & self.has_types
+        counts_support = has_needs[:, None] & self.has_support
+        support_ok = (needs_masks[:, None] & self.support_mask) == 0
+
+        diagnosis_hit = self.has_diagnosis & diagnosis_ok
+        location_hit = self.has_location & location_ok
+        interest_hit = counts_interest & interest_ok
+        support_hit = counts_support & support_ok
+
+        score = (diagnosis_hit.astype(np.int64) + location_hit + interest_hit + support_hit)
+        total = (self.has_diagnosis.astype(np.int64) + self.has_location + counts_interest + counts_support)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            percentage = np.where(total > 0, score / total * 100, 0.0)
+        keep = age_ok & (percentage >= THRESHOLD)
+
+        # Which detail lines apply, packed into one small code per pair
+        detail_code = (
+            self.has_diagnosis * DIAGNOSIS_SCORED + diagnosis_hit * DIAGNOSIS_MATCHED
+            + self.has_location * LOCATION_SCORED + location_hit * LOCATION_MATCHED
+            + counts_interest * INTEREST_SCORED + interest_hit * INTEREST_MATCHED
+            + counts_support * SUPPORT_SCORED + support_hit * SUPPORT_MATCHED
+        )
+        return keep, percentage, score, total, detail_code
+
+
+# (catalog version, BatchMatcher)
+_matcher = (None, None)
+
+
+def get_batch_matcher():
+    """BatchMatcher for the current catalog snapshot, rebuilt when it changes"""
+    global _matcher
+    catalog = get_catalog()
+    version, matcher = _matcher
+    if version != catalog.version:
+        matcher = BatchMatcher(catalog)
+        _matcher = (catalog.version, matcher)
+    return matcher
+
+
+def match_batch(profiles):
+    """filter_programs_by_criteria for many profiles at once"""
+    return get_batch_matcher().match(profiles)
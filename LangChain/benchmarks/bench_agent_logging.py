@@ -0,0 +1,117 @@
+"""
+Cost of ScreeningAgent debug output on the deterministic turn path
+
+Runs a scripted enrollment conversation through
+ScreeningAgent._handle_without_llm (no LLM involved) with:
+- the old print(f"DEBUG: ...") lines, re-enacted with the same
+  f-strings and the same number of prints per turn (stdout to /dev/null)
+- agent_log at INFO (debug disabled)
+- agent_log at DEBUG, written to /dev/null, and sampled at 10%
+
+and checks that with debug disabled no field is ever formatted: a
+sentinel value whose __repr__/__str__ count calls is logged on every
+turn and must see zero calls.
+
+Usage:
+    python benchmarks/bench_agent_logging.py [turns]
+"""
+
+import contextlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+os.environ.setdefault('USE_FAKE_LLM', '1')
+
+import agent_log
+from screening_agent import ScreeningAgent
+
+
+CONVERSATION = [
+    "Hi, I'd like to enroll my son",
+    "He is 25 years old",
+    "He has autism",
+    "We live in San Mateo",
+    "He is interested in employment and art",
+    "Can you find programs for him?",
+]
+
+
+class FormatCounter:
+    """Counts how often it is turned into text"""
+
+    calls = 0
+
+    def __repr__(self):
+        FormatCounter.calls += 1
+        return 'FormatCounter()'
+
+    __str__ = __repr__
+
+
+def legacy_prints(agent, message):
+    """The print() calls _handle_without_llm and its helpers made per turn"""
+    info = agent.collected_info
+    print(f"\nDEBUG: User message: {message}")
+    print(f"DEBUG: Current intent: {agent.user_intent}")
+    print(f"DEBUG: Collected info: {info}")
+    print("DEBUG: Set intent to 'enroll'")
+    print(f"DEBUG: Extracted age: {info['age']}")
+    print(f"DEBUG: Ready check - Age: {info['age'] is not None}, Diagnosis: {info['diagnosis'] is not None}, "
+          f"Location: {info['location'] is not None}")
+
+
+def run(turns, before_turn=None):
+    agent = ScreeningAgent('sk-benchmark')
+    sentinel = FormatCounter()
+    log = agent_log.get_logger('bench')
+    start = time.perf_counter()
+    for turn in range(turns):
+        message = CONVERSATION[turn % len(CONVERSATION)]
+        if turn % len(CONVERSATION) == 0:
+            agent.reset_conversation()
+        if before_turn:
+            before_turn(agent, message)
+        log.debug("sentinel", value=sentinel)
+        agent._handle_without_llm(message)
+    return (time.perf_counter() - start) / turns * 1e6
+
+
+def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 60000
+
+    print("=" * 70)
+    print(f"Deterministic turn path with debug output ({turns:,} turns)")
+    print("=" * 70)
+
+    with open(os.devnull, 'w') as devnull:
+        agent_log.configure(level='info', stream=devnull)
+        baseline = run(turns)
+        print(f"{'agent_log, debug off':<34} {baseline:>10.1f} µs/turn")
+        formatted_while_off = FormatCounter.calls
+
+        with contextlib.redirect_stdout(devnull):
+            legacy = run(turns, legacy_prints)
+        print(f"{'old print() lines (to /dev/null)':<34} {legacy:>10.1f} µs/turn")
+
+        agent_log.configure(level='debug', sample_rate=0.1, stream=devnull)
+        sampled = run(turns)
+        print(f"{'agent_log, debug at 10% sampling':<34} {sampled:>10.1f} µs/turn")
+
+        agent_log.configure(level='debug', stream=devnull)
+        FormatCounter.calls = 0
+        debug = run(turns)
+        print(f"{'agent_log, debug on (to /dev/null)':<34} {debug:>10.1f} µs/turn")
+        formatted_while_on = FormatCounter.calls
+
+    print("-" * 70)
+    print(f"Fields formatted with debug off: {formatted_while_off} (expected 0)")
+    print(f"Fields formatted with debug on:  {formatted_while_on:,} (expected {turns:,})")
+    if formatted_while_off:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Funnel query: re-parsing the JSONL log vs. the columnar archive
+
+Writes a synthetic log of `turns` chat turns (sessions of 2-12 turns,
+both collected_info shapes), then times a funnel computed by
+json.loads-ing every line against compacting once and querying the
+archive columns.
+
+Usage:
+    python benchmarks/bench_archive.py [turns]
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from conversation_archive import compact, funnel, load_archive
+from info_extractor import has_enroll_intent
+
+
+MESSAGES = ['Hi there', 'My son is 25 and lives in San Mateo', 'He has autism',
+            'How do I sign up for a program?', 'He likes art and music', 'Thanks!']
+
+
+def write_log(path, turns):
+    rng = random.Random(7)
+    start = datetime(2025, 1, 1)
+    written = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        while written < turns:
+            session = f"{rng.getrandbits(32):08x}"
+            moment = start + timedelta(seconds=rng.randrange(90 * 86400))
+            # One session in five in the Dialogflow shape (name/age/needs)
+            legacy = rng.random() < 0.2
+            info = {'name': None, 'age': None, 'needs': {}} if legacy else {}
+            length = rng.randint(2, 12)
+            converts = rng.random() < 0.4
+            for turn in range(1, length + 1):
+                if turn == 2:
+                    info['age'] = rng.randint(3, 70)
+                if legacy:
+                    if turn == 3:
+                        info['needs'] = {'developmental_delay': True}
+                elif turn == 3 and rng.random() < 0.8:
+                    info['diagnosis'] = 'autism'
+                if turn == 4 and rng.random() < 0.7:
+                    info['location'] = 'san mateo'
+                if turn == 5:
+                    info['interests'] = ['art']
+                entry = {
+                    'timestamp': (moment + timedelta(seconds=30 * turn)).isoformat(),
+                    'session_id': session,
+                    'user_message': rng.choice(MESSAGES),
+                    'agent_response': 'Here is what I found.',
+                    'collected_info': info,
+                    'recommendations_provided': converts and turn == length,
+                }
+                f.write(json.dumps(entry) + '\n')
+                written += 1
+
+
+def funnel_from_jsonl(path):
+    """What answering the question took before the archive"""
+    sessions = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            entry = json.loads(line)
+            state = sessions.setdefault(entry['session_id'], [False, False, False, False])
+            info = entry['collected_info']
+            state[0] |= has_enroll_intent(entry['user_message'])
+            state[1] |= all(info.get(field) for field in ('age', 'diagnosis', 'location'))
+            state[2] |= entry['recommendations_provided']
+            state[3] |= 'needs' in info
+    # Dialogflow-shape sessions are left out of the last two steps
+    return [len(sessions), sum(state[0] for state in sessions.values())] + [
+        sum(state[i] and not state[3] for state in sessions.values()) for i in (1, 2)]
+
+
+def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+
+    with tempfile.TemporaryDirectory() as directory:
+        log_path = os.path.join(directory, 'conversations.jsonl')
+        archive_dir = os.path.join(directory, 'archive')
+        write_log(log_path, turns)
+
+        print("=" * 70)
+        print(f"Funnel over {turns:,} turns ({os.path.getsize(log_path) / 2**20:,.0f} MB of JSONL)")
+        print("=" * 70)
+
+        start = time.perf_counter()
+        expected = funnel_from_jsonl(log_path)
+        print(f"{'parse JSONL':<30} {time.perf_counter() - start:>10.2f} s")
+
+        start = time.perf_counter()
+        compact([log_path], archive_dir)
+        print(f"{'compact (once per rotation)':<30} {time.perf_counter() - start:>10.2f} s")
+        size = sum(os.path.getsize(os.path.join(archive_dir, name)) for name in os.listdir(archive_dir))
+        print(f"{'archive size':<30} {size / 2**20:>10.1f} MB")
+
+        start = time.perf_counter()
+        result = funnel(load_archive(archive_dir))
+        print(f"{'archive funnel query':<30} {time.perf_counter() - start:>10.2f} s")
+
+        counts = [count for _, count in result['steps']]
+        print("-" * 70)
+        print(f"Steps {counts} {'match' if counts == expected else f'DIFFER from {expected}'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Cold-start benchmark: catalog pack vs. importing a generated module
+
+Scales the built-in catalog up (distinct names and texts per copy) and
+writes it both as a generated Python module (the csv_program_loader
+--python-module layout: a PROGRAMS literal plus ProgramCatalog built at
+import) and as a catalog pack. Each variant is loaded in a fresh
+interpreter, reporting load time and memory held after loading, plus
+the time to the first formatted recommendation.
+
+Usage:
+    python benchmarks/bench_catalog_startup.py [copies]
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, HERE)
+
+from catalog_pack import write_pack
+from programs_database import get_all_programs
+
+
+PROFILE = {'age': 25, 'diagnosis': 'developmental disability', 'location': 'san mateo',
+           'interests': ['employment'], 'support_needs': {}}
+
+# Runs in a fresh interpreter; `load` puts the catalog in `catalog`
+PROBE = '''
+import json, sys, time, tracemalloc
+sys.path[:0] = {paths!r}
+measure_memory = {measure_memory!r}
+if measure_memory:
+    tracemalloc.start()
+start = time.perf_counter()
+{load}
+load_seconds = time.perf_counter() - start
+held = tracemalloc.get_traced_memory()[0] if measure_memory else None
+
+import programs_database
+programs_database.set_catalog(catalog)
+start = time.perf_counter()
+recommendations, total = programs_database.top_program_matches({profile!r})
+programs_database.format_program_recommendations(recommendations, total_matches=total)
+first_seconds = time.perf_counter() - start
+print(json.dumps({{'load': load_seconds, 'held': held, 'first': first_seconds}}))
+'''
+
+VARIANTS = {
+    'import generated module': 'import bench_generated_catalog\ncatalog = bench_generated_catalog.CATALOG',
+    'open catalog pack': 'from catalog_pack import load_pack_catalog\ncatalog = load_pack_catalog({pack!r})',
+}
+
+
+def scaled_programs(copies):
+    programs = []
+    for copy in range(copies):
+        for program in get_all_programs():
+            program = dict(program)
+            program['name'] = f"{program['name']} #{copy}"
+            program['description'] = f"{program['description']} (site {copy})"
+            program['enrollment_process'] = f"{program['enrollment_process']}\nReference: {copy}"
+            programs.append(program)
+    return programs
+
+
+def write_module(path, programs):
+    """Same layout as ProgramCSVLoader.save_as_python_module"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('from program_catalog import ProgramCatalog\n\nPROGRAMS = [\n')
+        for program in programs:
+            f.write('    {\n')
+            for key, value in program.items():
+                f.write(f'        "{key}": {value!r},\n')
+            f.write('    },\n')
+        f.write(']\n\nCATALOG = ProgramCatalog(PROGRAMS)\n')
+
+
+def run_probe(workdir, load, measure_memory, env):
+    code = PROBE.format(paths=[workdir, HERE], measure_memory=measure_memory, load=load, profile=PROFILE)
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                            env=env, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    programs = scaled_programs(copies)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        module_path = os.path.join(workdir, 'bench_generated_catalog.py')
+        pack_path = os.path.join(workdir, 'programs_catalog.pack')
+        write_module(module_path, programs)
+        write_pack(pack_path, programs)
+
+        print("=" * 70)
+        print(f"Catalog cold start ({len(programs):,} programs)")
+        print("=" * 70)
+        print(f"{'module source':<30} {os.path.getsize(module_path) / 1024:>10,.0f} KB")
+        print(f"{'catalog pack':<30} {os.path.getsize(pack_path) / 1024:>10,.0f} KB")
+        print("-" * 70)
+        print(f"{'':<30} {'load ms':>10} {'held KB':>10} {'first rec ms':>14}")
+
+        env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+        runs = [
+            ('import generated module', 'import generated module (no .pyc)', env),
+            ('import generated module', 'import generated module (.pyc)', None),
+            ('open catalog pack', 'open catalog pack', env),
+        ]
+        for variant, label, run_env in runs:
+            load = VARIANTS[variant].format(pack=pack_path)
+            if run_env is None:
+                # Write the .pyc first so the timed run only loads it
+                run_env = {key: value for key, value in os.environ.items()
+                           if key != 'PYTHONDONTWRITEBYTECODE'}
+                run_probe(workdir, load, False, run_env)
+            timing = run_probe(workdir, load, False, run_env)
+            memory = run_probe(workdir, load, True, run_env)
+            print(f"{label:<30} {timing['load'] * 1000:>10.1f} {memory['held'] / 1024:>10,.0f} "
+                  f"{timing['first'] * 1000:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
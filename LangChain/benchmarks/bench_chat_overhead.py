@@ -0,0 +1,80 @@
+"""
+Micro-benchmark: per-turn overhead of ScreeningAgent.chat()
+
+Compares the old hot path (build the system prompt and a new LLMChain on
+every message) with the current one (shared cached prompt, one LLMChain
+per session). A fake chat model is used so no OpenAI calls are made and
+only our own overhead is measured.
+
+Usage:
+    python benchmarks/bench_chat_overhead.py [turns]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from langchain.chains import LLMChain
+from langchain_community.chat_models.fake import FakeListChatModel
+
+import screening_agent
+from screening_agent import ScreeningAgent, build_system_prompt
+from programs_database import PROGRAMS
+
+
+def _make_agent():
+    agent = ScreeningAgent("sk-benchmark")
+    agent.llm = FakeListChatModel(responses=["Thanks! Could you tell me a bit more?"])
+    return agent
+
+
+def per_turn_legacy(agent, message):
+    """The pre-cache hot path: prompt + LLMChain rebuilt every turn"""
+    prompt = build_system_prompt(PROGRAMS)
+    conversation = LLMChain(llm=agent.llm, prompt=prompt, memory=agent.memory, verbose=False)
+    return conversation.predict(input=message)
+
+
+def per_turn_current(agent, message):
+    """The current hot path: cached prompt, chain reused for the session"""
+    return agent._get_conversation().predict(input=message)
+
+
+def run(label, fn, turns):
+    agent = _make_agent()
+    # Clear memory between turns so history growth does not skew timings
+    start = time.perf_counter()
+    for _ in range(turns):
+        fn(agent, "Hello, I'd like to learn about your programs")
+        agent.memory.clear()
+    elapsed = time.perf_counter() - start
+    per_turn_us = elapsed / turns * 1e6
+    print(f"{label:<30} {per_turn_us:>10.1f} µs/turn")
+    return per_turn_us
+
+
+def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    print("=" * 70)
+    print(f"ScreeningAgent per-turn overhead ({turns} turns, fake LLM)")
+    print("=" * 70)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Warm up imports and the shared prompt cache
+        run("warmup", per_turn_current, 5)
+
+    legacy = run("rebuild prompt + chain", per_turn_legacy, turns)
+    current = run("cached prompt, reused chain", per_turn_current, turns)
+
+    print("-" * 70)
+    print(f"Speedup: {legacy / current:.2f}x")
+    print(f"Prompt cache: {screening_agent.get_catalog_cache_stats()['prompt']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Request-path cost of conversation logging
+
+Compares the old log_conversation (open, append one line, close, in the
+request thread) with ConversationLogWriter.write (serialize and queue)
+from several threads at once, and checks every line reached the file.
+
+Usage:
+    python benchmarks/bench_conversation_log.py [lines_per_thread] [threads]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from conversation_log import ConversationLogWriter
+
+
+ENTRY = {
+    'timestamp': '2025-01-08T10:00:00',
+    'session_id': 'a1b2c3d4',
+    'user_message': 'My son is 25 with a developmental disability in San Mateo',
+    'agent_response': 'Thanks! Does he need support with eating, restroom use or mobility?',
+    'collected_info': {'age': 25, 'diagnosis': 'developmental disability', 'location': 'san mateo',
+                       'interests': ['employment'], 'support_needs': {}},
+    'recommendations_provided': False,
+}
+
+
+def append_line(path):
+    """The pre-writer log_conversation body"""
+    def log(entry):
+        with open(path, 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+    return log
+
+
+def run_threads(log, lines, threads):
+    latencies = []
+    lock = threading.Lock()
+
+    def worker():
+        local = []
+        for _ in range(lines):
+            start = time.perf_counter()
+            log(ENTRY)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker_thread in workers:
+        worker_thread.start()
+    for worker_thread in workers:
+        worker_thread.join()
+    latencies.sort()
+    return time.perf_counter() - start, latencies
+
+
+def count_lines(directory):
+    return sum(1 for name in os.listdir(directory) for _ in open(os.path.join(directory, name)))
+
+
+def report(label, seconds, latencies, total, on_disk):
+    p50 = latencies[len(latencies) // 2] * 1e6
+    p99 = latencies[int(len(latencies) * 0.99)] * 1e6
+    print(f"{label:<24} {seconds:>9.2f} {total / seconds:>12,.0f} {p50:>9.1f} {p99:>9.1f} {on_disk:>10,}")
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    total = lines * threads
+
+    print("=" * 70)
+    print(f"Conversation logging ({threads} threads x {lines:,} lines)")
+    print("=" * 70)
+    print(f"{'':<24} {'total s':>9} {'lines/s':>12} {'p50 us':>9} {'p99 us':>9} {'on disk':>10}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'conversations.jsonl')
+        seconds, latencies = run_threads(append_line(path), lines, threads)
+        report('open-append-close', seconds, latencies, total, count_lines(directory))
+
+    with tempfile.TemporaryDirectory() as directory:
+        writer = ConversationLogWriter(os.path.join(directory, 'conversations.jsonl'),
+                                       max_queue=total).start()
+        seconds, latencies = run_threads(writer.write, lines, threads)
+        writer.close()
+        report('ConversationLogWriter', seconds, latencies, total, count_lines(directory))
+        print("-" * 70)
+        print(f"Writer: {writer.stats()['batches']} batches, {writer.stats()['dropped']} dropped")
+
+
+if __name__ == "__main__":
+    main()
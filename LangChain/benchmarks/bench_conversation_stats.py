@@ -0,0 +1,138 @@
+"""
+/api/stats cost: full rescan vs ConversationStats
+
+Writes a conversation log of N lines and compares:
+- the old /api/stats body: read and json.loads every line per request
+- ConversationStats.report() after an incremental refresh()
+
+and checks that malformed lines (not JSON, not an object, fields of the
+wrong type) are counted in bad_lines without stopping the reader: the
+offset must pass them and a second refresh must not count anything
+twice.
+
+Usage:
+    python benchmarks/bench_conversation_stats.py [lines]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from conversation_stats import ConversationStats
+
+
+ENTRY = {
+    'timestamp': '2025-01-08T10:00:00',
+    'user_message': 'My son is 25 with a developmental disability in San Mateo',
+    'collected_info': {'age': 25, 'diagnosis': 'developmental disability', 'location': 'san mateo',
+                       'interests': ['employment'], 'support_needs': {'eating': False}},
+    'recommendations_provided': True,
+    'recommended_programs': ['Employment Services, San Mateo County'],
+}
+
+# (line, counted as a turn)
+MALFORMED = [
+    ('{"session_id": "s1", "collected_info": {"age": "30"}}', True),
+    ('{"session_id": "s2", "collected_info": {"age": "thirty"}}', False),
+    ('{"session_id": "s3", "collected_info": {"support_needs": ["eating"]}}', False),
+    ('{"session_id": "s4", "collected_info": {"interests": "art"}}', False),
+    ('{"session_id": "s5", "collected_info": "none"}', False),
+    ('["not", "an", "object"]', False),
+    ('42', False),
+    ('{not json', False),
+]
+
+
+def write_log(path, lines):
+    with open(path, 'w') as f:
+        for i in range(lines):
+            f.write(json.dumps(dict(ENTRY, session_id=f"{i // 4:08x}")) + '\n')
+
+
+def full_rescan(path):
+    """The pre-ConversationStats /api/stats body"""
+    conversations = []
+    with open(path, 'r') as f:
+        for line in f:
+            conversations.append(json.loads(line))
+    ages = [c['collected_info']['age'] for c in conversations if c['collected_info'].get('age')]
+    return {
+        'total_conversations': len(conversations),
+        'successful_matches': sum(1 for c in conversations if c.get('recommendations_provided')),
+        'average_age': round(sum(ages) / len(ages), 1) if ages else 0,
+    }
+
+
+def check_malformed(directory):
+    """Malformed lines are skipped and counted; returns a list of failures"""
+    path = os.path.join(directory, 'malformed.jsonl')
+    with open(path, 'w') as f:
+        f.write(json.dumps(dict(ENTRY, session_id='good')) + '\n')
+        for line, _counted in MALFORMED:
+            f.write(line + '\n')
+        f.write(json.dumps(dict(ENTRY, session_id='after')) + '\n')
+
+    stats = ConversationStats(path, checkpoint_path=os.path.join(directory, 'malformed.stats.json'))
+    expected_turns = 2 + sum(counted for _line, counted in MALFORMED)
+    expected_bad = sum(not counted for _line, counted in MALFORMED)
+    failures = []
+    for attempt in (1, 2):
+        stats.refresh()
+        turns = stats.report()['total_conversations']
+        if turns != expected_turns:
+            failures.append(f"refresh {attempt}: {turns} turns (expected {expected_turns})")
+    if stats.bad_lines != expected_bad:
+        failures.append(f"{stats.bad_lines} bad lines (expected {expected_bad})")
+    if stats.stats()['offset'] != os.path.getsize(path):
+        failures.append(f"offset {stats.stats()['offset']} (expected {os.path.getsize(path)})")
+    if stats.report()['average_age'] != round((25 + 30 + 25) / 3, 1):
+        failures.append(f"average age {stats.report()['average_age']} (age \"30\" not coerced)")
+    return failures
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    print("=" * 70)
+    print(f"/api/stats over a {lines:,}-line log")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'conversations.jsonl')
+        write_log(path, lines)
+
+        start = time.perf_counter()
+        old = full_rescan(path)
+        rescan = time.perf_counter() - start
+        print(f"{'full rescan per request':<34} {rescan * 1000:>10.1f} ms")
+
+        stats = ConversationStats(path, checkpoint_path=os.path.join(directory, 'stats.json'))
+        start = time.perf_counter()
+        stats.refresh()
+        first = time.perf_counter() - start
+        print(f"{'ConversationStats first refresh':<34} {first * 1000:>10.1f} ms")
+
+        start = time.perf_counter()
+        stats.refresh()
+        new = stats.report()
+        incremental = time.perf_counter() - start
+        print(f"{'refresh + report per request':<34} {incremental * 1000:>10.3f} ms")
+
+        failures = [f"{key}: {new[key]} (rescan {old[key]})" for key in old if new[key] != old[key]]
+        failures += check_malformed(directory)
+
+    print("-" * 70)
+    print(f"Speedup per request: {rescan / incremental:.0f}x")
+    print(f"Failed checks: {len(failures)}")
+    for failure in failures:
+        print(f"  {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
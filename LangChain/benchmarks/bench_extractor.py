@@ -0,0 +1,195 @@
+"""
+Micro-benchmark: ScreeningAgent criteria extraction
+
+Compares the old extractor (keyword maps rebuilt per call, four age
+regexes, substring scans) with the compiled single-pass extractor in
+info_extractor.py, on throughput and on false positives from keywords
+matching inside unrelated words. Exits non-zero if the two disagree on
+the corpus or on the support-need and interest cases (a regression
+check).
+
+Usage:
+    python benchmarks/bench_extractor.py [iterations]
+"""
+
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from info_extractor import extract
+
+
+def legacy_extract(user_message):
+    """The pre-compiled extractor, as it was in ScreeningAgent"""
+    info = {'age': None, 'diagnosis': None, 'location': None, 'interests': [], 'support_needs': {}}
+    message_lower = user_message.lower()
+
+    age_patterns = [
+        r'(\d+)\s*years?\s*old',
+        r'age\s*(?:is\s*)?(\d+)',
+        r'(?:he|she|they|i)(?:\'s|\s+is|\s+am)\s*(\d+)',
+        r'\b(\d+)\s*(?:year|yr)',
+    ]
+    for pattern in age_patterns:
+        match = re.search(pattern, message_lower)
+        if match:
+            age = int(match.group(1))
+            if 0 <= age <= 120:
+                info['age'] = age
+                break
+
+    diagnosis_map = {
+        'developmental disability': ['developmental disability', 'developmental delay', 'dd', 'developmentally disabled'],
+        'intellectual disability': ['intellectual disability', 'id', 'cognitive disability', 'mentally disabled'],
+        'autism': ['autism', 'autistic', 'asd', 'autism spectrum', 'on the spectrum'],
+        'down syndrome': ['down syndrome', 'downs syndrome', 'trisomy 21'],
+        'cerebral palsy': ['cerebral palsy', 'cp'],
+        'traumatic brain injury': ['traumatic brain injury', 'tbi', 'brain injury'],
+        'stroke': ['stroke', 'cva', 'cerebrovascular'],
+    }
+    for diagnosis, keywords in diagnosis_map.items():
+        if any(keyword in message_lower for keyword in keywords):
+            info['diagnosis'] = diagnosis
+            break
+
+    location_map = {
+        'san mateo': ['san mateo', 'burlingame', 'daly city', 'foster city', 'redwood city'],
+        'santa clara': ['santa clara', 'san jose', 'palo alto', 'mountain view', 'sunnyvale', 'cupertino'],
+        'san francisco': ['san francisco', 'sf'],
+    }
+    for location, keywords in location_map.items():
+        if any(keyword in message_lower for keyword in keywords):
+            info['location'] = location
+            break
+
+    interest_map = {
+        'employment': ['job', 'work', 'employment', 'career', 'vocational', 'working'],
+        'living skills': ['living skills', 'independent living', 'life skills', 'daily living', 'cooking', 'budgeting', 'independence'],
+        'social': ['social', 'friends', 'friendship', 'recreation', 'activities', 'fun', 'meet people'],
+        'day program': ['day program', 'day service', 'daytime', 'structured activities', 'during the day'],
+    }
+    for interest, keywords in interest_map.items():
+        if any(keyword in message_lower for keyword in keywords):
+            info['interests'].append(interest)
+
+    if any(word in message_lower for word in ['toilet', 'bathroom']):
+        info['support_needs']['toilet_trained'] = any(
+            word in message_lower for word in ['independent', 'doesn\'t need', 'don\'t need', 'can use'])
+    if any(word in message_lower for word in ['eating', 'feeding']):
+        info['support_needs']['eating_independence'] = any(
+            word in message_lower for word in ['independent', 'doesn\'t need', 'don\'t need'])
+    return info
+
+
+def compiled_extract(user_message):
+    found = extract(user_message)
+    return {
+        'age': found.age,
+        'diagnosis': found.diagnosis,
+        'location': found.location,
+        'interests': found.interests,
+        'support_needs': found.support_needs,
+    }
+
+
+CORPUS = [
+    "Hi, my son is 22 years old and has autism",
+    "We live in Daly City",
+    "She's interested in finding a job and making friends",
+    "He is 30, has a developmental disability and lives in San Jose",
+    "Is she toilet independent? Yes, she doesn't need help in the bathroom",
+    "My daughter has Down syndrome and wants a day program during the day",
+    "What programs do you have for adults with cerebral palsy in San Francisco?",
+    "He had a stroke last year and needs independent living skills",
+    "Thanks, that sounds great!",
+    "Can you tell me more about the schedule?",
+]
+
+# Support-need wording the old substring checks handled; the compiled
+# extractor must give the same flags (a wrong False excludes people from
+# programs that require toilet or eating independence)
+SUPPORT_CASES = [
+    "she goes to the bathroom independently",
+    "he eats independently, no help feeding",
+    "he needs help eating, toilet trained and independent living skills",
+    "He is toilet trained and doesn't need help eating",
+    "She can use the bathroom on her own",
+    "He needs help with toileting",
+    "We want independent living, and he needs support feeding",
+]
+
+# Interest wording the old substring checks handled: keywords with word
+# endings ("socializing", "worker") must still map to their interest
+INTEREST_CASES = [
+    "He loves socializing with other people",
+    "She enjoys socialising on weekends",
+    "He wants to be a grocery store worker",
+    "They are socially isolated and want friends",
+    "She works part time and is looking at careers in retail",
+    "He has been cooking and budgeting with his job coach",
+    "My son is 19 and wants to meet people",
+]
+
+# Messages that mention none of the criteria; anything extracted is a
+# false positive (expected diagnosis, location, interests)
+NEGATIVES = [
+    ("I did ask about this before", None, None, []),
+    ("Please add me to the list", None, None, []),
+    ("My kid needs a new cpu for school", None, None, []),
+    ("He always felt like a misfit", None, None, []),
+    ("Is there any funding available?", None, None, []),
+    ("I have an idea about scheduling", None, None, []),
+    ("That's a good point, thanks", None, None, []),
+    ("He's a teenager and likes sports", None, None, []),
+]
+
+
+def count_false_positives(fn):
+    count = 0
+    for message, diagnosis, location, interests in NEGATIVES:
+        info = fn(message)
+        count += info['diagnosis'] != diagnosis
+        count += info['location'] != location
+        count += info['interests'] != interests
+    return count
+
+
+def run(label, fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for message in CORPUS:
+            fn(message)
+    elapsed = time.perf_counter() - start
+    per_message_us = elapsed / (iterations * len(CORPUS)) * 1e6
+    print(f"{label:<30} {per_message_us:>10.2f} µs/message   "
+          f"false positives: {count_false_positives(fn)}/{len(NEGATIVES) * 3}")
+    return per_message_us
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    print("=" * 70)
+    print(f"Criteria extraction ({iterations} x {len(CORPUS)} messages)")
+    print("=" * 70)
+
+    mismatches = [m for m in CORPUS + SUPPORT_CASES + INTEREST_CASES if legacy_extract(m) != compiled_extract(m)]
+    legacy = run("legacy substring scans", legacy_extract, iterations)
+    compiled = run("compiled single pass", compiled_extract, iterations)
+
+    print("-" * 70)
+    print(f"Speedup: {legacy / compiled:.2f}x")
+    print(f"Corpus messages extracted differently: {len(mismatches)}")
+    for message in mismatches:
+        print(f"  {message!r}")
+        print(f"    legacy:   {legacy_extract(message)}")
+        print(f"    compiled: {compiled_extract(message)}")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
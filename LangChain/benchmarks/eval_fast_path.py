@@ -0,0 +1,81 @@
+"""
+Program-question fast path: which turns it answers
+
+Runs scripted conversations through ScreeningAgent._handle_without_llm
+(no LLM involved) and checks, turn by turn, whether the
+ProgramQuestionAnswerer fast path answered it:
+- a question about one program outside enrollment is answered
+- screening turns are never taken over, even when they mention a
+  program's city or ask about schedules
+- once recommendations are given, follow-up questions about a program
+  ("what time does ... start?") are answered again
+
+Exits non-zero if any turn goes the wrong way.
+
+Usage:
+    python benchmarks/eval_fast_path.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+os.environ.setdefault('USE_FAKE_LLM', '1')
+
+from screening_agent import ScreeningAgent, get_turn_stats
+
+
+# Conversations of (message, answered by the fast path)
+CONVERSATIONS = {
+    'question before screening': [
+        ("What time does the Creative Arts Program start?", True),
+        ("Where is the Daly City day program?", True),
+    ],
+    'screening turns': [
+        ("Hi, I'd like to enroll my son", False),
+        ("when can we start? he is 30, lives in san jose, autism", False),
+        ("What time does the Creative Arts Program start?", False),
+    ],
+    'follow-up after recommendations': [
+        ("Hi, I'd like to enroll my son", False),
+        ("He is 25 years old and has a developmental disability", False),
+        ("We live in San Mateo", False),
+        ("Can you find programs for him?", False),
+        ("What time does the Creative Arts Program start?", True),
+        ("Where is the Daly City day program?", True),
+        ("She is 16 years old, what time does the youth social program start?", False),
+    ],
+}
+
+
+def fast_path_count():
+    return get_turn_stats()['by_reason'].get('fast_path', 0)
+
+
+def main():
+    print("=" * 70)
+    print("Turns answered by the program-question fast path")
+    print("=" * 70)
+
+    failures = 0
+    for name, turns in CONVERSATIONS.items():
+        print(f"\n{name}:")
+        agent = ScreeningAgent('sk-eval')
+        for message, expected in turns:
+            before = fast_path_count()
+            with agent._start_turn():
+                agent._handle_without_llm(message)
+            answered = fast_path_count() > before
+            ok = answered == expected
+            failures += not ok
+            print(f"  {'✓' if ok else '✗'} {'fast path' if answered else 'screening/LLM':<13} {message}")
+
+    print("-" * 70)
+    print(f"Turns routed differently than expected: {failures}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
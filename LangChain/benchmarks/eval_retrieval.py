@@ -0,0 +1,110 @@
+"""
+Retrieval eval: prompt-token savings vs. answer quality
+
+For each labelled question we build the system prompt both ways - the
+full catalog ('full' mode) and the directory plus top-k programs
+('retrieval' mode) - and count tokens. Answer quality is measured
+offline as recall@k: whether the program needed to answer the question
+is among the programs put in the prompt. Recall@k of 100% means the
+model sees exactly the same program details it would in 'full' mode.
+
+Questions come from abilitypath_programs_faq.jsonl (whose ids follow
+the catalog order) plus the hand-written paraphrases below.
+
+Usage:
+    python benchmarks/eval_retrieval.py
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from conversation_memory import count_tokens
+from program_retriever import ProgramRetriever
+from programs_database import PROGRAMS
+from screening_agent import (
+    build_retrieval_system_prompt,
+    build_retrieved_context,
+    build_system_prompt,
+)
+
+
+# (question, expected program name)
+PARAPHRASES = [
+    ("what time does the Daly City day program start", "Adult Day Program, Daly City"),
+    ("where is the burlingame day program located", "Adult Day Program, Burlingame"),
+    ("my 14 year old wants to make friends", "Youth Social Recreation"),
+    ("are there weekend social outings for adults", "Adult Social Recreation"),
+    ("my dad had a stroke, do you offer rehab", "REACH (Stroke & Traumatic Brain Injury Services)"),
+    ("job coaching in san jose", "Employment Services,Santa Clara County"),
+    ("help finding a job in san mateo county", "Employment Services, San Mateo County"),
+    ("do you have art classes", "Creative Arts Program"),
+    ("can someone teach my daughter to cook and budget", "Independent Living Skills, North"),
+    ("one-on-one day services instead of a group program", "Tailored Day Services, San Mateo County"),
+    ("work readiness training for young adults", "Immersion Work Readiness Program"),
+    ("day program in palo alto", "Adult Day Program, Palo Alto"),
+]
+
+FAQ_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'abilitypath_programs_faq.jsonl')
+
+
+def load_questions():
+    questions = []
+    with open(FAQ_PATH, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            expected = PROGRAMS[int(entry['id']) - 1]['name']
+            for question in entry['questions']:
+                questions.append((question, expected))
+    return questions + PARAPHRASES
+
+
+def system_prompt_tokens(prompt, **inputs):
+    messages = prompt.format_messages(input="", chat_history=[], **inputs)
+    return count_tokens(messages[0].content)
+
+
+def main():
+    questions = load_questions()
+    # The FAQ file is left out of the index so its own questions can't leak in
+    retriever = ProgramRetriever(PROGRAMS, faq_paths=[])
+
+    full_tokens = system_prompt_tokens(build_system_prompt(PROGRAMS))
+    retrieval_prompt = build_retrieval_system_prompt(PROGRAMS)
+
+    print("=" * 70)
+    print(f"Retrieval eval - {len(questions)} questions, {len(PROGRAMS)} programs")
+    print("=" * 70)
+    print(f"Full-catalog system prompt: {full_tokens} tokens\n")
+    print(f"{'k':>3} {'avg tokens':>11} {'saving':>8} {'recall@k':>9} {'MRR':>6}")
+
+    for k in (1, 2, 3, 4, 6):
+        hits = 0
+        reciprocal_rank = 0.0
+        tokens = 0
+        misses = []
+
+        for question, expected in questions:
+            names = [program['name'] for _i, program, _s in retriever.retrieve(question, k=k)]
+            if expected in names:
+                hits += 1
+                reciprocal_rank += 1 / (names.index(expected) + 1)
+            else:
+                misses.append(question)
+
+            context = build_retrieved_context(PROGRAMS, question, k=k)
+            tokens += system_prompt_tokens(retrieval_prompt, programs_context=context)
+
+        avg_tokens = tokens / len(questions)
+        print(f"{k:>3} {avg_tokens:>11.0f} {1 - avg_tokens / full_tokens:>7.0%} "
+              f"{hits / len(questions):>9.0%} {reciprocal_rank / len(questions):>6.2f}")
+        if k == 4 and misses:
+            print(f"    missed at k=4: {misses}")
+
+
+if __name__ == "__main__":
+    main()
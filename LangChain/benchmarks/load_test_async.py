@@ -0,0 +1,76 @@
+"""
+Offline concurrency load test for the ASGI /api/chat endpoint
+
+Runs N simulated users, each sending a few messages, against asgi_app
+in-process (httpx ASGI transport, no sockets) with the fake LLM. Each
+fake completion takes FAKE_LLM_LATENCY seconds. If the LLM call were
+blocking, N users x T turns would take about N*T*latency seconds. With
+the async path the total should stay close to T*latency.
+
+Usage:
+    python benchmarks/load_test_async.py [users] [turns]
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+os.environ["USE_FAKE_LLM"] = "1"
+os.environ.setdefault("FAKE_LLM_LATENCY", "0.5")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import httpx
+
+from asgi_app import app
+
+MESSAGES = [
+    "Hi, I'd like to learn about your programs",
+    "My son is 22",
+    "We live in San Mateo",
+]
+
+
+async def simulate_user(turns, latencies):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        for turn in range(turns):
+            start = time.perf_counter()
+            response = await client.post("/api/chat", json={"message": MESSAGES[turn % len(MESSAGES)]})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+
+async def run(users, turns):
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(simulate_user(turns, latencies) for _ in range(users)))
+    return time.perf_counter() - start, latencies
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    latency = float(os.environ["FAKE_LLM_LATENCY"])
+
+    print("=" * 70)
+    print(f"ASGI load test: {users} users x {turns} turns, fake LLM latency {latency}s")
+    print("=" * 70)
+
+    # The agent's DEBUG output would swamp the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        elapsed, latencies = asyncio.run(run(users, turns))
+
+    latencies.sort()
+    print(f"Total time:        {elapsed:.2f}s (blocking estimate {users * turns * latency:.0f}s)")
+    print(f"Throughput:        {len(latencies) / elapsed:.0f} turns/s")
+    print(f"Latency p50/p95:   {statistics.median(latencies):.3f}s / "
+          f"{latencies[int(len(latencies) * 0.95) - 1]:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Compact, memory-mapped catalog file ("pack").
+
+The built-in catalog used to be a large Python literal in
+programs_database.py, compiled and fully built at import time even for
+tools that never touch it. A pack is a small data file instead:
+
+    APCATPK1\\n
+    {header JSON}\\n
+    text blob (UTF-8)
+
+The header holds the catalog version and every program's small fields
+(name, ages, diagnoses, counties, ...), which matching and the indexes
+need. Large text fields (description, enrollment_process) live in the
+blob and the header only records their (offset, length). open_pack()
+maps the file and parses only the header:
+- small values are stored once in a value table and programs refer to
+  them by index, so repeated values ("San Mateo County", identical age
+  ranges and support requirements) are decoded into one shared object
+- identical texts are stored once in the blob
+- each program is a LazyProgram, which decodes a text field from the map
+  the first time it is read
+
+Build a pack from any catalog source with:
+    python catalog_pack.py programs_catalog.json programs_catalog.pack
+"""
+
+import json
+import mmap
+import os
+import sys
+
+from program_catalog import ProgramCatalog
+from prompt_cache import catalog_fingerprint
+
+
+MAGIC = b'APCATPK1\n'
+PACK_VERSION = 1
+# Fields kept out of the header and decoded on first access
+LAZY_FIELDS = ('description', 'enrollment_process')
+
+
+def write_pack(path, programs, version=None, lazy_fields=LAZY_FIELDS):
+    """Write `programs` to a pack file (atomically) and return its version"""
+    programs = list(programs)
+    version = version or catalog_fingerprint(programs)
+
+    schemas, schema_index = [], {}
+    values, value_index = [], {}
+    blob = bytearray()
+    spans = {}
+    encoded = []
+    for program in programs:
+        schema = tuple(program)
+        if schema not in schema_index:
+            schema_index[schema] = len(schemas)
+            schemas.append(list(schema))
+        entry = [schema_index[schema]]
+        for key, value in program.items():
+            if key in lazy_fields and isinstance(value, str):
+                span = spans.get(value)
+                if span is None:
+                    data = value.encode('utf-8')
+                    span = spans[value] = [len(blob), len(data)]
+                    blob += data
+                entry.append(span)
+            else:
+                # Each distinct value is stored (and decoded) once
+                value_key = json.dumps(value, ensure_ascii=False)
+                if value_key not in value_index:
+                    value_index[value_key] = len(values)
+                    values.append(value)
+                entry.append(value_index[value_key])
+        encoded.append(entry)
+
+    header = {
+        'pack_version': PACK_VERSION,
+        'version': version,
+        'count': len(encoded),
+        'lazy_fields': list(lazy_fields),
+        'schemas': schemas,
+        'values': values,
+        'programs': encoded,
+    }
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(json.dumps(header, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        f.write(b'\n')
+        f.write(blob)
+    os.replace(temp_path, path)
+    return version
+
+
+class CatalogPack:
+    """An open pack: header fields plus on-demand access to the text blob"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            # The mapping stays valid after the file is replaced or closed
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path}: not a catalog pack")
+
+        header_end = self._map.find(b'\n', len(MAGIC))
+        header = json.loads(self._map[len(MAGIC):header_end])
+        if header.get('pack_version') != PACK_VERSION:
+            raise ValueError(f"{path}: unsupported pack version {header.get('pack_version')}")
+
+        self.version = header['version']
+        self.lazy_fields = tuple(header['lazy_fields'])
+        self._blob_start = header_end + 1
+        self._texts = {}
+
+        schemas = [tuple(schema) for schema in header['schemas']]
+        values = header['values']
+        self.programs = []
+        for entry in header['programs']:
+            schema = schemas[entry[0]]
+            fields = {}
+            spans = {}
+            for key, ref in zip(schema, entry[1:]):
+                if ref.__class__ is list:
+                    spans[key] = tuple(ref)
+                else:
+                    fields[key] = values[ref]
+            self.programs.append(LazyProgram(fields, spans, schema, self))
+
+    def text(self, span):
+        """Decoded text for an (offset, length) span; equal spans share one string"""
+        text = self._texts.get(span)
+        if text is None:
+            start = self._blob_start + span[0]
+            text = self._texts[span] = str(self._map[start:start + span[1]], 'utf-8')
+        return text
+
+
+class LazyProgram(dict):
+    """
+    A program dict whose large text fields are decoded on first access.
+
+    Lookups (program['description'], .get, `in`) decode just that field;
+    anything that walks the whole dict (iteration, items(), len, ==,
+    json.dumps) sees every field in the original order.
+    """
+
+    __slots__ = ('_spans', '_order', '_pack')
+
+    def __init__(self, fields, spans, order, pack):
+        super().__init__(fields)
+        self._spans = spans
+        self._order = order
+        self._pack = pack
+
+    def __missing__(self, key):
+        span = self._spans.get(key)
+        if span is None:
+            raise KeyError(key)
+        value = self._pack.text(span)
+        dict.__setitem__(self, key, value)
+        return value
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or key in self._spans
+
+    def __len__(self):
+        return len(self._order)
+
+    def __iter__(self):
+        return iter(self._order)
+
+    def keys(self):
+        return list(self._order)
+
+    def items(self):
+        return [(key, self[key]) for key in self._order]
+
+    def values(self):
+        return [self[key] for key in self._order]
+
+    def __eq__(self, other):
+        if isinstance(other, LazyProgram):
+            other = dict(other.items())
+        return dict(self.items()) == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def copy(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+    def __reduce__(self):
+        # Pickles (e.g. cached recommendations) as a plain dict
+        return (dict, (dict(self.items()),))
+
+
+def open_pack(path):
+    """CatalogPack for the file at `path`"""
+    return CatalogPack(path)
+
+
+def load_pack_catalog(path):
+    """ProgramCatalog over a pack, reusing the version from its header"""
+    pack = open_pack(path)
+    return ProgramCatalog(pack.programs, version=pack.version)
+
+
+def main():
+    if len(sys.argv) != 3:
+        print("Usage: python catalog_pack.py <catalog.json|catalog.csv> <output.pack>")
+        sys.exit(1)
+
+    from catalog_store import load_programs
+
+    source, output = sys.argv[1:]
+    programs = load_programs(source)
+    version = write_pack(output, programs)
+    print(f"✅ Packed {len(programs)} programs into {output} "
+          f"({os.path.getsize(output):,} bytes, version {version[:12]})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Hot-reloadable program catalog.
+
+Updating programs used to mean regenerating programs_database.py from
+the CSV, copying it over and restarting the server. CatalogStore now
+loads the catalog from a data file (a catalog_pack .pack file, the
+programs_catalog.json artifact compiled by csv_program_loader, a plain
+JSON list like programs_data.json, or a CSV) into an immutable,
+versioned ProgramCatalog
+snapshot. A watcher thread polls the file and, when it changes, builds
+a new snapshot off to the side and swaps it in with a single reference
+assignment:
+- requests already running keep the snapshot they started with
+- a file that fails to load leaves the current snapshot in place
+- caches derived from the catalog (system prompts, retriever, answerer,
+  recommendation cache, formatted program blocks) are keyed by the
+  snapshot version, so they rebuild on the next request
+
+Configuration (environment variables, all optional):
+- CATALOG_PATH: data file to serve; unset means the built-in
+  programs_catalog.pack
+- CATALOG_POLL_INTERVAL: seconds between file checks (default 2, 0 = off)
+"""
+
+import json
+import os
+import threading
+import time
+
+import programs_database
+from agent_log import get_logger
+from catalog_pack import MAGIC, load_pack_catalog
+from program_catalog import ProgramCatalog
+
+
+# Header of artifacts written by csv_program_loader's compile()
+ARTIFACT_FORMAT = 'abilitypath-program-catalog'
+ARTIFACT_VERSION = 1
+
+log = get_logger('catalog')
+
+
+def load_programs(path):
+    """Program dicts from a catalog artifact, a JSON list or a program-info CSV"""
+    if path.lower().endswith('.csv'):
+        try:
+            from csv_program_loader import ProgramCSVLoader
+        except ImportError as e:
+            raise RuntimeError(
+                "CSV catalogs need csv_program_loader.py (from Dialogflow/) on the Python path"
+            ) from e
+        return ProgramCSVLoader(path).load_programs()
+
+    with open(path, 'r', encoding='utf-8') as f:
+        programs = json.load(f)
+    if isinstance(programs, dict) and programs.get('format') == ARTIFACT_FORMAT:
+        if programs.get('format_version') != ARTIFACT_VERSION:
+            raise ValueError(f"{path}: unsupported catalog artifact version {programs.get('format_version')}")
+        programs = programs['programs']
+    if not isinstance(programs, list):
+        raise ValueError(f"{path}: expected a catalog artifact or a JSON list of programs")
+    return programs
+
+
+def load_catalog(path):
+    """ProgramCatalog for a pack file or anything load_programs() reads"""
+    with open(path, 'rb') as f:
+        is_pack = f.read(len(MAGIC)) == MAGIC
+    if is_pack:
+        return load_pack_catalog(path)
+    return ProgramCatalog(load_programs(path))
+
+
+class CatalogStore:
+    """
+    Loads the catalog file into snapshots and publishes them with
+    programs_database.set_catalog(). current() is lock-free; reloads
+    are serialized.
+    """
+
+    def __init__(self, path=None, poll_interval=2.0, loader=load_catalog):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._loader = loader
+        self._reload_lock = threading.Lock()
+        self._file_state = None
+        self._watcher = None
+        self._stop = threading.Event()
+
+        self.reloads = 0
+        self.errors = 0
+        self.last_error = None
+        self.loaded_at = None
+
+        if path:
+            self.reload()
+        self.loaded_at = time.time()
+
+    @classmethod
+    def from_env(cls):
+        """Store configured by CATALOG_PATH / CATALOG_POLL_INTERVAL"""
+        return cls(
+            path=os.getenv('CATALOG_PATH') or None,
+            poll_interval=float(os.getenv('CATALOG_POLL_INTERVAL', '2')),
+        )
+
+    def current(self):
+        """The catalog snapshot to use for the rest of this request"""
+        return programs_database.get_catalog()
+
+    def _stat(self):
+        stat = os.stat(self.path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def reload(self):
+        """
+        Load the file into a new snapshot and swap it in. Returns True
+        if the catalog changed. Errors propagate; the current snapshot
+        is kept.
+        """
+        with self._reload_lock:
+            file_state = self._stat()
+            snapshot = self._loader(self.path)
+            self._file_state = file_state
+            if snapshot.version == self.current().version:
+                return False
+            programs_database.set_catalog(snapshot)
+            self.reloads += 1
+            self.loaded_at = time.time()
+            log.info("catalog loaded", programs=len(snapshot), path=self.path, version=snapshot.version[:12])
+            return True
+
+    def check(self):
+        """Reload if the file changed since the last load"""
+        try:
+            file_state = self._stat()
+        except OSError:
+            file_state = None
+        if file_state == self._file_state:
+            return
+        try:
+            self.reload()
+        except Exception as e:
+            # Keep serving the current snapshot; try again once the file
+            # changes again (e.g. a half-written file is completed)
+            self._file_state = file_state
+            self.errors += 1
+            self.last_error = str(e)
+            log.warning("catalog reload failed", version=self.current().version[:12], error=e)
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            self.check()
+
+    def start_watching(self):
+        """Poll the file in a daemon thread (no-op without a path)"""
+        if not self.path or self.poll_interval <= 0 or self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch, name='catalog-watcher', daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop.set()
+
+    def stats(self):
+        snapshot = self.current()
+        return {
+            'version': snapshot.version,
+            'programs': len(snapshot),
+            'source': self.path or programs_database.CATALOG_FILE,
+            'loaded_at': self.loaded_at,
+            'reloads': self.reloads,
+            'reload_errors': self.errors,
+            'last_error': self.last_error,
+            'watching': self._watcher is not None,
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_catalog_store():
+    """The process-wide CatalogStore, created (and watching) on first use"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = CatalogStore.from_env()
+            _store.start_watching()
+        return _store
@@ -0,0 +1,380 @@
+"""
+Columnar archive of conversation logs, with an offline analytics CLI.
+
+Answering funnel questions used to mean grepping conversations.jsonl
+(and Dialogflow/logs/conversations.json, whose collected_info has a
+different shape: name/age/needs instead of age/diagnosis/location/
+interests/support_needs) and json.loads-ing every line again.
+
+`compact` turns each JSONL log into a segment of NumPy columns (one
+.npz per source file, in logs/archive/), normalizing both shapes:
+
+    session   uint32   8-hex-digit session id (CRC32 for other ids)
+    ts        float64  turn time, seconds since the epoch
+    day       int32    date ordinal of the turn (local date in the log)
+    intent    bool     the message asked to enroll / find a program
+    ready     bool     age, diagnosis and location collected
+    legacy    bool     Dialogflow shape (name/age/needs; no diagnosis
+                       or location, so `ready` is never set)
+    recommend bool     recommendations were shown this turn
+    fields    uint8    bit per FIELDS entry collected so far
+    age       int16    collected age, -1 if none
+
+Sessions logged in the Dialogflow shape cannot reach the "criteria
+collected" step, so the funnel counts the criteria and recommendation
+steps over the other sessions only and reports how many it left out.
+
+Segments are rebuilt only when their source file changed, so the job
+can run after every log rotation. Queries load the columns and group
+turns into sessions with array operations:
+
+    python conversation_archive.py compact [LOG ...]
+    python conversation_archive.py funnel [--since 2025-11-01] [--until ...]
+    python conversation_archive.py conversion
+    python conversation_archive.py extraction
+
+numpy .npz is used rather than Parquet/Arrow, which are not
+dependencies of this project; the layout (one typed array per column)
+is the same idea.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+import zlib
+from datetime import date, datetime
+
+import numpy as np
+
+from info_extractor import has_enroll_intent
+
+
+ARCHIVE_DIR = os.path.join('logs', 'archive')
+DEFAULT_LOG = os.path.join('logs', 'conversations.jsonl')
+SEGMENT_VERSION = 1
+
+# collected_info fields tracked for extraction hit rates; 'needs' only
+# exists in the older (Dialogflow) log shape
+FIELDS = ('age', 'diagnosis', 'location', 'interests', 'support_needs', 'needs')
+FIELD_BITS = {name: 1 << i for i, name in enumerate(FIELDS)}
+READY_MASK = FIELD_BITS['age'] | FIELD_BITS['diagnosis'] | FIELD_BITS['location']
+
+COLUMNS = {
+    'session': np.uint32,
+    'ts': np.float64,
+    'day': np.int32,
+    'intent': np.bool_,
+    'ready': np.bool_,
+    'legacy': np.bool_,
+    'recommend': np.bool_,
+    'fields': np.uint8,
+    'age': np.int16,
+}
+
+
+def session_key(session_id):
+    """uint32 key for a session id (the hex prefix the logs store)"""
+    session_id = str(session_id or '')
+    try:
+        return int(session_id[:8], 16)
+    except ValueError:
+        return zlib.crc32(session_id.encode('utf-8'))
+
+
+def normalize(entry):
+    """One log line (either shape) as a tuple in COLUMNS order"""
+    timestamp = entry.get('timestamp') or ''
+    try:
+        moment = datetime.fromisoformat(timestamp)
+    except ValueError:
+        moment = datetime.fromtimestamp(0)
+
+    info = entry.get('collected_info') or {}
+    fields = 0
+    for name, bit in FIELD_BITS.items():
+        if info.get(name) not in (None, '', [], {}):
+            fields |= bit
+    age = info.get('age')
+
+    return (
+        session_key(entry.get('session_id')),
+        moment.timestamp(),
+        moment.toordinal(),
+        has_enroll_intent(entry.get('user_message') or ''),
+        fields & READY_MASK == READY_MASK,
+        'needs' in info,
+        bool(entry.get('recommendations_provided')),
+        fields,
+        age if isinstance(age, int) and 0 <= age <= 150 else -1,
+    )
+
+
+# -- compaction ---------------------------------------------------------------
+
+def segment_path(source, archive_dir=ARCHIVE_DIR):
+    """Segment file for a log (named after it, unique per absolute path)"""
+    digest = hashlib.sha1(os.path.abspath(source).encode('utf-8')).hexdigest()[:8]
+    return os.path.join(archive_dir, f"{os.path.basename(source)}-{digest}.npz")
+
+
+def _source_state(source):
+    stat = os.stat(source)
+    return {'source': os.path.abspath(source), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def read_segment_meta(path):
+    with np.load(path) as segment:
+        return json.loads(str(segment['meta']))
+
+
+def compact_file(source, archive_dir=ARCHIVE_DIR, force=False):
+    """
+    Write the segment for one log file. Returns the number of rows
+    written, or None if the segment was already up to date.
+    """
+    path = segment_path(source, archive_dir)
+    state = _source_state(source)
+    if not force and os.path.exists(path):
+        meta = read_segment_meta(path)
+        if meta.get('version') == SEGMENT_VERSION and all(meta.get(k) == v for k, v in state.items()):
+            return None
+
+    rows = []
+    bad_lines = 0
+    with open(source, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                rows.append(normalize(json.loads(line)))
+            except (ValueError, AttributeError, TypeError):
+                bad_lines += 1
+
+    columns = {name: np.array([row[i] for row in rows], dtype=dtype)
+               for i, (name, dtype) in enumerate(COLUMNS.items())}
+    meta = dict(state, version=SEGMENT_VERSION, rows=len(rows), bad_lines=bad_lines)
+
+    os.makedirs(archive_dir, exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        np.savez(f, meta=np.array(json.dumps(meta)), **columns)
+    os.replace(temp_path, path)
+    return len(rows)
+
+
+def default_sources(log_path=DEFAULT_LOG):
+    """The log and its rotated files (<log>.<date>[.<n>])"""
+    rotated = [path for path in glob.glob(glob.escape(log_path) + '.*')
+               if not path.endswith(('.tmp', '.json'))]
+    existing = [log_path] if os.path.exists(log_path) else []
+    return sorted(rotated) + existing
+
+
+def compact(sources, archive_dir=ARCHIVE_DIR, force=False):
+    """Compact every source; returns [(source, rows or None)]"""
+    return [(source, compact_file(source, archive_dir, force)) for source in sources]
+
+
+# -- queries ------------------------------------------------------------------
+
+def load_archive(archive_dir=ARCHIVE_DIR, since=None, until=None):
+    """
+    All archived turns as a dict of column arrays, in time order.
+    `since`/`until` (datetime.date, inclusive) filter by turn date.
+    """
+    parts = {name: [] for name in COLUMNS}
+    for path in glob.glob(os.path.join(archive_dir, '*.npz')):
+        with np.load(path) as segment:
+            for name in COLUMNS:
+                parts[name].append(segment[name])
+
+    turns = {name: (np.concatenate(arrays) if arrays else np.array([], dtype=COLUMNS[name]))
+             for name, arrays in parts.items()}
+    keep = np.ones(len(turns['ts']), dtype=bool)
+    if since is not None:
+        keep &= turns['day'] >= since.toordinal()
+    if until is not None:
+        keep &= turns['day'] <= until.toordinal()
+    if not keep.all():
+        turns = {name: column[keep] for name, column in turns.items()}
+    return turns
+
+
+def sessions(turns):
+    """
+    Per-session arrays: start day, turn count, whether intent / ready /
+    recommendations were ever reached, whether any turn was logged in
+    the Dialogflow shape, fields ever collected, and the turn (1-based)
+    of the first recommendation (0 = never)
+    """
+    order = np.lexsort((turns['ts'], turns['session']))
+    session = turns['session'][order]
+    if len(session) == 0:
+        empty = np.array([], dtype=np.int64)
+        return {'day': empty, 'turns': empty, 'intent': empty.astype(bool), 'ready': empty.astype(bool),
+                'legacy': empty.astype(bool), 'recommend': empty.astype(bool), 'fields': empty.astype(np.uint8),
+                'first_recommend': empty}
+
+    starts = np.flatnonzero(np.r_[True, session[1:] != session[:-1]])
+    counts = np.diff(np.r_[starts, len(session)])
+    recommend = turns['recommend'][order]
+
+    # Position of each turn within its session, for the first recommendation
+    position = np.arange(len(session)) - np.repeat(starts, counts) + 1
+    first = np.where(recommend, position, np.iinfo(np.int64).max)
+    first_recommend = np.minimum.reduceat(first, starts)
+    first_recommend[first_recommend == np.iinfo(np.int64).max] = 0
+
+    return {
+        'day': turns['day'][order][starts],
+        'turns': counts,
+        'intent': np.logical_or.reduceat(turns['intent'][order], starts),
+        'ready': np.logical_or.reduceat(turns['ready'][order], starts),
+        'legacy': np.logical_or.reduceat(turns['legacy'][order], starts),
+        'recommend': np.logical_or.reduceat(recommend, starts),
+        'fields': np.bitwise_or.reduceat(turns['fields'][order], starts),
+        'first_recommend': first_recommend,
+    }
+
+
+def funnel(turns):
+    """
+    Sessions reaching each step, and where the others stopped. Sessions
+    in the Dialogflow shape never record the criteria, so the last two
+    steps count only the other sessions ('legacy_sessions' left out).
+    """
+    table = sessions(turns)
+    total = len(table['turns'])
+    tracked = ~table['legacy']
+    steps = [
+        ('sessions', total),
+        ('intent reached', int(table['intent'].sum())),
+        ('criteria collected', int((table['ready'] & tracked).sum())),
+        ('recommendations given', int((table['recommend'] & tracked).sum())),
+    ]
+    # Drop-off: how many turns sessions lasted without recommendations
+    dropped = np.minimum(table['turns'][~table['recommend']], 10)
+    drop_off = np.bincount(dropped, minlength=11)[1:]
+    return {
+        'turns': len(turns['ts']),
+        'steps': steps,
+        'legacy_sessions': int(table['legacy'].sum()),
+        'drop_off_turn': {('10+' if n == 10 else str(n)): int(count) for n, count in enumerate(drop_off, 1)},
+        'median_turns_to_recommendation': (
+            float(np.median(table['first_recommend'][table['recommend']])) if table['recommend'].any() else None
+        ),
+    }
+
+
+def conversion_by_day(turns):
+    """[(date, sessions, sessions with recommendations)] by session start day"""
+    table = sessions(turns)
+    if len(table['day']) == 0:
+        return []
+    first = table['day'].min()
+    offset = table['day'] - first
+    started = np.bincount(offset)
+    converted = np.bincount(offset, weights=table['recommend']).astype(np.int64)
+    return [(date.fromordinal(int(first + i)), int(started[i]), int(converted[i]))
+            for i in np.flatnonzero(started)]
+
+
+def extraction_hit_rates(turns):
+    """Share of sessions (all, and with enrollment intent) that collected each field"""
+    table = sessions(turns)
+    total = len(table['fields'])
+    with_intent = table['intent']
+    rates = {}
+    for name, bit in FIELD_BITS.items():
+        hit = (table['fields'] & bit) != 0
+        rates[name] = (
+            hit.sum() / total if total else 0.0,
+            hit[with_intent].sum() / with_intent.sum() if with_intent.any() else 0.0,
+        )
+    return rates
+
+
+# -- CLI ----------------------------------------------------------------------
+
+def _print_header(title, turns, started):
+    elapsed = (time.perf_counter() - started) * 1000
+    print("=" * 70)
+    print(f"{title} ({len(turns['ts']):,} turns, {elapsed:.0f} ms)")
+    print("=" * 70)
+
+
+def _pct(part, whole):
+    return f"{part / whole * 100:5.1f}%" if whole else "    -"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Conversation log archive and analytics")
+    parser.add_argument('--archive', default=ARCHIVE_DIR, help=f"segment directory (default {ARCHIVE_DIR})")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    compact_parser = commands.add_parser('compact', help="convert JSONL logs into archive segments")
+    compact_parser.add_argument('sources', nargs='*', help=f"log files (default {DEFAULT_LOG} and its rotations)")
+    compact_parser.add_argument('--force', action='store_true', help="rebuild segments that are up to date")
+
+    for name, text in (('funnel', "intent -> criteria -> recommendations, with drop-off"),
+                       ('conversion', "sessions and conversion rate by day"),
+                       ('extraction', "hit rate per collected_info field")):
+        query = commands.add_parser(name, help=text)
+        query.add_argument('--since', type=date.fromisoformat, help="first day (YYYY-MM-DD)")
+        query.add_argument('--until', type=date.fromisoformat, help="last day (YYYY-MM-DD)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'compact':
+        sources = args.sources or default_sources()
+        if not sources:
+            print(f"No logs found at {DEFAULT_LOG}")
+            return 1
+        for source, rows in compact(sources, args.archive, args.force):
+            status = "up to date" if rows is None else f"{rows:,} turns"
+            print(f"📦 {source}: {status}")
+        return 0
+
+    started = time.perf_counter()
+    turns = load_archive(args.archive, args.since, args.until)
+
+    if args.command == 'funnel':
+        result = funnel(turns)
+        _print_header("Enrollment funnel", turns, started)
+        total = result['steps'][0][1]
+        previous = total
+        for step, count in result['steps']:
+            print(f"{step:<26} {count:>10,}  {_pct(count, total)} of sessions  {_pct(count, previous)} of previous")
+            previous = count
+        if result['legacy_sessions']:
+            print(f"Criteria and recommendation steps leave out {result['legacy_sessions']:,} sessions "
+                  "logged in the Dialogflow shape,\nwhich does not record diagnosis or location.")
+        print("-" * 70)
+        print("Sessions without recommendations, by number of turns:")
+        for turn, count in result['drop_off_turn'].items():
+            print(f"  {turn:>3} turns  {count:>10,}")
+        if result['median_turns_to_recommendation'] is not None:
+            print(f"Median turns to first recommendation: {result['median_turns_to_recommendation']:.1f}")
+
+    elif args.command == 'conversion':
+        rows = conversion_by_day(turns)
+        _print_header("Conversion by day", turns, started)
+        print(f"{'date':<12} {'sessions':>10} {'converted':>10} {'rate':>8}")
+        for day, started_count, converted in rows:
+            print(f"{day.isoformat():<12} {started_count:>10,} {converted:>10,} {_pct(converted, started_count):>8}")
+
+    elif args.command == 'extraction':
+        rates = extraction_hit_rates(turns)
+        _print_header("Extraction hit rate (share of sessions)", turns, started)
+        print(f"{'field':<16} {'all sessions':>14} {'with intent':>14}")
+        for name, (overall, with_intent) in rates.items():
+            print(f"{name:<16} {overall * 100:>13.1f}% {with_intent * 100:>13.1f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
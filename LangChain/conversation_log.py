@@ -0,0 +1,244 @@
+"""
+Asynchronous, batched conversation log.
+
+log_conversation() in web_app_with_logging used to open
+logs/conversations.jsonl, append one line and close it on every chat
+turn, inside the request thread and without any locking.
+ConversationLogWriter moves the file I/O off the request path:
+- write() serializes the entry and puts the line on a bounded queue;
+  when the queue is full the line is dropped and counted rather than
+  blocking the request
+- a background thread drains the queue and appends lines in batches,
+  flushing once `batch_size` lines are waiting or `flush_interval`
+  seconds after the first one arrived
+- the file is rotated when it would grow past `max_bytes` and when the
+  date changes; rotated files are named <path>.<date>[.<n>]
+- close() writes everything still queued before returning, and lines
+  logged after close() are written synchronously
+- listeners (e.g. ConversationStats.refresh) run on the writer thread
+  after each batch reaches the file
+
+Configure with CONVERSATION_LOG_PATH (default logs/conversations.jsonl),
+CONVERSATION_LOG_QUEUE_SIZE (10000), CONVERSATION_LOG_BATCH_SIZE (256),
+CONVERSATION_LOG_FLUSH_INTERVAL in seconds (1), CONVERSATION_LOG_MAX_BYTES
+(50 MB, 0 = no size limit) and CONVERSATION_LOG_ROTATE_DAILY (1).
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from datetime import date
+
+from agent_log import get_logger
+
+
+log = get_logger('conversation_log')
+
+# Queued by close() to wake the writer thread
+_STOP = object()
+
+
+class ConversationLogWriter:
+    """
+    Bounded queue plus a writer thread appending JSON lines to `path`.
+    write() and stats() are thread-safe and never touch the file.
+    """
+
+    def __init__(self, path='logs/conversations.jsonl', max_queue=10000, batch_size=256,
+                 flush_interval=1.0, max_bytes=50 * 1024 * 1024, rotate_daily=True,
+                 clock=time.time):
+        self.path = path
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate_daily = rotate_daily
+        self._clock = clock
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._file_lock = threading.Lock()
+        self._counter_lock = threading.Lock()
+        self._file = None
+        self._file_date = None
+        self._size = 0
+        self._thread = None
+        self._closed = False
+        self._listeners = []
+
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.rotations = 0
+        self.write_errors = 0
+        self.last_error = None
+
+    @classmethod
+    def from_env(cls):
+        """Writer configured by the CONVERSATION_LOG_* variables"""
+        return cls(
+            path=os.getenv('CONVERSATION_LOG_PATH', 'logs/conversations.jsonl'),
+            max_queue=int(os.getenv('CONVERSATION_LOG_QUEUE_SIZE', '10000')),
+            batch_size=int(os.getenv('CONVERSATION_LOG_BATCH_SIZE', '256')),
+            flush_interval=float(os.getenv('CONVERSATION_LOG_FLUSH_INTERVAL', '1')),
+            max_bytes=int(os.getenv('CONVERSATION_LOG_MAX_BYTES', str(50 * 1024 * 1024))),
+            rotate_daily=os.getenv('CONVERSATION_LOG_ROTATE_DAILY', '1') not in ('0', 'false', 'False'),
+        )
+
+    def add_listener(self, callback):
+        """Call `callback()` on the writer thread after each written batch"""
+        self._listeners.append(callback)
+
+    def start(self):
+        """Start the writer thread (idempotent)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='conversation-log', daemon=True)
+            self._thread.start()
+        return self
+
+    def write(self, entry):
+        """
+        Queue one log entry (a JSON-serializable dict). Returns False if
+        the queue was full and the entry was dropped.
+        """
+        # Serialize now: the caller may keep mutating collected_info
+        line = json.dumps(entry) + '\n'
+        if self._closed:
+            self._write_batch([line])
+            return True
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            with self._counter_lock:
+                self.dropped += 1
+            return False
+        return True
+
+    def _run(self):
+        while True:
+            line = self._queue.get()
+            if line is _STOP:
+                break
+            batch = [line]
+            deadline = time.monotonic() + self.flush_interval
+            stopping = False
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    line = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if line is _STOP:
+                    stopping = True
+                    break
+                batch.append(line)
+            self._write_batch(batch)
+            if stopping:
+                break
+        self._drain()
+
+    def _drain(self):
+        """Write whatever is still queued"""
+        batch = []
+        while True:
+            try:
+                line = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if line is not _STOP:
+                batch.append(line)
+        if batch:
+            self._write_batch(batch)
+
+    def _write_batch(self, lines):
+        data = ''.join(lines).encode('utf-8')
+        with self._file_lock:
+            try:
+                self._rotate_if_needed(len(data))
+                self._file.write(data)
+                self._file.flush()
+                self._size += len(data)
+            except OSError as e:
+                with self._counter_lock:
+                    self.write_errors += 1
+                    self.dropped += len(lines)
+                    self.last_error = str(e)
+                log.warning("conversation log write failed", dropped=len(lines), error=e)
+                return
+        with self._counter_lock:
+            self.written += len(lines)
+            self.batches += 1
+        for callback in self._listeners:
+            try:
+                callback()
+            except Exception as e:
+                log.warning("conversation log listener failed", error=e)
+
+    def _today(self):
+        return date.fromtimestamp(self._clock())
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, 'ab')
+        self._size = self._file.tell()
+        # An existing file belongs to the day it was last written
+        if self._size:
+            self._file_date = date.fromtimestamp(os.path.getmtime(self.path))
+        else:
+            self._file_date = self._today()
+
+    def _rotate_if_needed(self, incoming):
+        if self._file is None:
+            self._open()
+        new_day = self.rotate_daily and self._file_date != self._today()
+        too_big = self.max_bytes and self._size and self._size + incoming > self.max_bytes
+        if not (new_day or too_big):
+            return
+
+        self._file.close()
+        target = f"{self.path}.{self._file_date.isoformat()}"
+        suffix = 1
+        rotated = target
+        while os.path.exists(rotated):
+            rotated = f"{target}.{suffix}"
+            suffix += 1
+        os.replace(self.path, rotated)
+        self.rotations += 1
+        self._open()
+
+    def close(self, timeout=5.0):
+        """Stop the writer thread after writing every queued line"""
+        self._closed = True
+        if self._thread is not None:
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                pass
+            self._thread.join(timeout)
+        # Lines queued after the thread stopped (or if it never ran)
+        self._drain()
+        with self._file_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def stats(self):
+        """Queue depth and write/drop counters"""
+        with self._counter_lock:
+            return {
+                'path': self.path,
+                'queue_depth': self._queue.qsize(),
+                'max_queue': self.max_queue,
+                'written': self.written,
+                'dropped': self.dropped,
+                'batches': self.batches,
+                'rotations': self.rotations,
+                'write_errors': self.write_errors,
+                'last_error': self.last_error,
+                'running': self._thread is not None and self._thread.is_alive(),
+            }
@@ -0,0 +1,154 @@
+"""
+Token-budgeted sliding-window memory for long intake conversations.
+
+ConversationBufferMemory resends the entire chat history on every turn,
+so prompts grow without bound for sessions that run for days. This
+memory keeps only the most recent turns verbatim, up to a token budget,
+and folds older turns into a short running summary. The enrollment
+profile (collected_info) is injected as structured state, so nothing the
+matcher needs is lost when old turns are folded away.
+
+The summary is built locally from the evicted messages (no extra model
+call), which keeps the per-turn prompt size roughly flat.
+"""
+
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain.memory.chat_memory import BaseChatMemory
+from langchain_core.messages import BaseMessage, SystemMessage, get_buffer_string
+
+
+_ENCODING = None
+_ENCODING_FAILED = False
+
+
+def count_tokens(text):
+    """
+    Count tokens with tiktoken when its encoding is available, otherwise
+    fall back to the usual ~4 characters per token estimate.
+    """
+    global _ENCODING, _ENCODING_FAILED
+
+    if _ENCODING is None and not _ENCODING_FAILED:
+        try:
+            import tiktoken
+            _ENCODING = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            # tiktoken missing, or its BPE file can't be fetched offline
+            _ENCODING_FAILED = True
+
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return len(text) // 4 + 1
+
+
+def _shorten(text, limit):
+    """Collapse whitespace in `text` and trim it to `limit` characters"""
+    text = ' '.join(text.split())
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + '...'
+
+
+def format_profile(collected_info):
+    """Render collected enrollment info as a compact one-line summary"""
+    if not collected_info:
+        return ""
+
+    parts = []
+    if collected_info.get('age') is not None:
+        parts.append(f"age={collected_info['age']}")
+    if collected_info.get('diagnosis'):
+        parts.append(f"diagnosis={collected_info['diagnosis']}")
+    if collected_info.get('location'):
+        parts.append(f"location={collected_info['location']}")
+    if collected_info.get('interests'):
+        parts.append(f"interests={', '.join(collected_info['interests'])}")
+    support_needs = collected_info.get('support_needs') or {}
+    for need, independent in support_needs.items():
+        parts.append(f"{need}={'yes' if independent else 'needs support'}")
+
+    return '; '.join(parts)
+
+
+class SlidingWindowMemory(BaseChatMemory):
+    """
+    Keep recent turns verbatim within `max_token_limit` tokens and fold
+    older turns into `moving_summary`, itself capped at
+    `summary_token_limit` tokens (oldest lines are dropped first).
+
+    `profile_provider` is a callable returning the agent's collected_info;
+    when set, the profile is sent as a system message ahead of the history.
+    """
+
+    memory_key: str = "chat_history"
+    max_token_limit: int = 1200
+    summary_token_limit: int = 250
+    moving_summary: str = ""
+    profile_provider: Optional[Callable[[], Dict[str, Any]]] = None
+
+    @property
+    def buffer(self) -> List[BaseMessage]:
+        return self.chat_memory.messages
+
+    @property
+    def memory_variables(self) -> List[str]:
+        return [self.memory_key]
+
+    def _prefix_messages(self) -> List[BaseMessage]:
+        messages = []
+
+        if self.profile_provider is not None:
+            profile = format_profile(self.profile_provider())
+            if profile:
+                messages.append(SystemMessage(content=f"Known details about the individual: {profile}"))
+
+        if self.moving_summary:
+            messages.append(SystemMessage(content=f"Summary of earlier conversation:\n{self.moving_summary}"))
+
+        return messages
+
+    def load_memory_variables(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """Return structured profile, running summary and recent turns"""
+        buffer = self._prefix_messages() + self.buffer
+
+        if self.return_messages:
+            return {self.memory_key: buffer}
+        return {self.memory_key: get_buffer_string(buffer)}
+
+    def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]) -> None:
+        """Save the turn, then fold old turns out of the window"""
+        super().save_context(inputs, outputs)
+        self.prune()
+
+    def prune(self) -> None:
+        """Move the oldest turns into the summary until the window fits"""
+        buffer = self.chat_memory.messages
+        token_counts = [count_tokens(message.content) for message in buffer]
+        total = sum(token_counts)
+
+        evicted = []
+        # Always keep the latest exchange, even if it alone exceeds the budget
+        while total > self.max_token_limit and len(buffer) > 2:
+            evicted.append(buffer.pop(0))
+            total -= token_counts.pop(0)
+
+        if evicted:
+            self._fold_into_summary(evicted)
+
+    def _fold_into_summary(self, messages: List[BaseMessage]) -> None:
+        lines = self.moving_summary.split('\n') if self.moving_summary else []
+
+        for message in messages:
+            speaker = "User" if message.type == "human" else "Assistant"
+            # Assistant turns are long and mostly derived from the catalog
+            limit = 160 if speaker == "User" else 80
+            lines.append(f"- {speaker}: {_shorten(message.content, limit)}")
+
+        while len(lines) > 1 and count_tokens('\n'.join(lines)) > self.summary_token_limit:
+            lines.pop(0)
+
+        self.moving_summary = '\n'.join(lines)
+
+    def clear(self) -> None:
+        """Clear memory contents."""
+        super().clear()
+        self.moving_summary = ""
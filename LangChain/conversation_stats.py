@@ -0,0 +1,438 @@
+"""
+Incrementally maintained statistics over the conversation log.
+
+/api/stats used to read and json.loads every line of
+logs/conversations.jsonl on each request. ConversationStats keeps the
+aggregates instead and only ever reads lines it has not seen:
+- refresh() tails the log from a saved byte offset; the log writer
+  calls it after each batch, so stats follow the log as it is written
+- all-time totals are one running aggregate (O(1) to report)
+- per-minute buckets (kept for `retention` seconds) answer windowed
+  queries such as the last hour or day
+- state is checkpointed to disk (offset, file identity, aggregates,
+  per-session state); after a restart only lines written since the
+  checkpoint are read, including every file rotated meanwhile
+- a session is forgotten once it has been idle for `retention` seconds,
+  so the per-session state stays bounded (a session that comes back
+  after that is counted again)
+
+Aggregates: turns, recommendation turns and rate, sessions, average
+age, sessions per age band, per support need and per interest (counted
+when a session first reports them) and how often each program was
+recommended.
+
+Configure with CONVERSATION_STATS_CHECKPOINT (default
+<log path>.stats.json), CONVERSATION_STATS_CHECKPOINT_INTERVAL in
+seconds (30) and CONVERSATION_STATS_RETENTION in seconds (7 days).
+"""
+
+import glob
+import json
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from agent_log import get_logger
+
+
+BUCKET_SECONDS = 60
+CHECKPOINT_VERSION = 1
+# Read the log in chunks of this many bytes
+READ_CHUNK = 1 << 20
+
+AGE_BANDS = ((0, 5, '0-5'), (6, 12, '6-12'), (13, 17, '13-17'), (18, 21, '18-21'),
+             (22, 59, '22-59'), (60, None, '60+'))
+
+WINDOWS = {'hour': 3600, 'day': 86400, 'week': 7 * 86400}
+
+log = get_logger('stats')
+
+
+def age_band(age):
+    for low, high, label in AGE_BANDS:
+        if age >= low and (high is None or age <= high):
+            return label
+    return None
+
+
+class Aggregate:
+    """Additive counters for a set of log lines"""
+
+    COUNTERS = ('age_bands', 'needs', 'interests', 'programs')
+
+    def __init__(self):
+        self.turns = 0
+        self.recommendation_turns = 0
+        self.sessions = 0
+        self.age_sum = 0
+        self.age_count = 0
+        self.age_bands = Counter()
+        self.needs = Counter()
+        self.interests = Counter()
+        self.programs = Counter()
+
+    def add_turn(self, recommended, new_session, age, band, needs, interests, programs):
+        """Count one log line (needs/interests: newly reported by its session)"""
+        self.turns += 1
+        if recommended:
+            self.recommendation_turns += 1
+            for program in programs:
+                self.programs[program] += 1
+        if new_session:
+            self.sessions += 1
+        if age:
+            self.age_sum += age
+            self.age_count += 1
+        if band:
+            self.age_bands[band] += 1
+        for need in needs:
+            self.needs[need] += 1
+        for interest in interests:
+            self.interests[interest] += 1
+
+    def merge(self, other):
+        self.turns += other.turns
+        self.recommendation_turns += other.recommendation_turns
+        self.sessions += other.sessions
+        self.age_sum += other.age_sum
+        self.age_count += other.age_count
+        for name in self.COUNTERS:
+            getattr(self, name).update(getattr(other, name))
+
+    def to_dict(self):
+        state = {name: getattr(self, name) for name in
+                 ('turns', 'recommendation_turns', 'sessions', 'age_sum', 'age_count')}
+        state.update({name: dict(getattr(self, name)) for name in self.COUNTERS})
+        return state
+
+    @classmethod
+    def from_dict(cls, state):
+        aggregate = cls()
+        for name, value in state.items():
+            setattr(aggregate, name, Counter(value) if name in cls.COUNTERS else value)
+        return aggregate
+
+    def report(self):
+        """The /api/stats fields for these counters"""
+        return {
+            'total_conversations': self.turns,
+            'successful_matches': self.recommendation_turns,
+            'average_age': round(self.age_sum / self.age_count, 1) if self.age_count else 0,
+            'success_rate': round(self.recommendation_turns / self.turns * 100, 1) if self.turns else 0,
+            'sessions': self.sessions,
+            'age_distribution': {label: self.age_bands[label] for _, _, label in AGE_BANDS},
+            'needs': dict(self.needs.most_common()),
+            'interests': dict(self.interests.most_common()),
+            'programs': dict(self.programs.most_common()),
+        }
+
+
+class ConversationStats:
+    """
+    Aggregates over a conversation log file, kept current by refresh().
+    All methods are thread-safe.
+    """
+
+    def __init__(self, log_path, checkpoint_path=None, checkpoint_interval=30.0,
+                 retention=7 * 86400, clock=time.time):
+        self.log_path = log_path
+        self.checkpoint_path = checkpoint_path or f"{log_path}.stats.json"
+        self.checkpoint_interval = checkpoint_interval
+        self.retention = retention
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._totals = Aggregate()
+        self._buckets = {}
+        # session id -> [age, needs, interests already counted, last seen]
+        self._sessions = {}
+        # Oldest bucket kept, as of the last _prune()
+        self._oldest_bucket = None
+        # (st_dev, st_ino) of the file `_offset` refers to
+        self._file_id = None
+        self._offset = 0
+        self._last_checkpoint = 0.0
+
+        self.lines_read = 0
+        self.bad_lines = 0
+        self.last_error = None
+
+        self._load_checkpoint()
+
+    @classmethod
+    def from_env(cls, log_path):
+        """Stats for `log_path` configured by CONVERSATION_STATS_*"""
+        return cls(
+            log_path,
+            checkpoint_path=os.getenv('CONVERSATION_STATS_CHECKPOINT') or None,
+            checkpoint_interval=float(os.getenv('CONVERSATION_STATS_CHECKPOINT_INTERVAL', '30')),
+            retention=float(os.getenv('CONVERSATION_STATS_RETENTION', str(7 * 86400))),
+        )
+
+    # -- reading the log -------------------------------------------------
+
+    def refresh(self):
+        """Read lines appended since the last call; checkpoint when due"""
+        with self._refresh_lock:
+            try:
+                self._catch_up()
+            except OSError as e:
+                self.last_error = str(e)
+                return
+            if self._clock() - self._last_checkpoint >= self.checkpoint_interval:
+                self.checkpoint()
+
+    def _catch_up(self):
+        try:
+            stat = os.stat(self.log_path)
+        except FileNotFoundError:
+            stat = None
+        file_id = (stat.st_dev, stat.st_ino) if stat else None
+
+        if file_id is None or file_id != self._file_id:
+            # First run, or the log was rotated (possibly more than once)
+            self._read_rotated()
+            if stat is None:
+                return
+            self._offset = 0
+        elif stat.st_size < self._offset:
+            # Truncated in place
+            self._offset = 0
+
+        self._file_id = file_id
+        self._offset = self._read(self.log_path, self._offset)
+
+    def _read_rotated(self):
+        """
+        Read the rotated files not read yet, oldest first: all of them on
+        the first run, otherwise the rest of the file we were reading and
+        every file rotated after it. The position ends in the last one.
+        """
+        paths = self._rotated_files()
+        offset = 0
+        if self._file_id is not None:
+            ids = [self._identity(path) for path in paths]
+            if self._file_id not in ids:
+                # Already read, or deleted: no way to tell which files are newer
+                return
+            start = ids.index(self._file_id)
+            paths = paths[start:]
+            offset = self._offset
+        for path in paths:
+            self._file_id = self._identity(path)
+            self._offset = self._read(path, offset)
+            offset = 0
+
+    @staticmethod
+    def _identity(path):
+        stat = os.stat(path)
+        return (stat.st_dev, stat.st_ino)
+
+    def _rotated_files(self):
+        paths = [path for path in glob.glob(glob.escape(self.log_path) + '.*')
+                 if path != self.checkpoint_path and not path.endswith('.tmp')]
+        return sorted(paths, key=os.path.getmtime)
+
+    def _read(self, path, offset):
+        """Apply complete lines from `offset` on; returns the new offset"""
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            pending = b''
+            while True:
+                chunk = f.read(READ_CHUNK)
+                if not chunk:
+                    break
+                data = pending + chunk
+                end = data.rfind(b'\n') + 1
+                # A partial last line is left for the next refresh
+                pending = data[end:]
+                if end:
+                    self._apply_lines(data[:end].splitlines())
+                    offset += end
+        return offset
+
+    def _apply_lines(self, lines):
+        entries = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                entries.append(self._parse(json.loads(line)))
+            except (ValueError, TypeError, AttributeError):
+                # Not JSON, or a field of the wrong type
+                self.bad_lines += 1
+        with self._lock:
+            for entry in entries:
+                self._apply(*entry)
+            self.lines_read += len(entries)
+            self._prune()
+
+    def _parse(self, entry):
+        """
+        The fields of one log line, checked and coerced (age "30" -> 30);
+        raises TypeError/ValueError/AttributeError for a malformed line,
+        before any state is touched
+        """
+        try:
+            timestamp = datetime.fromisoformat(entry['timestamp']).timestamp()
+        except (KeyError, TypeError, ValueError):
+            timestamp = self._clock()
+
+        info = entry.get('collected_info') or {}
+        if not isinstance(info, dict):
+            raise TypeError(f"collected_info is a {type(info).__name__}")
+        session_id = entry.get('session_id')
+        # Checkpoints store session ids as JSON keys
+        session_id = None if session_id is None else str(session_id)
+
+        age = info.get('age')
+        if isinstance(age, bool):
+            raise TypeError("age is a bool")
+        age = int(age) if age not in (None, '') else None
+
+        needs = [str(need) for need, value in (info.get('support_needs') or {}).items() if value is False]
+        interests = info.get('interests') or []
+        programs = entry.get('recommended_programs') or []
+        if not isinstance(interests, list) or not isinstance(programs, list):
+            raise TypeError("interests and recommended_programs must be lists")
+        interests = [str(interest) for interest in interests]
+        programs = [str(program) for program in programs]
+
+        return (timestamp, session_id, age, needs, interests,
+                bool(entry.get('recommendations_provided')), programs)
+
+    def _apply(self, timestamp, session_id, age, needs, interests, recommended, programs):
+        seen = self._sessions.get(session_id)
+        new_session = seen is None
+        if new_session:
+            seen = self._sessions[session_id] = [None, [], [], timestamp]
+        else:
+            seen[3] = max(seen[3], timestamp)
+
+        band = None
+        if age and seen[0] is None:
+            seen[0] = age
+            band = age_band(age)
+
+        needs = [need for need in needs if need not in seen[1]]
+        seen[1].extend(needs)
+        interests = [interest for interest in interests if interest not in seen[2]]
+        seen[2].extend(interests)
+
+        bucket = int(timestamp // BUCKET_SECONDS)
+        aggregate = self._buckets.get(bucket)
+        if aggregate is None:
+            aggregate = self._buckets[bucket] = Aggregate()
+        for target in (self._totals, aggregate):
+            target.add_turn(recommended, new_session, age, band, needs, interests, programs)
+
+    def _prune(self):
+        cutoff = self._clock() - self.retention
+        oldest = int(cutoff // BUCKET_SECONDS)
+        if oldest == self._oldest_bucket:
+            return
+        self._oldest_bucket = oldest
+        for bucket in [bucket for bucket in self._buckets if bucket < oldest]:
+            del self._buckets[bucket]
+        for session_id in [session_id for session_id, seen in self._sessions.items() if seen[3] < cutoff]:
+            del self._sessions[session_id]
+
+    # -- queries -----------------------------------------------------------
+
+    def report(self, window=None):
+        """
+        Stats for all time, or for the last `window` seconds (also
+        'hour', 'day' or 'week'), at minute granularity
+        """
+        if window is None:
+            with self._lock:
+                return self._totals.report()
+
+        seconds = WINDOWS[window] if window in WINDOWS else float(window)
+        if seconds > self.retention:
+            raise ValueError(f"window longer than the {self.retention:.0f}s retention")
+        first = int((self._clock() - seconds) // BUCKET_SECONDS)
+        aggregate = Aggregate()
+        with self._lock:
+            for bucket, counts in self._buckets.items():
+                if bucket >= first:
+                    aggregate.merge(counts)
+        report = aggregate.report()
+        report['window_seconds'] = seconds
+        return report
+
+    def stats(self):
+        """Reader position and counters, for /api/status"""
+        return {
+            'log_path': self.log_path,
+            'offset': self._offset,
+            'lines_read': self.lines_read,
+            'bad_lines': self.bad_lines,
+            'sessions_tracked': len(self._sessions),
+            'buckets': len(self._buckets),
+            'last_checkpoint': self._last_checkpoint or None,
+            'last_error': self.last_error,
+        }
+
+    # -- checkpoints ---------------------------------------------------------
+
+    def checkpoint(self):
+        """Write the current state to the checkpoint file (atomically)"""
+        with self._lock:
+            state = {
+                'version': CHECKPOINT_VERSION,
+                'log_path': os.path.abspath(self.log_path),
+                'file_id': self._file_id,
+                'offset': self._offset,
+                'totals': self._totals.to_dict(),
+                'buckets': {str(bucket): counts.to_dict() for bucket, counts in self._buckets.items()},
+                'sessions': self._sessions,
+            }
+            payload = json.dumps(state, separators=(',', ':'))
+        temp_path = f"{self.checkpoint_path}.tmp"
+        try:
+            directory = os.path.dirname(self.checkpoint_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(payload)
+            os.replace(temp_path, self.checkpoint_path)
+        except OSError as e:
+            self.last_error = str(e)
+            log.warning("could not write stats checkpoint", error=e)
+            return
+        self._last_checkpoint = self._clock()
+        self.last_error = None
+
+    def _load_checkpoint(self):
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            # Rebuilt from the log below instead
+            log.warning("ignoring unreadable stats checkpoint", error=e)
+            return
+        if (state.get('version') != CHECKPOINT_VERSION
+                or state.get('log_path') != os.path.abspath(self.log_path)):
+            return
+
+        self._file_id = tuple(state['file_id']) if state['file_id'] else None
+        self._offset = state['offset']
+        self._totals = Aggregate.from_dict(state['totals'])
+        self._buckets = {int(bucket): Aggregate.from_dict(counts)
+                         for bucket, counts in state['buckets'].items()}
+        self._sessions = state['sessions']
+
+    def close(self):
+        """Read any remaining lines and write a final checkpoint"""
+        with self._refresh_lock:
+            try:
+                self._catch_up()
+            except OSError as e:
+                self.last_error = str(e)
+            self.checkpoint()
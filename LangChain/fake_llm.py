@@ -0,0 +1,90 @@
+"""
+Offline stand-in for ChatOpenAI, for load testing and local development.
+
+FakeChatModel returns canned replies after a configurable delay, using
+time.sleep() on the sync path and asyncio.sleep() on the async path, so
+it behaves like a slow remote model without any network calls or API
+key. Streaming yields the reply word by word.
+
+Enable it in the web apps with USE_FAKE_LLM=1 (FAKE_LLM_LATENCY sets the
+delay in seconds).
+"""
+
+import asyncio
+import os
+import re
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+DEFAULT_RESPONSES = [
+    "Thanks for reaching out to AbilityPath! Are you looking to learn about our programs, "
+    "enroll in a program, or ask a question?",
+    "That's helpful, thank you. How old is the individual you're looking for support for?",
+    "Thank you. Which county do you live in - San Mateo, Santa Clara, or San Francisco?",
+]
+
+
+def use_fake_llm():
+    """True when the environment asks for the offline fake model"""
+    return os.getenv("USE_FAKE_LLM", "").lower() in ("1", "true", "yes")
+
+
+def fake_llm_from_env():
+    """FakeChatModel configured from FAKE_LLM_LATENCY"""
+    return FakeChatModel(latency=float(os.getenv("FAKE_LLM_LATENCY", "0.5")))
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that replies from `responses` in turn after `latency` seconds"""
+
+    responses: List[str] = DEFAULT_RESPONSES
+    latency: float = 0.5
+    i: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-latency-chat-model"
+
+    def _next_response(self) -> str:
+        response = self.responses[self.i % len(self.responses)]
+        self.i += 1
+        return response
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        message = AIMessage(content=self._next_response())
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        message = AIMessage(content=self._next_response())
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _chunks(self):
+        # Split after whitespace so chunks re-join to the exact reply
+        return re.findall(r'\S+\s*|\s+', self._next_response())
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        chunks = self._chunks()
+        for chunk in chunks:
+            time.sleep(self.latency / len(chunks))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        chunks = self._chunks()
+        for chunk in chunks:
+            await asyncio.sleep(self.latency / len(chunks))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
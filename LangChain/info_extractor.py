@@ -0,0 +1,197 @@
+"""
+Single-pass, compiled extractor for enrollment criteria.
+
+ScreeningAgent._extract_information used to rebuild its keyword maps on
+every call. It then ran four separate age regexes and dozens of
+`keyword in message` substring scans, so short keywords matched inside
+unrelated words: 'id' in "did", 'dd' in "add", 'cp' in "cpu", 'sf' in
+"misfit", 'fun' in "funding".
+
+Here every keyword is compiled once, at import time, into one
+alternation regex with word boundaries. Diagnosis and location keywords
+may take a plural 's'; interest keywords are stems that also take common
+word endings ("socializing", "worker", "socially"), as the substring
+checks allowed, but not arbitrary ones ('fun' still misses "funding").
+Each keyword maps to a typed slot. A single finditer() pass over the message collects age,
+diagnosis, location and interests together.
+Precedence matches the old extractor:
+- age takes the highest-priority pattern that matched
+- diagnosis and location take the first matching entry in map order
+- interests collect every match
+Support needs use a second, small pass over word stems. The old checks
+were substrings, so "independently" counts as "independent".
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+DIAGNOSIS_MAP = {
+    'developmental disability': ['developmental disability', 'developmental delay', 'dd', 'developmentally disabled'],
+    'intellectual disability': ['intellectual disability', 'id', 'cognitive disability', 'mentally disabled'],
+    'autism': ['autism', 'autistic', 'asd', 'autism spectrum', 'on the spectrum'],
+    'down syndrome': ['down syndrome', 'downs syndrome', 'trisomy 21'],
+    'cerebral palsy': ['cerebral palsy', 'cp'],
+    'traumatic brain injury': ['traumatic brain injury', 'tbi', 'brain injury'],
+    'stroke': ['stroke', 'cva', 'cerebrovascular'],
+}
+
+LOCATION_MAP = {
+    'san mateo': ['san mateo', 'burlingame', 'daly city', 'foster city', 'redwood city'],
+    'santa clara': ['santa clara', 'san jose', 'palo alto', 'mountain view', 'sunnyvale', 'cupertino'],
+    'san francisco': ['san francisco', 'sf'],
+}
+
+INTEREST_MAP = {
+    'employment': ['job', 'work', 'employment', 'career', 'vocational', 'working'],
+    'living skills': ['living skills', 'independent living', 'life skills', 'daily living', 'cooking', 'budgeting', 'independence'],
+    'social': ['social', 'friends', 'friendship', 'recreation', 'activities', 'fun', 'meet people'],
+    'day program': ['day program', 'day service', 'daytime', 'structured activities', 'during the day'],
+}
+
+# Support-need topics and the phrases that mark the person as independent.
+# These are word stems matched from a word start with any ending
+# ("toileting", "independently", "independence"), like the substring
+# checks they replace, and in their own pass: an interest keyword such as
+# "independent living" must not consume the "independent" marker.
+SUPPORT_TOPICS = {
+    'toilet_trained': ['toilet', 'bathroom'],
+    'eating_independence': ['eating', 'feeding'],
+}
+INDEPENDENCE_MARKERS = {
+    'toilet_trained': ['independen', "doesn't need", "don't need", 'can use'],
+    'eating_independence': ['independen', "doesn't need", "don't need"],
+}
+
+# Endings an interest keyword may take ("works", "worker", "socializing",
+# "socialising", "socially")
+INTEREST_SUFFIXES = r"(?:s|es|ers?|ings?|ed|ly|i[sz](?:e|ed|es|ing))"
+
+# Phrases that switch the conversation into enrollment screening
+# (plain substring checks, as the agent has always done)
+ENROLL_KEYWORDS = ('enroll', 'sign up', 'register', 'apply', 'ready to join', 'find a program', 'need help finding')
+
+
+def has_enroll_intent(user_message):
+    """True if the message asks to enroll or find a program"""
+    message_lower = user_message.lower()
+    return any(keyword in message_lower for keyword in ENROLL_KEYWORDS)
+
+
+# Age patterns, highest priority first (same order as the old extractor)
+AGE_PATTERNS = [
+    r'(\d+)\s*years?\s*old',
+    r'\bage\s*(?:is\s*)?(\d+)',
+    r'\b(?:he|she|they|i)(?:\'s|\s+is|\s+am)\s*(\d+)',
+    r'\b(\d+)\s*(?:year|yr)',
+]
+
+
+def _build():
+    """Compile every keyword into one regex and a keyword -> slots table"""
+    slots = {}
+
+    def add(keyword, slot):
+        slots.setdefault(keyword, []).append(slot)
+
+    for priority, (diagnosis, keywords) in enumerate(DIAGNOSIS_MAP.items()):
+        for keyword in keywords:
+            add(keyword, ('diagnosis', priority, diagnosis))
+    for priority, (location, keywords) in enumerate(LOCATION_MAP.items()):
+        for keyword in keywords:
+            add(keyword, ('location', priority, location))
+    interest_keywords = set()
+    for priority, (interest, keywords) in enumerate(INTEREST_MAP.items()):
+        for keyword in keywords:
+            add(keyword, ('interest', priority, interest))
+            interest_keywords.add(keyword)
+
+    def alternation(keywords):
+        # Longest first, so "independent living" wins over "independent"
+        return '|'.join(re.escape(keyword) for keyword in sorted(keywords, key=len, reverse=True))
+
+    # Name each pattern's digit group so the matching pattern is known
+    age_groups = '|'.join(
+        pattern.replace(r'(\d+)', rf'(?P<age{i}>\d+)', 1) for i, pattern in enumerate(AGE_PATTERNS)
+    )
+    # Interest keywords may take any of INTEREST_SUFFIXES ("jobs",
+    # "friends'", "worker"), diagnosis and location keywords a plural 's'
+    regex = re.compile(
+        rf"{age_groups}"
+        rf"|\b(?P<kw>{alternation(interest_keywords)}){INTEREST_SUFFIXES}?\b"
+        rf"|\b(?P<kw_plural>{alternation(set(slots) - interest_keywords)})s?\b"
+    )
+    return regex, slots
+
+
+def _build_support():
+    """One regex per need: (topic stems, independence marker stems)"""
+    def stems(words):
+        return re.compile(r"\b(?:" + '|'.join(re.escape(word) for word in words) + r")")
+    return {need: (stems(SUPPORT_TOPICS[need]), stems(INDEPENDENCE_MARKERS[need])) for need in SUPPORT_TOPICS}
+
+
+_REGEX, _SLOTS = _build()
+_SUPPORT_REGEXES = _build_support()
+_AGE_GROUP_NAMES = [f'age{i}' for i in range(len(AGE_PATTERNS))]
+
+
+@dataclass
+class Extraction:
+    """Criteria found in one message (None / empty when not mentioned)"""
+
+    age: Optional[int] = None
+    diagnosis: Optional[str] = None
+    location: Optional[str] = None
+    interests: List[str] = field(default_factory=list)
+    support_needs: Dict[str, bool] = field(default_factory=dict)
+
+    def describes_person(self):
+        """True if the message gave age, diagnosis or support needs"""
+        return self.age is not None or self.diagnosis is not None or bool(self.support_needs)
+
+
+def extract(user_message):
+    """Extract enrollment criteria from a message in one regex pass"""
+    message_lower = user_message.lower()
+
+    age = None
+    age_priority = len(AGE_PATTERNS)
+    diagnosis = (len(DIAGNOSIS_MAP), None)
+    location = (len(LOCATION_MAP), None)
+    interests = {}
+
+    for match in _REGEX.finditer(message_lower):
+        keyword = match.group('kw') or match.group('kw_plural')
+        if keyword is None:
+            for priority, name in enumerate(_AGE_GROUP_NAMES):
+                if priority >= age_priority:
+                    break
+                if match.group(name) is not None:
+                    value = int(match.group(name))
+                    if 0 <= value <= 120:
+                        age, age_priority = value, priority
+                    break
+            continue
+
+        for kind, priority, value in _SLOTS[keyword]:
+            if kind == 'diagnosis' and priority < diagnosis[0]:
+                diagnosis = (priority, value)
+            elif kind == 'location' and priority < location[0]:
+                location = (priority, value)
+            elif kind == 'interest':
+                interests.setdefault(value, priority)
+
+    support_needs = {}
+    for need, (topic, marker) in _SUPPORT_REGEXES.items():
+        if topic.search(message_lower):
+            support_needs[need] = marker.search(message_lower) is not None
+
+    return Extraction(
+        age=age,
+        diagnosis=diagnosis[1],
+        location=location[1],
+        interests=sorted(interests, key=interests.get),
+        support_needs=support_needs,
+    )
@@ -0,0 +1,197 @@
+"""
+Process-wide, pooled OpenAI client shared by every ScreeningAgent.
+
+Previously each session built its own ChatOpenAI, and with it new
+OpenAI/httpx clients and connection pools, so every new session paid
+TCP+TLS setup and the process held one idle pool per session. Now one
+LLMClientFactory per process owns a sync and an async httpx client with
+keep-alive pooling, a bounded number of connections (extra requests
+queue for a free connection up to the pool timeout) and per-request
+timeouts. Agents get a ChatOpenAI that shares those clients.
+
+Configuration (environment variables, all optional):
+- LLM_MODEL (gpt-3.5-turbo), LLM_TEMPERATURE (0.7)
+- LLM_MAX_CONNECTIONS (50), LLM_MAX_KEEPALIVE (20), LLM_KEEPALIVE_EXPIRY (30s)
+- LLM_TIMEOUT (30s), LLM_CONNECT_TIMEOUT (5s), LLM_POOL_TIMEOUT (10s)
+- LLM_MAX_RETRIES (2)
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+
+import httpx
+import openai
+from langchain_openai import ChatOpenAI
+
+
+@dataclass
+class LLMClientConfig:
+    """Connection pool and request settings for the shared client"""
+
+    model: str = "gpt-3.5-turbo"
+    temperature: float = 0.7
+    max_connections: int = 50
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    timeout: float = 30.0
+    connect_timeout: float = 5.0
+    pool_timeout: float = 10.0
+    max_retries: int = 2
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            model=os.getenv("LLM_MODEL", cls.model),
+            temperature=float(os.getenv("LLM_TEMPERATURE", cls.temperature)),
+            max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", cls.max_connections)),
+            max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE", cls.max_keepalive_connections)),
+            keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", cls.keepalive_expiry)),
+            timeout=float(os.getenv("LLM_TIMEOUT", cls.timeout)),
+            connect_timeout=float(os.getenv("LLM_CONNECT_TIMEOUT", cls.connect_timeout)),
+            pool_timeout=float(os.getenv("LLM_POOL_TIMEOUT", cls.pool_timeout)),
+            max_retries=int(os.getenv("LLM_MAX_RETRIES", cls.max_retries)),
+        )
+
+    def limits(self):
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def timeouts(self):
+        return httpx.Timeout(self.timeout, connect=self.connect_timeout, pool=self.pool_timeout)
+
+
+class _PoolCounters:
+    """Requests sent and connections opened through one transport"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections_created = 0
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def count_connection(self):
+        with self._lock:
+            self.connections_created += 1
+
+
+def _count_connections(pool, counters):
+    """Wrap the httpcore pool's create_connection to count new connections"""
+    create_connection = pool.create_connection
+
+    def counting_create_connection(origin):
+        counters.count_connection()
+        return create_connection(origin)
+
+    pool.create_connection = counting_create_connection
+
+
+class _CountingTransport(httpx.HTTPTransport):
+    def __init__(self, counters, **kwargs):
+        super().__init__(**kwargs)
+        self.counters = counters
+        _count_connections(self._pool, counters)
+
+    def handle_request(self, request):
+        self.counters.count_request()
+        return super().handle_request(request)
+
+
+class _AsyncCountingTransport(httpx.AsyncHTTPTransport):
+    def __init__(self, counters, **kwargs):
+        super().__init__(**kwargs)
+        self.counters = counters
+        _count_connections(self._pool, counters)
+
+    async def handle_async_request(self, request):
+        self.counters.count_request()
+        return await super().handle_async_request(request)
+
+
+def _pool_stats(transport):
+    pool = transport._pool
+    counters = transport.counters
+    connections = pool.connections
+    # httpcore keeps in-flight and queued requests on the pool
+    waiters = sum(1 for request in getattr(pool, '_requests', []) if request.is_queued())
+    reused = max(counters.requests - counters.connections_created, 0)
+    return {
+        'open_connections': len(connections),
+        'idle_connections': sum(1 for connection in connections if connection.is_idle()),
+        'waiters': waiters,
+        'requests': counters.requests,
+        'connections_created': counters.connections_created,
+        'reuse_rate': round(reused / counters.requests, 4) if counters.requests else 0.0,
+    }
+
+
+class LLMClientFactory:
+    """
+    Owns the shared httpx clients and hands out ChatOpenAI instances that
+    use them. ChatOpenAI is stateless between calls, so one instance per
+    API key is reused by every agent.
+    """
+
+    def __init__(self, config=None):
+        self.config = config or LLMClientConfig.from_env()
+        self._lock = threading.Lock()
+        self._sync_transport = _CountingTransport(_PoolCounters(), limits=self.config.limits())
+        self._async_transport = _AsyncCountingTransport(_PoolCounters(), limits=self.config.limits())
+        self.http_client = httpx.Client(transport=self._sync_transport, timeout=self.config.timeouts())
+        self.async_http_client = httpx.AsyncClient(transport=self._async_transport, timeout=self.config.timeouts())
+        self._llms = {}
+
+    def get_llm(self, openai_api_key):
+        """Shared ChatOpenAI for this API key"""
+        with self._lock:
+            llm = self._llms.get(openai_api_key)
+            if llm is None:
+                client_params = {
+                    "api_key": openai_api_key,
+                    "timeout": self.config.timeouts(),
+                    "max_retries": self.config.max_retries,
+                }
+                llm = ChatOpenAI(
+                    model=self.config.model,
+                    temperature=self.config.temperature,
+                    openai_api_key=openai_api_key,
+                    request_timeout=self.config.timeout,
+                    max_retries=self.config.max_retries,
+                    client=openai.OpenAI(http_client=self.http_client, **client_params).chat.completions,
+                    async_client=openai.AsyncOpenAI(
+                        http_client=self.async_http_client, **client_params
+                    ).chat.completions,
+                )
+                self._llms[openai_api_key] = llm
+            return llm
+
+    def stats(self):
+        """Pool statistics for the sync and async clients"""
+        return {
+            'sync': _pool_stats(self._sync_transport),
+            'async': _pool_stats(self._async_transport),
+            'max_connections': self.config.max_connections,
+        }
+
+    def close(self):
+        """Close the sync client (the async client closes with its event loop)"""
+        self.http_client.close()
+
+
+_factory = None
+_factory_lock = threading.Lock()
+
+
+def get_llm_factory():
+    """The process-wide LLMClientFactory, created on first use"""
+    global _factory
+    with _factory_lock:
+        if _factory is None:
+            _factory = LLMClientFactory()
+        return _factory
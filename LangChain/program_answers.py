@@ -0,0 +1,189 @@
+"""
+Deterministic answers to program-detail questions, without the LLM.
+
+Questions like "what time does the Daly City day program start" ask for
+one field of one program. ProgramQuestionAnswerer finds which field is
+being asked about (schedule, location, ages, enrollment, eligibility)
+and which program is meant, even when the name isn't typed exactly. It
+resolves aliases, site/city names and small typos. The answer then
+comes straight from the PROGRAMS fields. If either the question type or
+the program is uncertain it returns None and the LLM handles the turn
+as before.
+"""
+
+import difflib
+import math
+import re
+from collections import Counter
+
+from program_retriever import tokenize
+
+
+# Question type -> trigger phrases (matched on word boundaries)
+FIELD_PATTERNS = {
+    'schedule': r"what time|when|schedule|hours|what days|which days|how often|start|open|times?",
+    'location': r"where|address|located|location|directions",
+    'ages': r"ages?|how old|old enough|age range",
+    'enrollment': r"enroll|enrollment|sign up|apply|get started|intake|referral|how do (?:i|we) join",
+    'eligibility': r"eligible|eligibility|qualify|requirements?|criteria|who can (?:join|attend)|accept",
+}
+FIELD_REGEXES = {field: re.compile(rf"\b(?:{pattern})\b") for field, pattern in FIELD_PATTERNS.items()}
+
+QUESTION_START = re.compile(r"^\s*(?:what|when|where|who|how|is|are|does|do|can|which|tell me)\b")
+
+# Shorthand people use for program names
+ALIASES = {
+    'ils': 'independent living skills',
+    'social rec': 'social recreation',
+    'tbi': 'traumatic brain injury',
+    'work readiness': 'immersion work readiness',
+    'art': 'creative arts',
+    'arts': 'creative arts',
+}
+ALIAS_REGEX = re.compile(r"\b(" + "|".join(re.escape(alias) for alias in ALIASES) + r")\b")
+
+
+def _age_text(program):
+    age_range = program.get('age_range', {})
+    min_age = age_range.get('min_age')
+    max_age = age_range.get('max_age')
+    if min_age and max_age:
+        return f"{min_age}-{max_age} years old"
+    if min_age:
+        return f"{min_age}+ years old"
+    return "All ages"
+
+
+def _support_text(program):
+    requirements = program.get('support_requirements', {})
+    lines = []
+    if requirements.get('toilet_trained'):
+        lines.append("• Must be toilet-trained/bathroom independent")
+    if requirements.get('eating_independence'):
+        lines.append("• Must eat independently")
+    if requirements.get('mobility_independence'):
+        lines.append("• Must have mobility independence or minimal support")
+    for requirement in requirements.get('behavioral_requirements', []):
+        lines.append(f"• {requirement}")
+    return '\n'.join(lines)
+
+
+def _render_field(program, field):
+    if field == 'schedule':
+        return f"⏰ SCHEDULE:\n{program.get('schedule', 'Contact program for schedule information')}"
+    if field == 'location':
+        counties = ', '.join(program.get('counties_served', ['Contact for details']))
+        return (f"📍 LOCATION:\n{program.get('physical_location', 'Various locations in the community')}\n"
+                f"Counties Served: {counties}")
+    if field == 'ages':
+        return f"👤 AGES: {_age_text(program)}"
+    if field == 'enrollment':
+        return f"📝 HOW TO GET STARTED:\n{program.get('enrollment_process', 'Contact AbilityPath for enrollment information')}"
+    # eligibility
+    text = (f"✅ ELIGIBILITY:\n• Ages: {_age_text(program)}\n"
+            f"• Diagnosis: {', '.join(program.get('diagnosis_accepted', ['Not specified']))}")
+    support = _support_text(program)
+    return text + ("\n" + support if support else "")
+
+
+class ProgramQuestionAnswerer:
+    """
+    Resolve (question type, program) from a message and answer from the
+    catalog. Build once per catalog version; answer() only reads.
+    """
+
+    # Share of the best program's name weight the message must cover,
+    # unless it names something only one program has (e.g. "REACH")
+    MIN_COVERAGE = 0.5
+    # Best match must beat the runner-up by this factor
+    MIN_MARGIN = 1.25
+    FUZZY_CUTOFF = 0.8
+
+    def __init__(self, programs):
+        self.programs = programs
+        self.name_tokens = [set(tokenize(program['name'])) for program in programs]
+        # Place words ("San Jose", "Daly City", "County"): naming a place
+        # alone is not naming a program
+        self.place_tokens = set()
+        for program in programs:
+            name = program['name']
+            if ',' in name:
+                self.place_tokens.update(tokenize(name.rsplit(',', 1)[1]))
+            self.place_tokens.update(tokenize(program.get('location', '')))
+            for county in program.get('counties_served', []):
+                self.place_tokens.update(tokenize(county))
+
+        doc_freq = Counter()
+        for tokens in self.name_tokens:
+            doc_freq.update(tokens)
+        n = len(programs)
+        self.idf = {token: math.log(1 + n / df) for token, df in doc_freq.items()}
+        self.unique_tokens = {token for token, df in doc_freq.items() if df == 1}
+        self.vocabulary = sorted(self.idf)
+
+    def detect_fields(self, message_lower):
+        """Question types asked about, in a stable order"""
+        return [field for field, regex in FIELD_REGEXES.items() if regex.search(message_lower)]
+
+    def _message_tokens(self, message_lower):
+        expanded = ALIAS_REGEX.sub(lambda m: ALIASES[m.group(1)], message_lower)
+        tokens = set()
+        for token in tokenize(expanded):
+            if token in self.idf:
+                tokens.add(token)
+            elif len(token) >= 5:
+                # Tolerate typos such as "burlingam" or "recration"
+                close = difflib.get_close_matches(token, self.vocabulary, n=1, cutoff=self.FUZZY_CUTOFF)
+                if close:
+                    tokens.add(close[0])
+        return tokens
+
+    def resolve_program(self, message_lower):
+        """
+        Return (program, coverage) for the program the message refers
+        to, or (None, coverage) when no program clearly stands out.
+        """
+        tokens = self._message_tokens(message_lower)
+        if not tokens:
+            return None, 0.0
+
+        scored = []
+        for i, name_tokens in enumerate(self.name_tokens):
+            matched = tokens & name_tokens
+            program_words = matched - self.place_tokens
+            # At least one matched word must be part of the program name
+            # proper; a city plus "when"/"start" is a screening answer
+            if program_words:
+                weight = sum(self.idf[t] for t in matched)
+                coverage = weight / sum(self.idf[t] for t in name_tokens)
+                scored.append((weight, coverage, bool(program_words & self.unique_tokens), i))
+        if not scored:
+            return None, 0.0
+
+        scored.sort(key=lambda item: (-item[0], -item[1], item[3]))
+        best_weight, best_coverage, best_unique, best_index = scored[0]
+        runner_up = scored[1][0] if len(scored) > 1 else 0.0
+
+        if best_coverage < self.MIN_COVERAGE and not best_unique:
+            return None, best_coverage
+        if runner_up and best_weight < runner_up * self.MIN_MARGIN:
+            return None, best_coverage
+        return self.programs[best_index], best_coverage
+
+    def answer(self, user_message):
+        """Deterministic answer text, or None if the LLM should answer"""
+        message_lower = user_message.lower()
+        if '?' not in message_lower and not QUESTION_START.search(message_lower):
+            return None
+
+        fields = self.detect_fields(message_lower)
+        if not fields:
+            return None
+
+        program, _confidence = self.resolve_program(message_lower)
+        if program is None:
+            return None
+
+        sections = '\n\n'.join(_render_field(program, field) for field in fields)
+        return (f"Here's what I have for {program['name']}:\n\n{sections}\n\n"
+                "Would you like more details about this program, or help finding other options?")
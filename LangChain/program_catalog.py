@@ -0,0 +1,307 @@
+"""
+Indexed view of the program catalog.
+
+The lookup helpers in programs_database used to scan PROGRAMS and
+lowercase every name on each call. ProgramCatalog is built once from a
+programs list and keeps:
+- a normalized-name hash map (get_by_name)
+- inverted indexes by county, program type and diagnosis
+- an interval index over age ranges (programs_for_age)
+- a ProgramRecord per program with the fields matching compares already
+  lowercased and its support requirements compiled into a bitmask
+- program bitsets for matching (bit i = programs[i]): which programs
+  score each criterion, and, cached per distinct profile value, which
+  of them match it
+
+so lookups are O(1) and age queries O(log n + k). A catalog is an
+immutable snapshot identified by `version` (a content hash); build a
+new one when the programs change.
+"""
+
+import bisect
+from collections import defaultdict
+from functools import lru_cache
+from typing import NamedTuple, Tuple
+
+from prompt_cache import catalog_fingerprint
+
+
+# Distinct profile values whose match bitsets are kept per catalog
+MATCH_CACHE_SIZE = 4096
+
+
+def normalize_name(name):
+    """Case- and whitespace-insensitive key for a program name"""
+    return ' '.join(name.lower().split())
+
+
+# Support flags compared by the matcher, one bit each
+SUPPORT_FLAGS = ('toilet_trained', 'eating_independence', 'mobility_independence')
+SUPPORT_BITS = {flag: 1 << i for i, flag in enumerate(SUPPORT_FLAGS)}
+
+
+def support_requirements_mask(requirements):
+    """Bits for the support flags a program requires (True)"""
+    mask = 0
+    for flag, bit in SUPPORT_BITS.items():
+        if requirements.get(flag) == True:
+            mask |= bit
+    return mask
+
+
+def support_needs_mask(support_needs):
+    """Bits for the support flags a person can't manage independently (False)"""
+    mask = 0
+    for flag, bit in SUPPORT_BITS.items():
+        if support_needs.get(flag) == False:
+            mask |= bit
+    return mask
+
+
+class ProgramRecord(NamedTuple):
+    """A program with the fields matching compares, precompiled"""
+
+    program: dict
+    diagnoses: Tuple[str, ...]
+    counties: Tuple[str, ...]
+    location: str
+    program_types: Tuple[str, ...]
+    has_support_requirements: bool
+    support_mask: int
+
+    @classmethod
+    def from_program(cls, program):
+        requirements = program.get('support_requirements', {})
+        return cls(
+            program=program,
+            diagnoses=tuple(d.lower() for d in program.get('diagnosis_accepted', [])),
+            counties=tuple(c.lower() for c in program.get('counties_served', [])),
+            location=program.get('location', '').lower(),
+            program_types=tuple(t.lower() for t in program.get('program_type', [])),
+            has_support_requirements=bool(requirements),
+            support_mask=support_requirements_mask(requirements),
+        )
+
+    # The matching rules, shared by ProgramCatalog and batch_matcher;
+    # profile values are lowercased by the caller
+
+    def accepts_diagnosis(self, diagnosis):
+        """An accepted diagnosis and `diagnosis` contain one another"""
+        return any(accepted in diagnosis or diagnosis in accepted for accepted in self.diagnoses)
+
+    def serves_location(self, location):
+        """A served county, or else the location field, and `location` contain one another"""
+        if any(location in county or county in location for county in self.counties):
+            return True
+        return bool(self.location) and (location in self.location or self.location in location)
+
+    def matches_interests(self, interests):
+        """A program type and one of `interests` contain one another"""
+        return any(interest in prog_type or prog_type in interest
+                   for interest in interests for prog_type in self.program_types)
+
+
+# Bits of a recommendation's detail code: which criteria were scored
+# and which of those matched
+DIAGNOSIS_SCORED, DIAGNOSIS_MATCHED = 1, 2
+LOCATION_SCORED, LOCATION_MATCHED = 4, 8
+INTEREST_SCORED, INTEREST_MATCHED = 16, 32
+SUPPORT_SCORED, SUPPORT_MATCHED = 64, 128
+
+
+@lru_cache(maxsize=None)
+def criteria_details(detail_code):
+    """The "✓/✗ ..." lines for a detail code"""
+    details = []
+    if detail_code & DIAGNOSIS_SCORED:
+        details.append("✓ Diagnosis matches" if detail_code & DIAGNOSIS_MATCHED else "✗ Diagnosis doesn't match")
+    if detail_code & LOCATION_SCORED:
+        details.append("✓ Location matches" if detail_code & LOCATION_MATCHED else "✗ Location doesn't match")
+    if detail_code & INTEREST_SCORED:
+        details.append("✓ Interest matches" if detail_code & INTEREST_MATCHED else "✗ Interest doesn't match")
+    if detail_code & SUPPORT_SCORED:
+        details.append("✓ Support level appropriate" if detail_code & SUPPORT_MATCHED
+                       else "✗ Support needs don't match requirements")
+    return tuple(details)
+
+
+class Recommendation(dict):
+    """
+    One scored program. 'criteria_details' is rendered from the detail
+    code on first access, so only recommendations that are shown pay
+    for the text.
+    """
+
+    def __init__(self, program, match_percentage, match_score, total_criteria, detail_code):
+        super().__init__(program=program, match_percentage=match_percentage,
+                         match_score=match_score, total_criteria=total_criteria)
+        self.detail_code = detail_code
+
+    def __missing__(self, key):
+        if key != 'criteria_details':
+            raise KeyError(key)
+        details = self['criteria_details'] = list(criteria_details(self.detail_code))
+        return details
+
+    def get(self, key, default=None):
+        return self[key] if key in self or key == 'criteria_details' else default
+
+    def __reduce__(self):
+        return (Recommendation, (self['program'], self['match_percentage'], self['match_score'],
+                                 self['total_criteria'], self.detail_code))
+
+
+class ProgramCatalog:
+    """Programs plus the indexes used to query them"""
+
+    def __init__(self, programs, version=None):
+        # A snapshot: the program list never changes after construction
+        self.programs = tuple(programs)
+        # Content hash; caches derived from the catalog key on it. Pass
+        # `version` when it is already known (e.g. from a pack header)
+        self.version = version or catalog_fingerprint(self.programs)
+        self.records = [ProgramRecord.from_program(program) for program in self.programs]
+
+        self._by_name = {}
+        by_county = defaultdict(list)
+        by_type = defaultdict(list)
+        by_diagnosis = defaultdict(list)
+
+        for program in self.programs:
+            # First program wins on duplicate names, like the old scan
+            self._by_name.setdefault(normalize_name(program['name']), program)
+            for county in program.get('counties_served', []):
+                by_county[county].append(program)
+            for program_type in program.get('program_type', []):
+                by_type[program_type].append(program)
+            for diagnosis in program.get('diagnosis_accepted', []):
+                by_diagnosis[diagnosis.lower()].append(program)
+
+        self._by_county = {key: tuple(value) for key, value in by_county.items()}
+        self._by_type = {key: tuple(value) for key, value in by_type.items()}
+        self._by_diagnosis = {key: tuple(value) for key, value in by_diagnosis.items()}
+
+        # Programs that score each criterion at all
+        self.diagnosis_scored = self._bits(lambda record: bool(record.diagnoses))
+        self.location_scored = self._bits(lambda record: bool(record.counties or record.location))
+        self.interest_scored = self._bits(lambda record: bool(record.program_types))
+        self.support_scored = self._bits(lambda record: record.has_support_requirements)
+        self._match_cache = {}
+
+        self._build_age_index()
+
+    def __len__(self):
+        return len(self.programs)
+
+    def __iter__(self):
+        return iter(self.programs)
+
+    def get_by_name(self, name):
+        """Program with this name (any case/spacing), or None"""
+        return self._by_name.get(normalize_name(name))
+
+    def programs_for_county(self, county):
+        """Programs whose counties_served lists this county"""
+        return list(self._by_county.get(county, ()))
+
+    def programs_for_type(self, program_type):
+        """Programs tagged with this program type"""
+        return list(self._by_type.get(program_type, ()))
+
+    def programs_for_diagnosis(self, diagnosis):
+        """Programs that accept this diagnosis (case-insensitive)"""
+        return list(self._by_diagnosis.get(diagnosis.lower(), ()))
+
+    def _build_age_index(self):
+        """
+        Precompute the answer for every elementary age interval.
+
+        Sorted distinct range endpoints split the age line into points
+        (an endpoint itself) and the open gaps between them; every age
+        inside one of those pieces matches the same programs. Slot 2i+1
+        holds the programs at endpoint i and slot 2i the gap before it,
+        so a query is one bisect plus returning a precomputed tuple.
+        Open-ended ranges (min_age/max_age None) extend to -inf/+inf.
+        """
+        ranges = []
+        for program in self.programs:
+            age_range = program.get('age_range', {})
+            min_age = age_range.get('min_age')
+            max_age = age_range.get('max_age')
+            ranges.append((float('-inf') if min_age is None else min_age,
+                           float('inf') if max_age is None else max_age))
+
+        bounds = sorted({bound for age_range in ranges for bound in age_range
+                         if bound not in (float('-inf'), float('inf'))})
+        # A representative age for each slot: gap midpoints and endpoints
+        samples = []
+        previous = float('-inf')
+        for bound in bounds:
+            samples.append((previous + bound) / 2 if previous != float('-inf') else bound - 1)
+            samples.append(bound)
+            previous = bound
+        samples.append(previous + 1 if bounds else 0)
+
+        self._age_bounds = bounds
+        self._age_slots = [
+            tuple(position for position, (low, high) in enumerate(ranges) if low <= age <= high)
+            for age in samples
+        ]
+
+    def age_slot(self, age):
+        """
+        Index of the elementary age interval containing `age` (None for
+        no age). Ages in the same slot match exactly the same programs.
+        """
+        if age is None:
+            return None
+        i = bisect.bisect_left(self._age_bounds, age)
+        if i < len(self._age_bounds) and self._age_bounds[i] == age:
+            return 2 * i + 1
+        return 2 * i
+
+    def positions_for_age(self, age):
+        """
+        Catalog positions of programs whose age range includes `age`, in
+        order (O(log n + k)); every position when age is None
+        """
+        slot = self.age_slot(age)
+        if slot is None:
+            return range(len(self.programs))
+        return self._age_slots[slot]
+
+    def programs_for_age(self, age):
+        """Programs whose age range includes `age`, in catalog order"""
+        return [self.programs[position] for position in self.positions_for_age(age)]
+
+    def _bits(self, predicate):
+        bits = 0
+        for position, record in enumerate(self.records):
+            if predicate(record):
+                bits |= 1 << position
+        return bits
+
+    def _cached_bits(self, kind, value, predicate):
+        key = (kind, value)
+        bits = self._match_cache.get(key)
+        if bits is None:
+            if len(self._match_cache) >= MATCH_CACHE_SIZE:
+                self._match_cache.clear()
+            bits = self._match_cache[key] = self._bits(predicate)
+        return bits
+
+    def diagnosis_matches(self, diagnosis):
+        """Bitset of programs accepting this (lowercased) diagnosis, by substring either way"""
+        return self._cached_bits('diagnosis', diagnosis, lambda record: record.accepts_diagnosis(diagnosis))
+
+    def location_matches(self, location):
+        """Bitset of programs serving this (lowercased) location, by county then location field"""
+        return self._cached_bits('location', location, lambda record: record.serves_location(location))
+
+    def interest_matches(self, interests):
+        """Bitset of programs whose types match any of these (lowercased) interests"""
+        return self._cached_bits('interests', interests, lambda record: record.matches_interests(interests))
+
+    def support_compatible(self, needs_mask):
+        """Bitset of programs requiring none of the needs in `needs_mask`"""
+        return self._cached_bits('support', needs_mask, lambda record: not needs_mask & record.support_mask)
@@ -0,0 +1,234 @@
+"""
+Offline BM25 retrieval over the program catalog and FAQ files.
+
+Instead of putting every program into every prompt, ScreeningAgent can
+ask this retriever for the few programs relevant to the current message
+and collected profile. Everything runs in-process: documents are
+tokenized once when the index is built and queries are scored with
+BM25, with no external vector store or embedding calls.
+
+FAQ entries (AbilityPath_FAQ.jsonl, abilitypath_programs_faq.jsonl) are
+attached to the program whose name they mention most strongly, so their
+wording improves recall for that program. FAQs that don't belong to any
+single program are kept as general entries and can be retrieved on
+their own.
+"""
+
+import json
+import math
+import os
+import re
+from collections import Counter
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_FAQ_PATHS = [
+    os.path.join(BASE_DIR, 'abilitypath_programs_faq.jsonl'),
+    os.path.join(BASE_DIR, 'AbilityPath_FAQ.jsonl'),
+]
+
+STOPWORDS = {
+    'a', 'about', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'can', 'do',
+    'does', 'for', 'from', 'has', 'have', 'he', 'her', 'his', 'how', 'i',
+    'if', 'in', 'is', 'it', 'me', 'my', 'of', 'on', 'or', 'our', 'she',
+    'so', 'that', 'the', 'their', 'them', 'there', 'they', 'this', 'to',
+    'was', 'we', 'what', 'when', 'where', 'which', 'who', 'will', 'with',
+    'would', 'you', 'your', 'tell', 'program', 'programs',
+}
+
+# Everyday words mapped to the catalog's vocabulary (applied to queries)
+SYNONYMS = {
+    'friend': ['social', 'friendship'],
+    'job': ['employment'],
+    'work': ['employment'],
+    'art': ['creative', 'arts'],
+    'rehab': ['rehabilitation', 'therapeutic'],
+    'teen': ['youth'],
+    'kid': ['youth'],
+    'child': ['youth'],
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """Lowercase word tokens with stopwords removed and plurals folded"""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def load_faqs(paths):
+    """
+    Load FAQ entries from JSONL files. Both file shapes in this folder are
+    supported: {"question", "answer"} and {"id", "questions", "answer"}.
+    Blank and malformed lines are skipped.
+    """
+    faqs = []
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                questions = entry.get('questions') or [entry.get('question', '')]
+                faqs.append({
+                    'questions': [q for q in questions if q],
+                    'answer': entry.get('answer', ''),
+                })
+    return faqs
+
+
+class BM25Index:
+    """Okapi BM25 over pre-tokenized documents"""
+
+    def __init__(self, documents, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_freqs = [Counter(doc) for doc in documents]
+        self.doc_lengths = [len(doc) for doc in documents]
+        self.avg_length = (sum(self.doc_lengths) / len(documents)) if documents else 0.0
+
+        doc_freq = Counter()
+        for tf in self.term_freqs:
+            doc_freq.update(tf.keys())
+        n = len(documents)
+        self.idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for term, df in doc_freq.items()
+        }
+
+    def scores(self, query_tokens):
+        """BM25 score of every document for the query"""
+        scores = [0.0] * len(self.term_freqs)
+        query_terms = [t for t in set(query_tokens) if t in self.idf]
+        if not query_terms:
+            return scores
+
+        for i, tf in enumerate(self.term_freqs):
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[i] / (self.avg_length or 1))
+            score = 0.0
+            for term in query_terms:
+                freq = tf.get(term)
+                if freq:
+                    score += self.idf[term] * freq * (self.k1 + 1) / (freq + norm)
+            scores[i] = score
+        return scores
+
+
+def _program_text(program):
+    """All searchable text for a program"""
+    parts = [
+        program.get('name', ''),
+        program.get('name', ''),  # names carry the most signal; count twice
+        program.get('description', ''),
+        program.get('location', ''),
+        ' '.join(program.get('counties_served', [])),
+        ' '.join(program.get('diagnosis_accepted', [])),
+        ' '.join(program.get('program_type', [])),
+        program.get('physical_location', ''),
+        program.get('schedule', ''),
+    ]
+    return ' '.join(parts)
+
+
+def _age_allowed(program, age):
+    age_range = program.get('age_range', {})
+    min_age = age_range.get('min_age')
+    max_age = age_range.get('max_age')
+    if min_age is not None and age < min_age:
+        return False
+    if max_age is not None and age > max_age:
+        return False
+    return True
+
+
+class ProgramRetriever:
+    """
+    Rank programs (and general FAQ entries) for a user message.
+
+    Build once per catalog version and share across sessions; retrieve()
+    only reads the index.
+    """
+
+    # Minimum name-match score for an FAQ to be attached to a program
+    FAQ_ATTACH_THRESHOLD = 2.0
+
+    def __init__(self, programs, faq_paths=None, k=4):
+        self.programs = programs
+        self.k = k
+
+        faqs = load_faqs(DEFAULT_FAQ_PATHS if faq_paths is None else faq_paths)
+
+        # Attach FAQs to the program whose name they match best
+        name_index = BM25Index([tokenize(p.get('name', '')) for p in programs])
+        program_docs = [tokenize(_program_text(p)) for p in programs]
+        self.general_faqs = []
+        for faq in faqs:
+            text = ' '.join(faq['questions'])
+            scores = name_index.scores(tokenize(text))
+            best = max(range(len(scores)), key=scores.__getitem__) if scores else None
+            if best is not None and scores[best] >= self.FAQ_ATTACH_THRESHOLD:
+                program_docs[best].extend(tokenize(text + ' ' + faq['answer']))
+            else:
+                self.general_faqs.append(faq)
+
+        self.program_index = BM25Index(program_docs)
+        self.faq_index = BM25Index([
+            tokenize(' '.join(faq['questions']) + ' ' + faq['answer'])
+            for faq in self.general_faqs
+        ])
+
+    def build_query(self, user_message, profile=None):
+        """Tokens for the message plus whatever profile details are known"""
+        tokens = tokenize(user_message)
+        for token in list(tokens):
+            tokens.extend(SYNONYMS.get(token, []))
+        if profile:
+            extra = [profile.get('diagnosis') or '', profile.get('location') or '']
+            extra.extend(profile.get('interests') or [])
+            tokens.extend(tokenize(' '.join(extra)))
+        return tokens
+
+    def retrieve(self, user_message, profile=None, k=None):
+        """
+        Return up to k (catalog_index, program, score) tuples, best first.
+        Programs outside a known age are excluded; programs with no
+        matching terms are never returned.
+        """
+        k = self.k if k is None else k
+        scores = self.program_index.scores(self.build_query(user_message, profile))
+        age = (profile or {}).get('age')
+
+        ranked = []
+        for i, score in enumerate(scores):
+            if score <= 0:
+                continue
+            if age is not None and not _age_allowed(self.programs[i], age):
+                continue
+            ranked.append((score, i))
+
+        # Stable: equal scores keep catalog order
+        ranked.sort(key=lambda item: (-item[0], item[1]))
+        return [(i, self.programs[i], score) for score, i in ranked[:k]]
+
+    def retrieve_faqs(self, user_message, k=2, min_score=1.0):
+        """Return up to k general FAQ entries relevant to the message"""
+        scores = self.faq_index.scores(tokenize(user_message))
+        ranked = sorted(
+            (i for i, score in enumerate(scores) if score >= min_score),
+            key=lambda i: -scores[i]
+        )
+        return [self.general_faqs[i] for i in ranked[:k]]
@@ -0,0 +1,86 @@
+"""
+Process-wide caches for values built from the program catalog.
+
+The system prompts, the retrieval index and the program-question
+answerer only need to be created once per catalog and can be shared by
+every session. Each VersionedCache holds one such value, keyed by a
+content hash of the catalog (the same hash is a ProgramCatalog's
+version), and rebuilds only when that hash changes, e.g. after
+catalog_store swaps in a reloaded catalog.
+"""
+
+import hashlib
+import json
+import threading
+
+
+def catalog_fingerprint(programs):
+    """Return a stable content hash for a list of program dictionaries."""
+    payload = json.dumps(programs, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class VersionedCache:
+    """
+    Build a value from the program catalog once and reuse it.
+
+    `builder` is called as builder(programs) and its result is cached
+    against the catalog fingerprint. When the same list object is passed
+    again the fingerprint is not recomputed; call invalidate() after
+    editing the catalog in place. Pass `fingerprint` (the catalog
+    version) when it is known, to skip hashing every program field.
+    """
+
+    def __init__(self, builder):
+        self._builder = builder
+        self._lock = threading.Lock()
+        self._programs_ref = None
+        self._programs_len = None
+        self._fingerprint = None
+        self._value = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, programs, fingerprint=None):
+        """Return the cached value for `programs`, building it if needed"""
+        with self._lock:
+            if (self._value is not None
+                    and programs is self._programs_ref
+                    and len(programs) == self._programs_len):
+                self.hits += 1
+                return self._value
+
+            fingerprint = fingerprint or catalog_fingerprint(programs)
+            if self._value is None or fingerprint != self._fingerprint:
+                self._value = self._builder(programs)
+                self._fingerprint = fingerprint
+                self.misses += 1
+            else:
+                self.hits += 1
+
+            self._programs_ref = programs
+            self._programs_len = len(programs)
+            return self._value
+
+    @property
+    def fingerprint(self):
+        """Content hash of the catalog the cached value was built from"""
+        return self._fingerprint
+
+    def invalidate(self):
+        """Drop the cached value so the next get() rebuilds it"""
+        with self._lock:
+            self._programs_ref = None
+            self._programs_len = None
+            self._fingerprint = None
+            self._value = None
+
+    def stats(self):
+        """Return hit/miss counters for monitoring"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+            'fingerprint': self._fingerprint,
+        }
@@ -0,0 +1,134 @@
+"""
+Cache of program recommendations keyed by normalized profile.
+
+Many users end up with the same profile as far as matching can tell:
+an adult with a developmental disability in San Mateo who wants
+employment. ScreeningAgent._get_recommendations used to re-run matching
+and formatting for each of them. Now the scored top matches and the
+rendered text are cached under a canonical key:
+- catalog version (content hash), so a reloaded catalog never serves
+  stale results; entries for an older version are dropped on sight
+- the catalog's age slot instead of the raw age (all ages in one slot
+  match the same programs)
+- lowercased diagnosis and location, the sorted set of interests
+- the support-needs bitmask, plus whether any need was given
+
+Configure with RECOMMENDATION_CACHE_SIZE (default 1024 entries) and
+RECOMMENDATION_CACHE_TTL in seconds (default 0 = no expiry).
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from program_catalog import support_needs_mask
+
+
+def recommendation_key(user_profile, catalog):
+    """Hashable key; equal keys get identical recommendations"""
+    support_needs = user_profile.get('support_needs', {})
+    return (
+        catalog.version,
+        catalog.age_slot(user_profile.get('age')),
+        (user_profile.get('diagnosis') or '').lower(),
+        (user_profile.get('location') or '').lower(),
+        tuple(sorted({interest.lower() for interest in user_profile.get('interests', [])})),
+        bool(support_needs),
+        support_needs_mask(support_needs),
+    )
+
+
+class RecommendationCache:
+    """
+    LRU cache with optional TTL for (recommendations, total, text)
+    values. All methods are thread-safe.
+    """
+
+    def __init__(self, max_entries=1024, ttl=0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> (value, stored_at); most recently used last
+        self._entries = OrderedDict()
+        self._version = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_env(cls):
+        """Cache sized from RECOMMENDATION_CACHE_SIZE / RECOMMENDATION_CACHE_TTL"""
+        return cls(
+            max_entries=int(os.getenv('RECOMMENDATION_CACHE_SIZE', '1024')),
+            ttl=float(os.getenv('RECOMMENDATION_CACHE_TTL', '0')),
+        )
+
+    def _check_version(self, version):
+        # A new catalog version makes every cached entry stale
+        if version != self._version:
+            if self._entries:
+                self._entries.clear()
+                self.invalidations += 1
+            self._version = version
+
+    def get(self, key):
+        """Cached value for `key`, or None"""
+        with self._lock:
+            self._check_version(key[0])
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl and self._clock() - entry[1] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        with self._lock:
+            self._check_version(key[0])
+            self._entries[key] = (value, self._clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self):
+        """Hit rate, size and approximate bytes held"""
+        with self._lock:
+            values = [value for value, _ in self._entries.values()]
+            total = self.hits + self.misses
+            stats = {
+                'entries': len(values),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'catalog_version': self._version,
+            }
+        # Program dicts are shared with the catalog; count what the cache owns
+        stats['bytes_held'] = sum(
+            sys.getsizeof(text) + sys.getsizeof(recommendations)
+            + sum(sys.getsizeof(rec) for rec in recommendations)
+            for recommendations, _total, text in values
+        )
+        return stats
@@ -8,71 +8,100 @@ Supports all AbilityPath requirements:
 5. Escalate to staff when needed
 """
 
-from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.memory import ConversationBufferMemory
 from langchain.chains import LLMChain
 from programs_database import (
-    filter_programs_by_criteria, 
+    top_program_matches,
     format_program_recommendations,
-    get_program_by_name,
-    PROGRAMS
+    get_catalog,
 )
+from prompt_cache import VersionedCache
+from conversation_memory import SlidingWindowMemory
+from program_retriever import ProgramRetriever
+from program_answers import ProgramQuestionAnswerer
+from info_extractor import extract as extract_criteria, has_enroll_intent
+from recommendation_cache import RecommendationCache, recommendation_key
+from fake_llm import use_fake_llm, fake_llm_from_env
+from llm_client import get_llm_factory
+from session_state import SessionState, new_collected_info
+from turn_metrics import TurnTrace, TokenUsageHandler, get_stage_metrics
+from agent_log import get_logger
+import copy
 import json
-import re
+import sys
+import threading
+from collections import Counter
 
 
-class ScreeningAgent:
-    """
-    AI Agent that handles 3 main user flows:
-    1. Learn about programs (informational)
-    2. Enroll in programs (screening + matching)
-    3. Ask questions (Q&A with escalation)
-    """
+def format_program_context(program, number):
+    """Format one program as a numbered entry for the system prompt"""
+    # Format age range
+    age_range = program.get('age_range', {})
+    min_age = age_range.get('min_age')
+    max_age = age_range.get('max_age')
+    
+    if min_age and max_age:
+        age_str = f"{min_age}-{max_age} years old"
+    elif min_age:
+        age_str = f"{min_age}+ years old"
+    else:
+        age_str = "All ages"
     
-    def __init__(self, openai_api_key):
-        """Initialize the screening agent with OpenAI"""
+    # Get other details
+    diagnosis = ', '.join(program.get('diagnosis_accepted', ['Not specified']))
+    counties = ', '.join(program.get('counties_served', ['Not specified']))
+    program_types = ', '.join(program.get('program_type', ['General']))
+    
+    return f"""
+PROGRAM #{number}: {program['name']}
+Description: {program.get('description', 'N/A')}
+Ages: {age_str}
+Diagnosis Accepted: {diagnosis}
+Program Type: {program_types}
+Location: {program.get('location', 'N/A')}
+Counties Served: {counties}
+Physical Location: {program.get('physical_location', 'Various locations')}
+Schedule: {program.get('schedule', 'Contact for details')}
+How to Enroll: {program.get('enrollment_process', 'Contact AbilityPath')}
+---"""
+
+
+def build_programs_context(programs):
+    """Build comprehensive context of all programs for AI"""
+    return '\n'.join(
+        format_program_context(program, i) for i, program in enumerate(programs, 1)
+    )
+
+
+def build_programs_directory(programs):
+    """One short line per program, so the model always knows what exists"""
+    lines = []
+    for i, program in enumerate(programs, 1):
+        age_range = program.get('age_range', {})
+        min_age = age_range.get('min_age')
+        max_age = age_range.get('max_age')
+        if min_age and max_age:
+            age_str = f"ages {min_age}-{max_age}"
+        elif min_age:
+            age_str = f"ages {min_age}+"
+        else:
+            age_str = "all ages"
         
-        # Initialize the LLM
-        self.llm = ChatOpenAI(
-            model="gpt-3.5-turbo",
-            temperature=0.7,
-            openai_api_key=openai_api_key
+        lines.append(
+            f"{i}. {program['name']} ({', '.join(program.get('program_type', ['General']))}; "
+            f"{age_str}; {', '.join(program.get('counties_served', ['Not specified']))})"
         )
-        
-        # Conversation memory
-        self.memory = ConversationBufferMemory(
-            memory_key="chat_history",
-            return_messages=True
-        )
-        
-        # User intent: 'learn', 'enroll', 'question', or None
-        self.user_intent = None
-        
-        # Information collected during enrollment screening
-        self.collected_info = {
-            "age": None,
-            "diagnosis": None,
-            "location": None,
-            "interests": [],
-            "support_needs": {}
-        }
-        
-        # Track if recommendations provided
-        self.recommendations_given = False
-        
-    def create_system_prompt(self):
-        """Create dynamic system prompt with all program information"""
-        
-        # Build comprehensive program context
-        programs_context = self._build_programs_context()
-        
-        return ChatPromptTemplate.from_messages([
-            ("system", f"""You are a warm, helpful intake specialist for AbilityPath, 
+    return '\n'.join(lines)
+
+
+def _system_prompt_text(programs_section):
+    """System instructions wrapped around the program information section"""
+    return f"""You are a warm, helpful intake specialist for AbilityPath, 
 a Bay Area nonprofit serving individuals with developmental disabilities.
 
 === AVAILABLE PROGRAMS ===
-{programs_context}
+{programs_section}
 
 === YOUR RESPONSIBILITIES ===
 
@@ -129,143 +158,336 @@ Specific programs:
 - Social Recreation: socialrec@abilitypath.org
 - REACH (TBI/Stroke): braininjuryservices@abilitypath.org
 
-Keep responses clear and helpful."""),
-            MessagesPlaceholder(variable_name="chat_history"),
-            ("human", "{input}")
-        ])
+Keep responses clear and helpful."""
+
+
+def _chat_prompt(system_text):
+    return ChatPromptTemplate.from_messages([
+        ("system", system_text),
+        MessagesPlaceholder(variable_name="chat_history"),
+        ("human", "{input}")
+    ])
+
+
+def build_system_prompt(programs):
+    """Create the system prompt template with all program information"""
     
-    def _build_programs_context(self):
-        """Build comprehensive context of all programs for AI"""
-        context_parts = []
+    # Build comprehensive program context
+    programs_context = build_programs_context(programs)
+    
+    return _chat_prompt(_system_prompt_text(programs_context))
+
+
+def build_retrieval_system_prompt(programs):
+    """
+    Create the system prompt template for retrieval mode. It lists every
+    program in one line and leaves a {programs_context} slot that is
+    filled each turn with the full details of the relevant programs.
+    """
+    directory = build_programs_directory(programs).replace('{', '{{').replace('}', '}}')
+    
+    programs_section = f"""Program directory (summary):
+{directory}
+
+Full details for the programs most relevant to the current message:
+{{programs_context}}"""
+    
+    return _chat_prompt(_system_prompt_text(programs_section))
+
+
+NO_RECOMMENDATIONS_TEXT = """I couldn't find programs that match all your criteria. This might be because:
+- Your location is outside our current service areas
+- The age doesn't match our program offerings
+- We need more information to find the right fit
+
+Please contact our team directly for personalized assistance:
+Phone: 650-259-8500
+Email: info@abilitypath.org
+
+Our staff can discuss specialized options and accommodations."""
+
+log = get_logger('agent')
+
+# Shared by every ScreeningAgent in the process
+_PROMPT_CACHE = VersionedCache(build_system_prompt)
+_RETRIEVAL_PROMPT_CACHE = VersionedCache(build_retrieval_system_prompt)
+_RETRIEVER_CACHE = VersionedCache(ProgramRetriever)
+_ANSWERER_CACHE = VersionedCache(ProgramQuestionAnswerer)
+_RECOMMENDATION_CACHE = RecommendationCache.from_env()
+
+# Turns handled, and how many were answered without a model call
+_TURN_STATS = Counter()
+_TURN_STATS_LOCK = threading.Lock()
+
+
+def _count_turn(kind):
+    with _TURN_STATS_LOCK:
+        _TURN_STATS[kind] += 1
+
+
+def get_turn_stats():
+    """Share of turns served without calling the LLM, by reason"""
+    with _TURN_STATS_LOCK:
+        stats = dict(_TURN_STATS)
+    turns = stats.pop('turns', 0)
+    without_llm = sum(stats.values())
+    return {
+        'turns': turns,
+        'without_llm': without_llm,
+        'without_llm_share': round(without_llm / turns, 4) if turns else 0.0,
+        'by_reason': stats,
+    }
+
+
+def get_catalog_cache_stats():
+    """Hit/miss counters for each shared per-catalog cache"""
+    return {
+        'prompt': _PROMPT_CACHE.stats(),
+        'retrieval_prompt': _RETRIEVAL_PROMPT_CACHE.stats(),
+        'retriever': _RETRIEVER_CACHE.stats(),
+        'answerer': _ANSWERER_CACHE.stats(),
+    }
+
+
+def get_recommendation_cache_stats():
+    """Hit rate and memory of the shared recommendation cache"""
+    return _RECOMMENDATION_CACHE.stats()
+
+
+def get_stage_timings():
+    """Recent per-stage latency percentiles and LLM token counts"""
+    return get_stage_metrics().snapshot()
+
+
+def build_retrieved_context(programs, user_message, profile=None, k=4, fingerprint=None):
+    """
+    Full details of the top-k programs (and any general FAQ answers)
+    relevant to this message and profile, for retrieval mode
+    """
+    retriever = _RETRIEVER_CACHE.get(programs, fingerprint)
+    
+    parts = [
+        format_program_context(program, index + 1)
+        for index, program, _score in retriever.retrieve(user_message, profile, k=k)
+    ]
+    
+    faqs = retriever.retrieve_faqs(user_message)
+    if faqs:
+        parts.append("\nRelated FAQ:")
+        for faq in faqs:
+            parts.append(f"Q: {faq['questions'][0]}\nA: {faq['answer']}")
+    
+    if not parts:
+        return "(No specific program matched this message. Use the directory above, or ask a clarifying question.)"
+    
+    return '\n'.join(parts)
+
+
+class ScreeningAgent:
+    """
+    AI Agent that handles 3 main user flows:
+    1. Learn about programs (informational)
+    2. Enroll in programs (screening + matching)
+    3. Ask questions (Q&A with escalation)
+    """
+    
+    def __init__(self, openai_api_key, memory_mode="buffer", memory_token_budget=1200,
+                 program_context="full", retrieval_k=4):
+        """
+        Initialize the screening agent with OpenAI
+        
+        Args:
+            openai_api_key: OpenAI API key
+            memory_mode: 'buffer' keeps the full chat history; 'window' keeps
+                recent turns within `memory_token_budget` tokens and folds
+                older turns into a running summary
+            memory_token_budget: Token budget for verbatim history in 'window' mode
+            program_context: 'full' puts every program in the system prompt;
+                'retrieval' sends a one-line directory plus full details for
+                only the `retrieval_k` programs relevant to each message
+            retrieval_k: Number of programs to include per turn in 'retrieval' mode
+        """
         
-        for i, program in enumerate(PROGRAMS, 1):
-            # Format age range
-            age_range = program.get('age_range', {})
-            min_age = age_range.get('min_age')
-            max_age = age_range.get('max_age')
-            
-            if min_age and max_age:
-                age_str = f"{min_age}-{max_age} years old"
-            elif min_age:
-                age_str = f"{min_age}+ years old"
-            else:
-                age_str = "All ages"
-            
-            # Get other details
-            diagnosis = ', '.join(program.get('diagnosis_accepted', ['Not specified']))
-            counties = ', '.join(program.get('counties_served', ['Not specified']))
-            program_types = ', '.join(program.get('program_type', ['General']))
-            
-            # Build program entry
-            context_parts.append(f"""
-PROGRAM #{i}: {program['name']}
-Description: {program.get('description', 'N/A')}
-Ages: {age_str}
-Diagnosis Accepted: {diagnosis}
-Program Type: {program_types}
-Location: {program.get('location', 'N/A')}
-Counties Served: {counties}
-Physical Location: {program.get('physical_location', 'Various locations')}
-Schedule: {program.get('schedule', 'Contact for details')}
-How to Enroll: {program.get('enrollment_process', 'Contact AbilityPath')}
----""")
+        if program_context not in ("full", "retrieval"):
+            raise ValueError(f"Unknown program_context: {program_context!r} (expected 'full' or 'retrieval')")
+        self.program_context = program_context
+        self.retrieval_k = retrieval_k
         
-        return '\n'.join(context_parts)
+        # Initialize the LLM (USE_FAKE_LLM=1 swaps in an offline fake for load tests)
+        if use_fake_llm():
+            self.llm = fake_llm_from_env()
+        else:
+            # Shared across sessions: one keep-alive connection pool per process
+            self.llm = get_llm_factory().get_llm(openai_api_key)
+        
+        # Conversation memory
+        self.memory_mode = memory_mode
+        self.memory_token_budget = memory_token_budget
+        self.memory = self._create_memory()
+        
+        # User intent: 'learn', 'enroll', 'question', or None
+        self.user_intent = None
+        
+        # Information collected during enrollment screening
+        self.collected_info = new_collected_info()
+        
+        # Track if recommendations provided
+        self.recommendations_given = False
+        
+        # Names of the programs in the last recommendation block
+        self.recommended_programs = []
+        
+        # Conversation chain, built on first use and reused every turn
+        self._conversation = None
+        self._conversation_prompt = None
+        
+        # Timing spans of the current (or last) turn
+        self._trace = TurnTrace(get_stage_metrics())
+        
+    def _create_memory(self):
+        """Create conversation memory for the configured memory mode"""
+        if self.memory_mode == "window":
+            # collected_info is sent as structured state, never summarized away
+            return SlidingWindowMemory(
+                memory_key="chat_history",
+                input_key="input",
+                return_messages=True,
+                max_token_limit=self.memory_token_budget,
+                profile_provider=lambda: self.collected_info
+            )
+        if self.memory_mode != "buffer":
+            raise ValueError(f"Unknown memory_mode: {self.memory_mode!r} (expected 'buffer' or 'window')")
+        
+        return ConversationBufferMemory(
+            memory_key="chat_history",
+            input_key="input",
+            return_messages=True
+        )
+    
+    def create_system_prompt(self):
+        """Return the shared system prompt (built once per catalog version)"""
+        catalog = get_catalog()
+        if self.program_context == "retrieval":
+            return _RETRIEVAL_PROMPT_CACHE.get(catalog.programs, catalog.version)
+        return _PROMPT_CACHE.get(catalog.programs, catalog.version)
+    
+    def _prompt_inputs(self, user_message):
+        """Per-turn prompt variables besides the user's input"""
+        if self.program_context == "retrieval":
+            catalog = get_catalog()
+            return {
+                "programs_context": build_retrieved_context(
+                    catalog.programs, user_message, self.collected_info,
+                    k=self.retrieval_k, fingerprint=catalog.version
+                )
+            }
+        return {}
+    
+    def _get_conversation(self):
+        """
+        Return the session's LLMChain, building it on first use.
+        The chain is rebuilt only after a reset or when the catalog (and
+        therefore the shared prompt) has changed.
+        """
+        prompt = self.create_system_prompt()
+        
+        if self._conversation is None or self._conversation_prompt is not prompt:
+            self._conversation = LLMChain(
+                llm=self.llm,
+                prompt=prompt,
+                memory=self.memory,
+                verbose=False
+            )
+            self._conversation_prompt = prompt
+        
+        return self._conversation
+    
+    def estimated_size(self):
+        """Approximate bytes of per-session state (history, summary, profile)"""
+        size = sum(sys.getsizeof(message.content) for message in self.memory.chat_memory.messages)
+        size += sys.getsizeof(getattr(self.memory, 'moving_summary', ''))
+        size += sys.getsizeof(json.dumps(self.collected_info))
+        return size
+    
+    def get_state(self):
+        """Snapshot this session's state as a serializable SessionState"""
+        return SessionState(
+            user_intent=self.user_intent,
+            collected_info=copy.deepcopy(self.collected_info),
+            recommendations_given=self.recommendations_given,
+            recommended_programs=list(self.recommended_programs),
+            messages=[
+                {"role": message.type, "content": message.content}
+                for message in self.memory.chat_memory.messages
+            ],
+            summary=getattr(self.memory, 'moving_summary', '')
+        )
+    
+    def load_state(self, state):
+        """Replace this agent's session state with a SessionState"""
+        self.user_intent = state.user_intent
+        self.collected_info = copy.deepcopy(state.collected_info)
+        self.recommendations_given = state.recommendations_given
+        self.recommended_programs = list(state.recommended_programs)
+        
+        self.memory.clear()
+        for message in state.messages:
+            if message["role"] == "human":
+                self.memory.chat_memory.add_user_message(message["content"])
+            else:
+                self.memory.chat_memory.add_ai_message(message["content"])
+        if hasattr(self.memory, 'moving_summary'):
+            self.memory.moving_summary = state.summary
     
     def reset_conversation(self):
         """Reset for new conversation"""
         self.memory.clear()
         self.user_intent = None
-        self.collected_info = {
-            "age": None,
-            "diagnosis": None,
-            "location": None,
-            "interests": [],
-            "support_needs": {}
-        }
+        self.collected_info = new_collected_info()
         self.recommendations_given = False
+        self.recommended_programs = []
+        self._conversation = None
+        self._conversation_prompt = None
     
-    def _extract_information(self, user_message):
-        """Extract enrollment criteria from user message"""
-        message_lower = user_message.lower()
-        
-        # Extract AGE
-        age_patterns = [
-            r'(\d+)\s*years?\s*old',
-            r'age\s*(?:is\s*)?(\d+)',
-            r'(?:he|she|they|i)(?:\'s|\s+is|\s+am)\s*(\d+)',
-            r'\b(\d+)\s*(?:year|yr)',
-        ]
-        
-        for pattern in age_patterns:
-            match = re.search(pattern, message_lower)
-            if match:
-                age = int(match.group(1))
-                if 0 <= age <= 120:
-                    self.collected_info['age'] = age
-                    print(f"DEBUG: Extracted age: {age}")
-                    break
-        
-        # Extract DIAGNOSIS
-        diagnosis_map = {
-            'developmental disability': ['developmental disability', 'developmental delay', 'dd', 'developmentally disabled'],
-            'intellectual disability': ['intellectual disability', 'id', 'cognitive disability', 'mentally disabled'],
-            'autism': ['autism', 'autistic', 'asd', 'autism spectrum', 'on the spectrum'],
-            'down syndrome': ['down syndrome', 'downs syndrome', 'trisomy 21'],
-            'cerebral palsy': ['cerebral palsy', 'cp'],
-            'traumatic brain injury': ['traumatic brain injury', 'tbi', 'brain injury'],
-            'stroke': ['stroke', 'cva', 'cerebrovascular'],
-        }
+    def _start_turn(self):
+        """Begin a new trace; returns the span timing the whole turn"""
+        self._trace = TurnTrace(get_stage_metrics())
+        return self._trace.span('turn')
+    
+    def turn_timings(self):
+        """Spans of the current (or last) turn: stage, ms, and token counts for the LLM call"""
+        return self._trace.to_list()
+    
+    def _apply_extracted(self, found):
+        """Store the criteria found in one message"""
         
-        for diagnosis, keywords in diagnosis_map.items():
-            if any(keyword in message_lower for keyword in keywords):
-                self.collected_info['diagnosis'] = diagnosis
-                print(f"DEBUG: Extracted diagnosis: {diagnosis}")
-                break
-        
-        # Extract LOCATION
-        location_map = {
-            'san mateo': ['san mateo', 'burlingame', 'daly city', 'foster city', 'redwood city'],
-            'santa clara': ['santa clara', 'san jose', 'palo alto', 'mountain view', 'sunnyvale', 'cupertino'],
-            'san francisco': ['san francisco', 'sf'],
-        }
+        if found.age is not None:
+            self.collected_info['age'] = found.age
+            log.debug("extracted", age=found.age)
         
-        for location, keywords in location_map.items():
-            if any(keyword in message_lower for keyword in keywords):
-                self.collected_info['location'] = location
-                print(f"DEBUG: Extracted location: {location}")
-                break
-        
-        # Extract INTERESTS
-        interest_map = {
-            'employment': ['job', 'work', 'employment', 'career', 'vocational', 'working'],
-            'living skills': ['living skills', 'independent living', 'life skills', 'daily living', 'cooking', 'budgeting', 'independence'],
-            'social': ['social', 'friends', 'friendship', 'recreation', 'activities', 'fun', 'meet people'],
-            'day program': ['day program', 'day service', 'daytime', 'structured activities', 'during the day'],
-        }
+        if found.diagnosis is not None:
+            self.collected_info['diagnosis'] = found.diagnosis
+            log.debug("extracted", diagnosis=found.diagnosis)
         
-        for interest, keywords in interest_map.items():
-            if any(keyword in message_lower for keyword in keywords):
-                if interest not in self.collected_info['interests']:
-                    self.collected_info['interests'].append(interest)
-                    print(f"DEBUG: Extracted interest: {interest}")
+        if found.location is not None:
+            self.collected_info['location'] = found.location
+            log.debug("extracted", location=found.location)
         
-        # Extract SUPPORT NEEDS
-        if any(word in message_lower for word in ['toilet', 'bathroom']):
-            is_independent = any(word in message_lower for word in ['independent', 'doesn\'t need', 'don\'t need', 'can use'])
-            self.collected_info['support_needs']['toilet_trained'] = is_independent
+        for interest in found.interests:
+            if interest not in self.collected_info['interests']:
+                self.collected_info['interests'].append(interest)
+                log.debug("extracted", interest=interest)
         
-        if any(word in message_lower for word in ['eating', 'feeding']):
-            is_independent = any(word in message_lower for word in ['independent', 'doesn\'t need', 'don\'t need'])
-            self.collected_info['support_needs']['eating_independence'] = is_independent
+        self.collected_info['support_needs'].update(found.support_needs)
     
     def _check_if_ready_to_match(self):
         """Check if we have minimum info for matching"""
-        has_age = self.collected_info['age'] is not None
-        has_diagnosis = self.collected_info['diagnosis'] is not None
-        has_location = self.collected_info['location'] is not None
-        
-        print(f"DEBUG: Ready check - Age: {has_age}, Diagnosis: {has_diagnosis}, Location: {has_location}")
+        with self._trace.span('ready_check'):
+            has_age = self.collected_info['age'] is not None
+            has_diagnosis = self.collected_info['diagnosis'] is not None
+            has_location = self.collected_info['location'] is not None
+            
+            log.debug("ready check", age=has_age, diagnosis=has_diagnosis, location=has_location)
         
         return has_age and has_diagnosis and has_location
     
@@ -284,37 +506,59 @@ How to Enroll: {program.get('enrollment_process', 'Contact AbilityPath')}
             'support_needs': self.collected_info['support_needs']
         }
         
-        print(f"DEBUG: Matching with profile: {user_profile}")
+        log.debug("matching", profile=user_profile)
         
-        # Get matches
-        recommendations = filter_programs_by_criteria(user_profile)
+        # One snapshot for the whole lookup, even if a reload lands meanwhile
+        catalog = get_catalog()
         
-        print(f"DEBUG: Found {len(recommendations)} matches")
+        with self._trace.span('match'):
+            # Identical normalized profiles share matching and formatting
+            cache_key = recommendation_key(user_profile, catalog)
+            cached = _RECOMMENDATION_CACHE.get(cache_key)
+            if cached is None:
+                # Get the top matches (heap selection, no full sort)
+                recommendations, total_matches = top_program_matches(user_profile, k=5, catalog=catalog)
         
-        if recommendations:
-            # Format and return top 3-5 matches
-            return format_program_recommendations(recommendations, max_programs=5)
-        else:
-            return """I couldn't find programs that match all your criteria. This might be because:
-- Your location is outside our current service areas
-- The age doesn't match our program offerings
-- We need more information to find the right fit
-
-Please contact our team directly for personalized assistance:
-Phone: 650-259-8500
-Email: info@abilitypath.org
-
-Our staff can discuss specialized options and accommodations."""
+        if cached is not None:
+            recommendations, total_matches, text = cached
+            log.debug("matches found", total=total_matches, cached=True)
+            self.recommended_programs = [rec['program']['name'] for rec in recommendations]
+            return text
+        
+        log.debug("matches found", total=total_matches, cached=False)
+        
+        with self._trace.span('format'):
+            if recommendations:
+                # Format and return top 3-5 matches
+                text = format_program_recommendations(recommendations, max_programs=5, total_matches=total_matches)
+            else:
+                text = NO_RECOMMENDATIONS_TEXT
+        
+        _RECOMMENDATION_CACHE.put(cache_key, (recommendations, total_matches, text))
+        self.recommended_programs = [rec['program']['name'] for rec in recommendations]
+        return text
     
-    def _handle_specific_program_query(self, user_message):
+    def _handle_specific_program_query(self, user_message, allow_fast_path=True):
         """Check if user is asking about a specific program"""
         message_lower = user_message.lower()
         
-        for program in PROGRAMS:
+        catalog = get_catalog()
+        programs = catalog.programs
+        
+        # A specific question (schedule, location, ...) about one program
+        # is answered from the catalog fields directly
+        if allow_fast_path:
+            answer = _ANSWERER_CACHE.get(programs, catalog.version).answer(user_message)
+            if answer:
+                _count_turn('fast_path')
+                return answer
+        
+        for program in programs:
             program_name_lower = program['name'].lower()
             
             # Check if program name is mentioned
             if program_name_lower in message_lower:
+                _count_turn('program_details')
                 return self._format_program_details(program)
         
         return None
@@ -382,17 +626,41 @@ Would you like to enroll in this program, or do you have other questions?
 """
         return output
     
-    def chat(self, user_message):
+    def _handle_without_llm(self, user_message):
         """
-        Main chat method - handles all conversation logic
+        Run the deterministic part of a turn: specific program lookup,
+        intent detection, information extraction and keyword-triggered
+        recommendations. Returns a result dict if the turn is fully
+        answered here, otherwise None (the LLM should respond).
         """
         
-        print(f"\nDEBUG: User message: {user_message}")
-        print(f"DEBUG: Current intent: {self.user_intent}")
-        print(f"DEBUG: Collected info: {self.collected_info}")
+        _count_turn('turns')
+        
+        log.debug("turn", message=user_message, intent=self.user_intent, collected_info=self.collected_info)
         
-        # Check for specific program inquiry first
-        specific_program_info = self._handle_specific_program_query(user_message)
+        # Detect enrollment intent
+        with self._trace.span('intent'):
+            enroll_intent = has_enroll_intent(user_message)
+        if enroll_intent:
+            self.user_intent = 'enroll'
+            log.debug("intent", intent='enroll')
+        
+        # Extract information (kept only in enrollment mode) before any
+        # program lookup, so a screening answer is never lost
+        with self._trace.span('extract'):
+            found = extract_criteria(user_message)
+            if self.user_intent == 'enroll':
+                self._apply_extracted(found)
+        
+        # Check for a specific program inquiry. The question fast path is
+        # skipped while screening is under way (until recommendations are
+        # given) and when the message describes the person (location and
+        # interests don't count: program names contain cities and interest
+        # words)
+        screening = self.user_intent == 'enroll' and not self.recommendations_given
+        allow_fast_path = not screening and not found.describes_person()
+        with self._trace.span('program_lookup'):
+            specific_program_info = self._handle_specific_program_query(user_message, allow_fast_path)
         if specific_program_info:
             return {
                 "response": specific_program_info,
@@ -400,82 +668,207 @@ Would you like to enroll in this program, or do you have other questions?
                 "collected_info": self.collected_info
             }
         
-        # Detect enrollment intent
-        enroll_keywords = ['enroll', 'sign up', 'register', 'apply', 'ready to join', 'find a program', 'need help finding']
-        if any(keyword in user_message.lower() for keyword in enroll_keywords):
-            self.user_intent = 'enroll'
-            print("DEBUG: Set intent to 'enroll'")
-        
-        # Extract information if in enrollment mode
         if self.user_intent == 'enroll':
-            self._extract_information(user_message)
-            
             # Check if ready to provide recommendations
             if self._check_if_ready_to_match() and not self.recommendations_given:
                 # Look for trigger to show recommendations
                 trigger_keywords = ['recommend', 'find', 'match', 'show', 'what programs', 'help me']
                 
                 if any(keyword in user_message.lower() for keyword in trigger_keywords):
-                    print("DEBUG: Trigger detected - generating recommendations")
+                    log.debug("recommendations triggered", by='keyword')
                     recommendations = self._get_recommendations()
                     
                     if recommendations:
                         self.recommendations_given = True
+                        _count_turn('recommendations')
                         return {
                             "response": recommendations,
                             "recommendations_provided": True,
+                            "recommended_programs": self.recommended_programs,
                             "collected_info": self.collected_info
                         }
         
-        # Continue conversation with LLM
-        prompt = self.create_system_prompt()
+        return None
+    
+    def _handle_llm_response(self, response):
+        """Build the turn result from the LLM's reply"""
         
-        conversation = LLMChain(
-            llm=self.llm,
-            prompt=prompt,
-            memory=self.memory,
-            verbose=False
-        )
+        log.debug("llm response", response=response, length=len(response))
         
-        try:
-            response = conversation.predict(input=user_message)
-            
-            print(f"DEBUG: LLM response: {response[:100]}...")
+        # Check if AI says it's ready to find programs
+        if "let me find" in response.lower() and self._check_if_ready_to_match() and not self.recommendations_given:
+            log.debug("recommendations triggered", by='llm')
+            recommendations = self._get_recommendations()
             
-            # Check if AI says it's ready to find programs
-            if "let me find" in response.lower() and self._check_if_ready_to_match() and not self.recommendations_given:
-                print("DEBUG: AI triggered recommendations")
-                recommendations = self._get_recommendations()
+            if recommendations:
+                self.recommendations_given = True
+                # Combine AI's message with recommendations
+                combined = response + "\n\n" + recommendations
                 
-                if recommendations:
-                    self.recommendations_given = True
-                    # Combine AI's message with recommendations
-                    combined = response + "\n\n" + recommendations
-                    
-                    return {
-                        "response": combined,
-                        "recommendations_provided": True,
-                        "collected_info": self.collected_info
-                    }
-            
-            return {
-                "response": response,
-                "recommendations_provided": False,
-                "collected_info": self.collected_info
-            }
-            
-        except Exception as e:
-            print(f"ERROR in chat: {e}")
-            return {
-                "response": """I apologize, but I encountered a technical issue. 
+                return {
+                    "response": combined,
+                    "recommendations_provided": True,
+                    "recommended_programs": self.recommended_programs,
+                    "collected_info": self.collected_info
+                }
+        
+        return {
+            "response": response,
+            "recommendations_provided": False,
+            "collected_info": self.collected_info
+        }
+    
+    def _error_response(self, error):
+        """Fallback result when the LLM call fails"""
+        log.error("chat failed", exc_info=error, error=error)
+        return {
+            "response": """I apologize, but I encountered a technical issue. 
 Please contact our team directly for assistance:
 Phone: 650-259-8500
 Email: info@abilitypath.org
 
 Our staff will be happy to help you!""",
-                "error": str(e),
-                "recommendations_provided": False
-            }
+            "error": str(error),
+            "recommendations_provided": False
+        }
+    
+    def chat(self, user_message):
+        """
+        Main chat method - handles all conversation logic
+        """
+        
+        with self._start_turn():
+            result = self._handle_without_llm(user_message)
+            if result:
+                return result
+            
+            # Continue conversation with LLM
+            try:
+                with self._trace.span('prompt'):
+                    conversation = self._get_conversation()
+                    inputs = self._prompt_inputs(user_message)
+                with self._trace.span('llm') as span:
+                    response = conversation.predict(input=user_message, callbacks=[TokenUsageHandler(span)], **inputs)
+                return self._handle_llm_response(response)
+            
+            except Exception as e:
+                return self._error_response(e)
+    
+    async def achat(self, user_message):
+        """
+        Async version of chat(). The LLM call goes through the async
+        OpenAI client, so an event loop can serve many conversations
+        without blocking a thread per request.
+        """
+        
+        with self._start_turn():
+            result = self._handle_without_llm(user_message)
+            if result:
+                return result
+            
+            # Continue conversation with LLM
+            try:
+                with self._trace.span('prompt'):
+                    conversation = self._get_conversation()
+                    inputs = self._prompt_inputs(user_message)
+                with self._trace.span('llm') as span:
+                    response = await conversation.apredict(input=user_message, callbacks=[TokenUsageHandler(span)],
+                                                           **inputs)
+                return self._handle_llm_response(response)
+            
+            except Exception as e:
+                return self._error_response(e)
+    
+    def _deterministic_events(self, result):
+        """Stream events for a turn answered without the LLM"""
+        kind = "recommendations" if result.get("recommendations_provided") else "program_details"
+        return [(kind, result["response"]), ("done", self._done_payload(result))]
+    
+    def _done_payload(self, result):
+        return {
+            "recommendations_provided": result.get("recommendations_provided", False),
+            "recommended_programs": result.get("recommended_programs", []),
+            "collected_info": result.get("collected_info", self.collected_info)
+        }
+    
+    def _streamed_turn_events(self, inputs, response):
+        """Save a streamed reply to memory and emit the closing events"""
+        self.memory.save_context(inputs, {"text": response})
+        result = self._handle_llm_response(response)
+        
+        events = []
+        if result["recommendations_provided"]:
+            # The recommendation block is appended after the streamed reply
+            events.append(("recommendations", result["response"][len(response):].lstrip("\n")))
+        events.append(("done", self._done_payload(result)))
+        return events
+    
+    def chat_stream(self, user_message):
+        """
+        Streaming version of chat(). Yields (event, data) pairs:
+        'token' for each piece of the LLM reply, 'program_details' or
+        'recommendations' for the deterministic blocks, 'error' if the
+        LLM call fails, and a final 'done' with collected_info and
+        recommendations_provided.
+        """
+        
+        with self._start_turn():
+            result = self._handle_without_llm(user_message)
+            if result:
+                yield from self._deterministic_events(result)
+                return
+            
+            try:
+                with self._trace.span('prompt'):
+                    conversation = self._get_conversation()
+                    inputs = {"input": user_message, **self._prompt_inputs(user_message)}
+                    messages = conversation.prompt.format_messages(**conversation.prep_inputs(inputs))
+                
+                chunks = []
+                # The span includes time the consumer spends between tokens
+                with self._trace.span('llm') as span:
+                    config = {"callbacks": [TokenUsageHandler(span)]}
+                    for chunk in self.llm.stream(messages, config=config):
+                        chunks.append(chunk.content)
+                        yield ("token", chunk.content)
+                
+                yield from self._streamed_turn_events(inputs, "".join(chunks))
+            
+            except Exception as e:
+                result = self._error_response(e)
+                yield ("error", result["response"])
+                yield ("done", self._done_payload(result))
+    
+    async def achat_stream(self, user_message):
+        """Async version of chat_stream()"""
+        
+        with self._start_turn():
+            result = self._handle_without_llm(user_message)
+            if result:
+                for event in self._deterministic_events(result):
+                    yield event
+                return
+            
+            try:
+                with self._trace.span('prompt'):
+                    conversation = self._get_conversation()
+                    inputs = {"input": user_message, **self._prompt_inputs(user_message)}
+                    messages = conversation.prompt.format_messages(**conversation.prep_inputs(inputs))
+                
+                chunks = []
+                with self._trace.span('llm') as span:
+                    config = {"callbacks": [TokenUsageHandler(span)]}
+                    async for chunk in self.llm.astream(messages, config=config):
+                        chunks.append(chunk.content)
+                        yield ("token", chunk.content)
+                
+                for event in self._streamed_turn_events(inputs, "".join(chunks)):
+                    yield event
+            
+            except Exception as e:
+                result = self._error_response(e)
+                yield ("error", result["response"])
+                yield ("done", self._done_payload(result))
 
 
 # Test function
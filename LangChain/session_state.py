@@ -0,0 +1,210 @@
+"""
+Compact, serializable per-session state and pluggable stores for it.
+
+A ScreeningAgent holds heavy objects (LLM client, memory, chain), but a
+user's real state is small: intent, collected_info, whether
+recommendations were given, and the message history. SessionState holds
+just that and round-trips through JSON (or msgpack when ormsgpack is
+installed). Any worker process can then load a session, run a turn and
+save it back, so users are not pinned to one process's agent cache.
+
+Stores:
+- FileStateStore: one JSON file per session in a directory
+- SQLiteStateStore: one row per session in a local SQLite database
+
+Select one with SESSION_STATE_STORE, e.g. "sqlite:sessions.db" or
+"file:session_state". Unset means in-process state only. A shared store
+also needs SECRET_KEY: the session cookie must verify in every worker.
+"""
+
+import json
+import os
+import secrets
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+try:
+    import ormsgpack
+except ImportError:  # msgpack is optional; JSON always works
+    ormsgpack = None
+
+
+STATE_VERSION = 1
+
+
+def new_collected_info():
+    """Empty enrollment profile"""
+    return {
+        "age": None,
+        "diagnosis": None,
+        "location": None,
+        "interests": [],
+        "support_needs": {}
+    }
+
+
+@dataclass
+class SessionState:
+    """Everything needed to rebuild a ScreeningAgent for a session"""
+
+    user_intent: Optional[str] = None
+    collected_info: Dict[str, Any] = field(default_factory=new_collected_info)
+    recommendations_given: bool = False
+    # Names of the programs in the last recommendation block
+    recommended_programs: List[str] = field(default_factory=list)
+    # [{"role": "human" | "ai", "content": str}, ...]
+    messages: List[Dict[str, str]] = field(default_factory=list)
+    # Running summary of folded turns (window memory mode only)
+    summary: str = ""
+    version: int = STATE_VERSION
+
+    def to_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("version", STATE_VERSION) != STATE_VERSION:
+            raise ValueError(f"Unsupported session state version: {data.get('version')}")
+        known = {name: data[name] for name in cls.__dataclass_fields__ if name in data}
+        return cls(**known)
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), separators=(",", ":"), ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, text):
+        return cls.from_dict(json.loads(text))
+
+    def to_msgpack(self):
+        if ormsgpack is None:
+            raise RuntimeError("ormsgpack is not installed")
+        return ormsgpack.packb(self.to_dict())
+
+    @classmethod
+    def from_msgpack(cls, data):
+        if ormsgpack is None:
+            raise RuntimeError("ormsgpack is not installed")
+        return cls.from_dict(ormsgpack.unpackb(data))
+
+
+class StateStore:
+    """Interface for session state persistence"""
+
+    def load(self, session_id) -> Optional[SessionState]:
+        raise NotImplementedError
+
+    def save(self, session_id, state: SessionState):
+        raise NotImplementedError
+
+    def delete(self, session_id):
+        raise NotImplementedError
+
+
+class FileStateStore(StateStore):
+    """One JSON file per session, written atomically"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, session_id):
+        # Session ids are hex tokens; keep anything else out of the path
+        safe_id = ''.join(c for c in session_id if c.isalnum())
+        return os.path.join(self.directory, f"{safe_id}.json")
+
+    def load(self, session_id):
+        try:
+            with open(self._path(session_id), 'r', encoding='utf-8') as f:
+                return SessionState.from_json(f.read())
+        except FileNotFoundError:
+            return None
+
+    def save(self, session_id, state):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(state.to_json())
+        os.replace(tmp_path, self._path(session_id))
+
+    def delete(self, session_id):
+        try:
+            os.remove(self._path(session_id))
+        except FileNotFoundError:
+            pass
+
+
+class SQLiteStateStore(StateStore):
+    """
+    One row per session in SQLite. WAL mode lets several worker
+    processes read and write the same file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS session_state ("
+                " session_id TEXT PRIMARY KEY,"
+                " data TEXT NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+
+    def _connection(self):
+        # sqlite3 connections can't be shared across threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def load(self, session_id):
+        row = self._connection().execute(
+            "SELECT data FROM session_state WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return SessionState.from_json(row[0]) if row else None
+
+    def save(self, session_id, state):
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO session_state (session_id, data, updated_at) VALUES (?, ?, ?)",
+                (session_id, state.to_json(), time.time())
+            )
+
+    def delete(self, session_id):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM session_state WHERE session_id = ?", (session_id,))
+
+
+def session_secret_key():
+    """
+    Key for signing the session cookie: SECRET_KEY, shared by all workers.
+    Without a state store a random per-process key is enough; with one,
+    SECRET_KEY is required, or other workers would reject the cookie and
+    start a new session instead of loading the shared state.
+    """
+    key = os.getenv('SECRET_KEY', '').strip()
+    if key:
+        return key
+    if os.getenv('SESSION_STATE_STORE', '').strip():
+        raise ValueError("SESSION_STATE_STORE is set but SECRET_KEY is not; set the same SECRET_KEY "
+                         "for every worker (e.g. python -c 'import secrets; print(secrets.token_hex(32))')")
+    return secrets.token_hex(16)
+
+
+def state_store_from_env():
+    """StateStore configured by SESSION_STATE_STORE, or None"""
+    spec = os.getenv('SESSION_STATE_STORE', '').strip()
+    if not spec:
+        return None
+
+    kind, _, location = spec.partition(':')
+    if kind == 'sqlite':
+        return SQLiteStateStore(location or 'session_state.db')
+    if kind == 'file':
+        return FileStateStore(location or 'session_state')
+    raise ValueError(f"Unknown SESSION_STATE_STORE: {spec!r} (expected 'sqlite:<path>' or 'file:<dir>')")
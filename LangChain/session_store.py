@@ -0,0 +1,137 @@
+"""
+Bounded, evicting store for per-session agents.
+
+Replaces the module-level `agents = {}` dicts in the web apps, which
+grew by one ScreeningAgent per browser session forever. Sessions are
+kept in least-recently-used order and evicted when:
+- they have been idle longer than `idle_ttl` seconds, or
+- the store is full (`max_sessions`) and a new session arrives.
+
+Configure with SESSION_MAX (default 1000) and SESSION_IDLE_TTL in
+seconds (default 3600).
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+def estimate_size(value):
+    """
+    Approximate bytes held by a stored session. Values that know their
+    own footprint (ScreeningAgent.estimated_size) are asked directly.
+    """
+    if hasattr(value, 'estimated_size'):
+        return value.estimated_size()
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class SessionStore:
+    """
+    LRU + idle-TTL session store.
+
+    `factory(session_id)` creates the value for a new session. All
+    methods are thread-safe.
+    """
+
+    def __init__(self, factory, max_sessions=1000, idle_ttl=3600, clock=time.monotonic):
+        self._factory = factory
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        # session_id -> (value, last_access); most recently used last
+        self._sessions = OrderedDict()
+
+        self.created = 0
+        self.evicted_lru = 0
+        self.evicted_idle = 0
+
+    @classmethod
+    def from_env(cls, factory):
+        """Store sized from SESSION_MAX / SESSION_IDLE_TTL"""
+        return cls(
+            factory,
+            max_sessions=int(os.getenv('SESSION_MAX', '1000')),
+            idle_ttl=float(os.getenv('SESSION_IDLE_TTL', '3600')),
+        )
+
+    def _evict_idle(self, now):
+        # Entries are in access order, so expired ones are at the front
+        while self._sessions:
+            session_id, (_value, last_access) = next(iter(self._sessions.items()))
+            if now - last_access <= self.idle_ttl:
+                break
+            del self._sessions[session_id]
+            self.evicted_idle += 1
+
+    def get_or_create(self, session_id):
+        """Return the session's value, creating it (and evicting) if needed"""
+        with self._lock:
+            now = self._clock()
+            self._evict_idle(now)
+
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                self._sessions[session_id] = (entry[0], now)
+                self._sessions.move_to_end(session_id)
+                return entry[0]
+
+        # Build outside the lock; creating an agent is comparatively slow
+        value = self._factory(session_id)
+
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                # Another request created it meanwhile; keep that one
+                value = entry[0]
+            else:
+                self.created += 1
+                while len(self._sessions) >= self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self.evicted_lru += 1
+            self._sessions[session_id] = (value, self._clock())
+            self._sessions.move_to_end(session_id)
+            return value
+
+    def get(self, session_id):
+        """Return the session's value without creating it, or None"""
+        with self._lock:
+            self._evict_idle(self._clock())
+            entry = self._sessions.get(session_id)
+            return entry[0] if entry is not None else None
+
+    def remove(self, session_id):
+        """Drop a session; returns its value or None"""
+        with self._lock:
+            entry = self._sessions.pop(session_id, None)
+            return entry[0] if entry is not None else None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def __contains__(self, session_id):
+        with self._lock:
+            return session_id in self._sessions
+
+    def metrics(self):
+        """Live sessions, approximate bytes held and eviction counters"""
+        with self._lock:
+            self._evict_idle(self._clock())
+            values = [value for value, _ in self._sessions.values()]
+            stats = {
+                'live_sessions': len(values),
+                'max_sessions': self.max_sessions,
+                'idle_ttl_seconds': self.idle_ttl,
+                'created': self.created,
+                'evicted_lru': self.evicted_lru,
+                'evicted_idle': self.evicted_idle,
+            }
+        # Sizing walks each session's history, so do it outside the lock
+        stats['bytes_held'] = sum(estimate_size(value) for value in values)
+        return stats
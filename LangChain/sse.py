@@ -0,0 +1,17 @@
+"""
+Server-Sent Events helpers for the streaming chat endpoints.
+"""
+
+import json
+
+
+def format_sse(event, data):
+    """Encode one SSE message; data is JSON so newlines in text are safe"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+# Response headers that keep proxies from buffering the stream
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no',
+}
@@ -0,0 +1,244 @@
+"""
+Per-stage timing for ScreeningAgent turns.
+
+A slow turn used to leave nothing but DEBUG prints behind. Each turn
+now gets a TurnTrace: the agent wraps every stage in a span
+(specific-program lookup, intent detection, extraction, ready check,
+matching, formatting, prompt build and the LLM call), and the LLM span
+carries prompt and completion token counts. Finished spans go to the
+process-wide StageMetrics, which keeps for each stage:
+- cumulative count, sum and fixed latency buckets (a Prometheus
+  histogram, aggregatable across workers)
+- the most recent `window` durations, for p50/p95/p99 of recent turns
+
+and renders everything in the Prometheus text format for /api/metrics.
+Token counts come from the provider's usage report when there is one,
+and are estimated with conversation_memory.count_tokens otherwise
+(streamed replies, the fake LLM).
+
+Configure the recent window with TURN_METRICS_WINDOW (default 1024
+observations per stage).
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from conversation_memory import count_tokens
+
+
+# Upper bounds (seconds) of the histogram buckets; LLM calls land in
+# the upper half, the deterministic stages in the lower
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Stages in the order a turn runs them ('turn' is the whole turn)
+STAGES = ('program_lookup', 'intent', 'extract', 'ready_check', 'match',
+          'format', 'prompt', 'llm', 'turn')
+
+
+def quantile(values, q):
+    """Nearest-rank quantile of a sorted list"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class StageHistogram:
+    """Cumulative buckets plus a window of recent observations"""
+
+    def __init__(self, window):
+        self.count = 0
+        self.sum = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.recent = deque(maxlen=window)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.sum += seconds
+        self.buckets[bisect_left(BUCKETS, seconds)] += 1
+        self.recent.append(seconds)
+
+
+class StageMetrics:
+    """
+    Latency histograms per stage and LLM token counters.
+    All methods are thread-safe.
+    """
+
+    def __init__(self, window=1024):
+        self.window = window
+        self._lock = threading.Lock()
+        self._stages = {}
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.llm_calls = 0
+
+    @classmethod
+    def from_env(cls):
+        """Metrics with TURN_METRICS_WINDOW recent observations per stage"""
+        return cls(window=int(os.getenv('TURN_METRICS_WINDOW', '1024')))
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = StageHistogram(self.window)
+            histogram.observe(seconds)
+
+    def count_tokens(self, prompt_tokens, completion_tokens):
+        with self._lock:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.llm_calls += 1
+
+    def _copy(self):
+        with self._lock:
+            stages = {stage: (histogram.count, histogram.sum, list(histogram.buckets), sorted(histogram.recent))
+                      for stage, histogram in self._stages.items()}
+            tokens = (self.llm_calls, self.prompt_tokens, self.completion_tokens)
+        order = {stage: i for i, stage in enumerate(STAGES)}
+        return sorted(stages.items(), key=lambda item: (order.get(item[0], len(order)), item[0])), tokens
+
+    def snapshot(self):
+        """Recent p50/p95/p99 (ms) and totals per stage, for /api/status"""
+        stages, (calls, prompt_tokens, completion_tokens) = self._copy()
+        return {
+            'stages': {
+                stage: {
+                    'count': count,
+                    'mean_ms': round(total / count * 1000, 3) if count else 0.0,
+                    **{f"p{int(q * 100)}_ms": round(quantile(recent, q) * 1000, 3) for q in QUANTILES},
+                }
+                for stage, (count, total, _buckets, recent) in stages
+            },
+            'llm_calls': calls,
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+        }
+
+    def prometheus(self, prefix='abilitypath'):
+        """All metrics in the Prometheus text exposition format"""
+        stages, (calls, prompt_tokens, completion_tokens) = self._copy()
+        lines = [
+            f"# HELP {prefix}_stage_seconds Time spent in each stage of a chat turn.",
+            f"# TYPE {prefix}_stage_seconds histogram",
+        ]
+        for stage, (count, total, buckets, _recent) in stages:
+            cumulative = 0
+            for bound, in_bucket in zip(BUCKETS, buckets):
+                cumulative += in_bucket
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {total:.9f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {count}')
+
+        lines += [
+            f"# HELP {prefix}_stage_recent_seconds Stage latency quantiles over the last {self.window} observations.",
+            f"# TYPE {prefix}_stage_recent_seconds summary",
+        ]
+        for stage, (count, total, _buckets, recent) in stages:
+            for q in QUANTILES:
+                lines.append(f'{prefix}_stage_recent_seconds{{stage="{stage}",quantile="{q}"}} '
+                             f'{quantile(recent, q):.9f}')
+            lines.append(f'{prefix}_stage_recent_seconds_sum{{stage="{stage}"}} {sum(recent):.9f}')
+            lines.append(f'{prefix}_stage_recent_seconds_count{{stage="{stage}"}} {len(recent)}')
+
+        lines += [
+            f"# HELP {prefix}_llm_calls_total LLM calls made by chat turns.",
+            f"# TYPE {prefix}_llm_calls_total counter",
+            f"{prefix}_llm_calls_total {calls}",
+            f"# HELP {prefix}_llm_tokens_total LLM tokens used by chat turns.",
+            f"# TYPE {prefix}_llm_tokens_total counter",
+            f'{prefix}_llm_tokens_total{{kind="prompt"}} {prompt_tokens}',
+            f'{prefix}_llm_tokens_total{{kind="completion"}} {completion_tokens}',
+        ]
+        return '\n'.join(lines) + '\n'
+
+
+class Span:
+    """One timed stage of a turn; `attrs` holds extra fields such as token counts"""
+
+    __slots__ = ('stage', 'seconds', 'attrs', '_trace', '_start')
+
+    def __init__(self, trace, stage):
+        self.stage = stage
+        self.seconds = None
+        self.attrs = {}
+        self._trace = trace
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self._start
+        self._trace.spans.append(self)
+        self._trace.metrics.observe(self.stage, self.seconds)
+        return False
+
+    def to_dict(self):
+        return {'stage': self.stage, 'ms': round(self.seconds * 1000, 3), **self.attrs}
+
+
+class TurnTrace:
+    """The spans of one chat turn"""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self.spans = []
+
+    def span(self, stage):
+        """Context manager timing `stage`; yields the Span"""
+        return Span(self, stage)
+
+    def to_list(self):
+        """Finished spans as dicts, in the order they ended"""
+        return [span.to_dict() for span in self.spans]
+
+
+class TokenUsageHandler(BaseCallbackHandler):
+    """
+    Callback that records prompt/completion tokens of one LLM call on a
+    span (and in the metrics) once the call ends
+    """
+
+    # Called on the event loop thread in async calls, not an executor
+    run_inline = True
+
+    def __init__(self, span):
+        self.span = span
+        self._messages = None
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self._messages = messages
+
+    def on_llm_end(self, response, **kwargs):
+        usage = (response.llm_output or {}).get('token_usage') or {}
+        prompt_tokens = usage.get('prompt_tokens')
+        completion_tokens = usage.get('completion_tokens')
+        estimated = prompt_tokens is None or completion_tokens is None
+        if prompt_tokens is None:
+            prompt_tokens = sum(count_tokens(message.content)
+                                for batch in self._messages or () for message in batch)
+        if completion_tokens is None:
+            completion_tokens = sum(count_tokens(generation.text)
+                                    for generations in response.generations for generation in generations)
+
+        self.span.attrs.update(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                               tokens_estimated=estimated)
+        self.span._trace.metrics.count_tokens(prompt_tokens, completion_tokens)
+
+
+_METRICS = StageMetrics.from_env()
+
+
+def get_stage_metrics():
+    """The process-wide StageMetrics"""
+    return _METRICS
@@ -37,6 +37,7 @@ def check_file_structure():
     required_files = [
         "requirements.txt",
         "programs_database.py",
+        "programs_catalog.pack",
         "screening_agent.py",
         "web_app.py",
         "templates/index.html",
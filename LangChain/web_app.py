@@ -3,32 +3,64 @@ Simple Web Application for the AI Screening Agent
 This creates a basic web interface so you can chat with the agent in a browser
 """
 
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, render_template, request, jsonify, session, Response, stream_with_context
 from flask_cors import CORS
 import os
 from dotenv import load_dotenv
-from screening_agent import ScreeningAgent
+from screening_agent import (ScreeningAgent, get_catalog_cache_stats, get_recommendation_cache_stats,
+                             get_stage_timings, get_turn_stats)
+from fake_llm import use_fake_llm
+from sse import format_sse, SSE_HEADERS
+from session_store import SessionStore
+from session_state import session_secret_key, state_store_from_env
+from llm_client import get_llm_factory
+from catalog_store import get_catalog_store
+from turn_metrics import get_stage_metrics
+from agent_log import (ADMIN_TOKEN_HEADER, get_logger, get_log_settings, log_admin_authorized,
+                       log_admin_enabled, update_log_settings)
 import secrets
 
 # Load environment variables
 load_dotenv()
 
 app = Flask(__name__)
-app.secret_key = secrets.token_hex(16)  # For session management
+app.secret_key = session_secret_key()  # For session management
 CORS(app)
 
-# Store agents per session (in production, use Redis or database)
-agents = {}
+def create_agent(session_id):
+    """Create an agent for a new session"""
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key and not use_fake_llm():
+        raise ValueError("OPENAI_API_KEY not found in environment variables")
+    return ScreeningAgent(api_key)
+
+
+# Bounded per-session agents (LRU + idle TTL; see session_store.py)
+agents = SessionStore.from_env(create_agent)
+
+
+# Optional shared session state, so any worker process can serve any session
+state_store = state_store_from_env()
+
+
+# Program catalog; reloads itself when CATALOG_PATH changes (see catalog_store.py)
+catalog_store = get_catalog_store()
 
 
 def get_agent(session_id):
     """Get or create an agent for this session"""
-    if session_id not in agents:
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY not found in environment variables")
-        agents[session_id] = ScreeningAgent(api_key)
-    return agents[session_id]
+    agent = agents.get_or_create(session_id)
+    if state_store is not None:
+        state = state_store.load(session_id)
+        if state is not None:
+            agent.load_state(state)
+    return agent
+
+
+def save_agent(session_id, agent):
+    """Persist the session's state after a turn (if a state store is configured)"""
+    if state_store is not None:
+        state_store.save(session_id, agent.get_state())
 
 
 @app.route('/')
@@ -58,6 +90,7 @@ def chat():
         # Get agent and process message
         agent = get_agent(session_id)
         result = agent.chat(user_message)
+        save_agent(session_id, agent)
         
         return jsonify({
             'response': result['response'],
@@ -69,6 +102,38 @@ def chat():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """Handle a chat message, streaming the reply as Server-Sent Events"""
+    
+    try:
+        # Get or create session ID
+        if 'session_id' not in session:
+            session['session_id'] = secrets.token_hex(16)
+        
+        session_id = session['session_id']
+        
+        # Get user message
+        data = request.json
+        user_message = data.get('message', '')
+        
+        if not user_message:
+            return jsonify({'error': 'No message provided'}), 400
+        
+        agent = get_agent(session_id)
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    def generate():
+        for event, payload in agent.chat_stream(user_message):
+            if event == 'done':
+                save_agent(session_id, agent)
+            yield format_sse(event, payload)
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers=SSE_HEADERS)
+
+
 @app.route('/api/reset', methods=['POST'])
 def reset():
     """Reset the conversation"""
@@ -76,8 +141,10 @@ def reset():
     try:
         if 'session_id' in session:
             session_id = session['session_id']
-            if session_id in agents:
-                agents[session_id].reset_conversation()
+            # Drop the session; the next message starts a fresh agent
+            agents.remove(session_id)
+            if state_store is not None:
+                state_store.delete(session_id)
         
         return jsonify({'success': True})
     
@@ -93,10 +160,47 @@ def status():
     
     return jsonify({
         'status': 'ok',
-        'openai_configured': bool(api_key and api_key != 'your_openai_api_key_here')
+        'openai_configured': bool(api_key and api_key != 'your_openai_api_key_here'),
+        'sessions': agents.metrics(),
+        'llm_pool': get_llm_factory().stats(),
+        'turns': get_turn_stats(),
+        'recommendation_cache': get_recommendation_cache_stats(),
+        'catalog_caches': get_catalog_cache_stats(),
+        'stage_timings': get_stage_timings(),
+        'catalog': catalog_store.stats(),
+        'logging': get_log_settings()
     })
 
 
+@app.route('/api/log-level', methods=['GET', 'POST'])
+def log_level():
+    """
+    Show or change terminal logging at runtime, e.g.
+    POST {"level": "debug", "sample_rate": 0.1}
+    Served only when LOG_ADMIN_TOKEN is set; send it in X-Admin-Token.
+    """
+    
+    if not log_admin_enabled():
+        return jsonify({'error': 'Not found'}), 404
+    if not log_admin_authorized(request.headers.get(ADMIN_TOKEN_HEADER)):
+        return jsonify({'error': 'Forbidden'}), 403
+    
+    if request.method == 'POST':
+        try:
+            settings = update_log_settings(request.get_json(silent=True) or {})
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+        get_logger('web').info("log settings changed", **settings)
+    
+    return jsonify(get_log_settings())
+
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Per-stage latency histograms and LLM token counts (Prometheus text format)"""
+    return Response(get_stage_metrics().prometheus(), mimetype='text/plain; version=0.0.4')
+
+
 if __name__ == '__main__':
     # Check for API key
     api_key = os.getenv("OPENAI_API_KEY")
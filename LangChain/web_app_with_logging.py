@@ -6,52 +6,106 @@ To use: Rename this to web_app.py or run directly:
 python3 web_app_with_logging.py
 """
 
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, render_template, request, jsonify, session, Response, stream_with_context
 from flask_cors import CORS
 import os
 from dotenv import load_dotenv
-from screening_agent import ScreeningAgent
+from screening_agent import (ScreeningAgent, get_catalog_cache_stats, get_recommendation_cache_stats,
+                             get_stage_timings, get_turn_stats)
+from fake_llm import use_fake_llm
+from sse import format_sse, SSE_HEADERS
+from session_store import SessionStore
+from session_state import session_secret_key, state_store_from_env
+from llm_client import get_llm_factory
+from catalog_store import get_catalog_store
+from turn_metrics import get_stage_metrics
+from agent_log import (ADMIN_TOKEN_HEADER, get_logger, get_log_settings, log_admin_authorized,
+                       log_admin_enabled, update_log_settings)
+from conversation_log import ConversationLogWriter
+from conversation_stats import ConversationStats
+import atexit
 import secrets
-import json
 from datetime import datetime
 
 # Load environment variables
 load_dotenv()
 
+log = get_logger('web')
+
 app = Flask(__name__)
-app.secret_key = secrets.token_hex(16)
+app.secret_key = session_secret_key()
 CORS(app)
 
-# Store agents per session
-agents = {}
+# Conversation log; lines are batched and written by a background thread
+conversation_log = ConversationLogWriter.from_env()
+
+# Stats over the log, caught up from the last checkpoint and then updated
+# after every batch the writer appends
+conversation_stats = ConversationStats.from_env(conversation_log.path)
+conversation_stats.refresh()
+conversation_log.add_listener(conversation_stats.refresh)
+conversation_log.start()
+
+
+def _close_logs():
+    conversation_log.close()
+    conversation_stats.close()
 
-# Create logs directory
-os.makedirs('logs', exist_ok=True)
 
-def log_conversation(session_id, user_message, agent_response, collected_info, recommendations_provided):
-    """Log conversation to file for later analysis"""
+atexit.register(_close_logs)
+
+def log_conversation(session_id, user_message, agent_response, collected_info, recommendations_provided,
+                     recommended_programs=None, timings=None):
+    """Queue a conversation turn for the log file (later analysis)"""
     log_entry = {
         "timestamp": datetime.now().isoformat(),
         "session_id": session_id[:8],  # Shortened for privacy
         "user_message": user_message,
         "agent_response": agent_response[:200],  # First 200 chars
         "collected_info": collected_info,
-        "recommendations_provided": recommendations_provided
+        "recommendations_provided": recommendations_provided,
+        "recommended_programs": recommended_programs or [],
+        "timings": timings or []  # Per-stage spans (see turn_metrics.py)
     }
     
-    # Save to JSONL file (one JSON object per line)
-    with open('logs/conversations.jsonl', 'a') as f:
-        f.write(json.dumps(log_entry) + '\n')
+    # Appended to the JSONL file (one JSON object per line) off the request thread
+    conversation_log.write(log_entry)
+
+
+def create_agent(session_id):
+    """Create an agent for a new session"""
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key and not use_fake_llm():
+        raise ValueError("OPENAI_API_KEY not found in environment variables")
+    return ScreeningAgent(api_key)
+
+
+# Bounded per-session agents (LRU + idle TTL; see session_store.py)
+agents = SessionStore.from_env(create_agent)
+
+
+# Optional shared session state, so any worker process can serve any session
+state_store = state_store_from_env()
+
+
+# Program catalog; reloads itself when CATALOG_PATH changes (see catalog_store.py)
+catalog_store = get_catalog_store()
 
 
 def get_agent(session_id):
     """Get or create an agent for this session"""
-    if session_id not in agents:
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY not found in environment variables")
-        agents[session_id] = ScreeningAgent(api_key)
-    return agents[session_id]
+    agent = agents.get_or_create(session_id)
+    if state_store is not None:
+        state = state_store.load(session_id)
+        if state is not None:
+            agent.load_state(state)
+    return agent
+
+
+def save_agent(session_id, agent):
+    """Persist the session's state after a turn (if a state store is configured)"""
+    if state_store is not None:
+        state_store.save(session_id, agent.get_state())
 
 
 @app.route('/')
@@ -75,29 +129,18 @@ def chat():
         data = request.json
         user_message = data.get('message', '')
         
-        # 🔍 LOGGING: Print to terminal
-        print("\n" + "="*70)
-        print(f"📨 NEW MESSAGE from session: {session_id[:8]}...")
-        print(f"👤 User: {user_message}")
-        print("-"*70)
-        
         if not user_message:
             return jsonify({'error': 'No message provided'}), 400
         
         # Get agent and process message
         agent = get_agent(session_id)
         result = agent.chat(user_message)
+        save_agent(session_id, agent)
         
-        # 🔍 LOGGING: Print agent response
-        print(f"🤖 Agent: {result['response'][:150]}...")  # First 150 chars
-        print("-"*70)
-        print(f"📊 Collected Info:")
-        print(f"   Age: {result.get('collected_info', {}).get('age', 'Not yet extracted')}")
-        print(f"   Needs: {list(result.get('collected_info', {}).get('needs', {}).keys())}")
-        print(f"   Needs count: {len(result.get('collected_info', {}).get('needs', {}))}")
-        print("-"*70)
-        print(f"{'✅ RECOMMENDATIONS PROVIDED' if result.get('recommendations_provided') else '⏳ Still gathering info'}")
-        print("="*70 + "\n")
+        # 🔍 LOGGING: One line per turn in the terminal
+        log.info("message", session=session_id[:8], user=user_message, agent=result['response'][:150],
+                 collected_info=result.get('collected_info', {}),
+                 recommendations=result.get('recommendations_provided', False))
         
         # 🔍 LOGGING: Save to file
         log_conversation(
@@ -105,7 +148,9 @@ def chat():
             user_message,
             result['response'],
             result.get('collected_info', {}),
-            result.get('recommendations_provided', False)
+            result.get('recommendations_provided', False),
+            result.get('recommended_programs'),
+            agent.turn_timings()
         )
         
         return jsonify({
@@ -115,8 +160,60 @@ def chat():
         })
     
     except Exception as e:
-        print(f"\n❌ ERROR: {str(e)}\n")
+        log.error("chat request failed", exc_info=True, error=e)
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """Handle a chat message, streaming the reply as Server-Sent Events"""
+    
+    try:
+        # Get or create session ID
+        if 'session_id' not in session:
+            session['session_id'] = secrets.token_hex(16)
+        
+        session_id = session['session_id']
+        
+        # Get user message
+        data = request.json
+        user_message = data.get('message', '')
+        
+        if not user_message:
+            return jsonify({'error': 'No message provided'}), 400
+        
+        agent = get_agent(session_id)
+    
+    except Exception as e:
+        log.error("chat request failed", exc_info=True, error=e)
         return jsonify({'error': str(e)}), 500
+    
+    def generate():
+        response_parts = []
+        for event, payload in agent.chat_stream(user_message):
+            if event == 'done':
+                save_agent(session_id, agent)
+                # 🔍 LOGGING: One line per turn in the terminal
+                log.info("message", session=session_id[:8], user=user_message, agent=''.join(response_parts)[:150],
+                         collected_info=payload['collected_info'], recommendations=payload['recommendations_provided'],
+                         stream=True)
+                # 🔍 LOGGING: Save to file once the whole reply is known
+                log_conversation(
+                    session_id,
+                    user_message,
+                    ''.join(response_parts),
+                    payload['collected_info'],
+                    payload['recommendations_provided'],
+                    payload.get('recommended_programs'),
+                    agent.turn_timings()
+                )
+            elif event == 'token' or not response_parts:
+                response_parts.append(payload)
+            else:
+                response_parts.append('\n\n' + payload)
+            yield format_sse(event, payload)
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers=SSE_HEADERS)
 
 
 @app.route('/api/reset', methods=['POST'])
@@ -126,9 +223,11 @@ def reset():
     try:
         if 'session_id' in session:
             session_id = session['session_id']
-            if session_id in agents:
-                agents[session_id].reset_conversation()
-                print(f"\n🔄 RESET conversation for session: {session_id[:8]}...\n")
+            # Drop the session; the next message starts a fresh agent
+            if state_store is not None:
+                state_store.delete(session_id)
+            if agents.remove(session_id) is not None:
+                log.info("reset", session=session_id[:8])
         
         return jsonify({'success': True})
     
@@ -144,40 +243,61 @@ def status():
     
     return jsonify({
         'status': 'ok',
-        'openai_configured': bool(api_key and api_key != 'your_openai_api_key_here')
+        'openai_configured': bool(api_key and api_key != 'your_openai_api_key_here'),
+        'sessions': agents.metrics(),
+        'llm_pool': get_llm_factory().stats(),
+        'turns': get_turn_stats(),
+        'recommendation_cache': get_recommendation_cache_stats(),
+        'catalog_caches': get_catalog_cache_stats(),
+        'stage_timings': get_stage_timings(),
+        'catalog': catalog_store.stats(),
+        'conversation_log': conversation_log.stats(),
+        'conversation_stats': conversation_stats.stats(),
+        'logging': get_log_settings()
     })
 
 
+@app.route('/api/log-level', methods=['GET', 'POST'])
+def log_level():
+    """
+    Show or change terminal logging at runtime, e.g.
+    POST {"level": "debug", "sample_rate": 0.1}
+    Served only when LOG_ADMIN_TOKEN is set; send it in X-Admin-Token.
+    """
+    
+    if not log_admin_enabled():
+        return jsonify({'error': 'Not found'}), 404
+    if not log_admin_authorized(request.headers.get(ADMIN_TOKEN_HEADER)):
+        return jsonify({'error': 'Forbidden'}), 403
+    
+    if request.method == 'POST':
+        try:
+            settings = update_log_settings(request.get_json(silent=True) or {})
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+        log.info("log settings changed", **settings)
+    
+    return jsonify(get_log_settings())
+
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Per-stage latency histograms and LLM token counts (Prometheus text format)"""
+    return Response(get_stage_metrics().prometheus(), mimetype='text/plain; version=0.0.4')
+
+
 @app.route('/api/stats', methods=['GET'])
 def stats():
-    """Get conversation statistics from logs"""
+    """
+    Conversation statistics from the log (kept up to date incrementally).
+    ?window=hour|day|week or a number of seconds limits them to recent turns.
+    """
     
     try:
-        if not os.path.exists('logs/conversations.jsonl'):
-            return jsonify({
-                'total_conversations': 0,
-                'successful_matches': 0,
-                'average_age': 0
-            })
-        
-        with open('logs/conversations.jsonl', 'r') as f:
-            logs = [json.loads(line) for line in f]
-        
-        total = len(logs)
-        successful = sum(1 for log in logs if log.get('recommendations_provided'))
-        
-        ages = [log['collected_info'].get('age') for log in logs if log['collected_info'].get('age')]
-        avg_age = sum(ages) / len(ages) if ages else 0
-        
-        return jsonify({
-            'total_conversations': total,
-            'successful_matches': successful,
-            'average_age': round(avg_age, 1),
-            'success_rate': round(successful / total * 100, 1) if total > 0 else 0
-        })
+        return jsonify(conversation_stats.report(request.args.get('window')))
     
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    except ValueError as e:
+        return jsonify({'error': f"invalid window: {e}"}), 400
 
 
 if __name__ == '__main__':
@@ -197,9 +317,11 @@ if __name__ == '__main__':
     print("🚀 Starting AbilityPath Screening Agent (WITH LOGGING)")
     print("="*70)
     print("\n📊 Features enabled:")
-    print("   ✅ Terminal logging - see every message")
-    print("   ✅ File logging - conversations saved to logs/conversations.jsonl")
-    print("   ✅ Statistics endpoint - GET /api/stats")
+    print(f"   ✅ Terminal logging - one line per message (level: {get_log_settings()['level']}"
+          + (", change with POST /api/log-level)" if log_admin_enabled() else ")"))
+    print(f"   ✅ File logging - conversations saved to {conversation_log.path}")
+    print("   ✅ Statistics endpoint - GET /api/stats (?window=hour|day|week)")
+    print("   ✅ Stage latency metrics - GET /api/metrics (Prometheus)")
     print("\nAccess the web interface at: http://localhost:5001")
     print("Press Ctrl+C to stop the server\n")
     print("="*70 + "\n")